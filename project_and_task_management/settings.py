@@ -13,6 +13,10 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 from pathlib import Path
 
+import django
+from decouple import config
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -43,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "userapi.middleware.performance_middleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -50,6 +55,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "userapi.middleware.replica_pinning_middleware",
 ]
 
 ROOT_URLCONF = "project_and_task_management.urls"
@@ -76,12 +82,131 @@ WSGI_APPLICATION = "project_and_task_management.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# DB_ENGINE selects "sqlite" (default) or "postgres". PostgreSQL needs psycopg
+# installed and keeps connections open for DB_CONN_MAX_AGE seconds, or pools
+# them with DB_POOL=True on Django 5.1+.
+
+DB_ENGINE = config("DB_ENGINE", default="sqlite")
+
+if DB_ENGINE == "postgres":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": config("DB_NAME", default="project_and_task_management"),
+            "USER": config("DB_USER", default="postgres"),
+            "PASSWORD": config("DB_PASSWORD", default=""),
+            "HOST": config("DB_HOST", default="localhost"),
+            "PORT": config("DB_PORT", default="5432"),
+            "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", default=60, cast=int),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {},
+        }
+    }
+    if config("DB_POOL", default=False, cast=bool):
+        if django.VERSION < (5, 1):
+            raise ImproperlyConfigured(
+                "DB_POOL requires Django 5.1+; use an external pooler such as "
+                "PgBouncer with DB_DISABLE_SERVER_SIDE_CURSORS=True instead."
+            )
+        # Pooled connections are returned to the pool, not kept per thread.
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": config("DB_POOL_MIN_SIZE", default=2, cast=int),
+            "max_size": config("DB_POOL_MAX_SIZE", default=20, cast=int),
+        }
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = config(
+        "DB_DISABLE_SERVER_SIDE_CURSORS", default=False, cast=bool
+    )
+elif DB_ENGINE == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": config("DB_NAME", default=str(BASE_DIR / "db.sqlite3")),
+            "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", default=0, cast=int),
+            # Seconds to wait for a lock held by another writer before failing.
+            "OPTIONS": {"timeout": config("DB_TIMEOUT", default=20, cast=int)},
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"Unknown DB_ENGINE {DB_ENGINE!r}.")
+
+# Read replicas: DB_REPLICA_HOSTS is a comma separated list of PostgreSQL hosts
+# that share the primary's credentials; with SQLite, DB_REPLICA_NAME names a
+# second database file (kept in sync by hand) to exercise routing locally. GET
+# requests read from a random replica until they write; other methods use the
+# primary. Test runs point every replica at the test database.
+
+if DB_ENGINE == "postgres":
+    replica_hosts = [h for h in config("DB_REPLICA_HOSTS", default="").split(",") if h]
+    for index, host in enumerate(replica_hosts, 1):
+        DATABASES[f"replica_{index}"] = {
+            **DATABASES["default"],
+            "HOST": host,
+            "TEST": {"MIRROR": "default"},
+        }
+elif config("DB_REPLICA_NAME", default=""):
+    DATABASES["replica_1"] = {
+        **DATABASES["default"],
+        "NAME": config("DB_REPLICA_NAME"),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["userapi.routers.PrimaryReplicaRouter"]
+
+# PRAGMAs run on every new SQLite connection (userapi.signals). WAL lets readers
+# proceed while a write is in progress; set DB_SQLITE_TUNED=False to use
+# SQLite's rollback-journal defaults.
+
+SQLITE_PRAGMAS = (
+    {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 20000,
+        "mmap_size": 134217728,
+        "cache_size": -20000,
+        "temp_store": "MEMORY",
+    }
+    if config("DB_SQLITE_TUNED", default=True, cast=bool)
+    else {}
+)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# CACHE_BACKEND selects "locmem" (default), "file" or "redis"; CACHE_LOCATION is
+# the directory for "file" and the server URL for "redis".
+
+CACHE_BACKEND = config("CACHE_BACKEND", default="locmem")
+
+if CACHE_BACKEND == "redis":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": config("CACHE_LOCATION", default="redis://127.0.0.1:6379"),
+        }
+    }
+elif CACHE_BACKEND == "file":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": config("CACHE_LOCATION", default=str(BASE_DIR / "cache")),
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
     }
-}
+
+# Serialized list responses, keyed by user and project and invalidated on writes
+
+RESPONSE_CACHE_ENABLED = True
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TIMEOUT = 300
 
 
 # Password validation
@@ -97,6 +222,49 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing. PASSWORD_HASHER_PROFILE picks the hasher for new and
+# upgraded hashes: "pbkdf2" (default), "scrypt" or "argon2" (needs
+# argon2-cffi). The others stay listed so existing hashes still verify; they
+# are re-hashed with the preferred hasher and cost on the next login.
+
+PASSWORD_HASHER_PROFILE = config("PASSWORD_HASHER_PROFILE", default="pbkdf2")
+PASSWORD_HASHER_PROFILES = {
+    "pbkdf2": "userapi.hashers.TunedPBKDF2PasswordHasher",
+    "scrypt": "userapi.hashers.TunedScryptPasswordHasher",
+    "argon2": "userapi.hashers.TunedArgon2PasswordHasher",
+}
+if PASSWORD_HASHER_PROFILE not in PASSWORD_HASHER_PROFILES:
+    raise ImproperlyConfigured(
+        f"Unknown PASSWORD_HASHER_PROFILE {PASSWORD_HASHER_PROFILE!r}."
+    )
+if PASSWORD_HASHER_PROFILE == "argon2":
+    try:
+        import argon2  # noqa: F401
+    except ImportError:
+        raise ImproperlyConfigured(
+            "PASSWORD_HASHER_PROFILE=argon2 requires the argon2-cffi package."
+        )
+
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE],
+    *(
+        hasher
+        for profile, hasher in PASSWORD_HASHER_PROFILES.items()
+        if profile != PASSWORD_HASHER_PROFILE
+    ),
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+]
+
+PBKDF2_ITERATIONS = config("PBKDF2_ITERATIONS", default=720000, cast=int)
+SCRYPT_WORK_FACTOR = config("SCRYPT_WORK_FACTOR", default=2**14, cast=int)
+SCRYPT_BLOCK_SIZE = config("SCRYPT_BLOCK_SIZE", default=8, cast=int)
+SCRYPT_PARALLELISM = config("SCRYPT_PARALLELISM", default=1, cast=int)
+ARGON2_TIME_COST = config("ARGON2_TIME_COST", default=2, cast=int)
+ARGON2_MEMORY_COST = config("ARGON2_MEMORY_COST", default=102400, cast=int)
+ARGON2_PARALLELISM = config("ARGON2_PARALLELISM", default=8, cast=int)
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
 
@@ -119,3 +287,121 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+# JSON is encoded/decoded with orjson when installed; the browsable API is only
+# served in DEBUG.
+
+REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": [
+        "userapi.renderers.FastJSONRenderer",
+        *(["rest_framework.renderers.BrowsableAPIRenderer"] if DEBUG else []),
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "userapi.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+}
+
+
+# Names of userapi routes served by the async (ASGI-native) views instead of the
+# DRF ones: "projects", "tasks", "task-detail", "members", "member-detail".
+
+ASYNC_API_VIEWS = []
+
+
+# Task change events streamed as server-sent events. Point TASK_EVENT_BROKER at
+# another class with publish()/subscribe() to fan out across processes.
+
+TASK_EVENT_BROKER = "userapi.events.InMemoryBroker"
+TASK_EVENT_BROKER_OPTIONS = {"history": 1000, "queue_size": 1000, "projects": 1000}
+TASK_EVENT_HEARTBEAT = 15
+
+
+# Per-request timing (Server-Timing headers, /api/metrics/ and slow request
+# logging with SQL). Off unless PERF_METRICS=True.
+
+PERF_METRICS_ENABLED = config("PERF_METRICS", default=False, cast=bool)
+PERF_SLOW_REQUEST_MS = config("PERF_SLOW_REQUEST_MS", default=500, cast=int)
+
+
+# Task list pagination
+
+TASK_PAGE_SIZE = 100
+TASK_MAX_PAGE_SIZE = 1000
+
+# Seconds a sync watermark trails the clock, so rows stamped just before a
+# changes read but committed after it are not skipped.
+
+TASK_SYNC_SETTLE_SECONDS = 5
+
+
+# Searches only rank the newest this many tasks matching the query among the
+# tasks the user can see; 0 ranks every match, which is slow for common terms on
+# large tables.
+
+TASK_SEARCH_RANK_WINDOW = 10000
+
+
+# Per-process cache of resolved project permissions, keyed by (user, project).
+# Changes made in other processes show up once entries expire, so keep the TTL
+# short; DELETE requests always check the database.
+
+PERMISSION_CACHE_SIZE = 10000
+PERMISSION_CACHE_TTL = 5
+
+
+# Authenticate requests from the signed token claims instead of loading the
+# user row; the full row is fetched lazily through a per-process cache.
+
+JWT_STATELESS_AUTH = True
+USER_CACHE_SIZE = 10000
+USER_CACHE_TTL = 300
+
+
+# Access tokens are short-lived; clients exchange the single-use refresh token
+# at auth/refresh/ for a new pair without sending the password again. Used
+# refresh token ids are kept until they expire, and expired ids are pruned on
+# a JWT_REVOCATION_PRUNE_RATE fraction of refreshes.
+
+JWT_ACCESS_TOKEN_LIFETIME = config("JWT_ACCESS_TOKEN_LIFETIME", default=900, cast=int)
+JWT_REFRESH_TOKEN_LIFETIME = config(
+    "JWT_REFRESH_TOKEN_LIFETIME", default=30 * 86400, cast=int
+)
+JWT_REVOCATION_PRUNE_RATE = 0.01
+
+
+# Bulk task endpoint limits
+
+TASK_BULK_MAX_ITEMS = 10000
+TASK_BULK_BATCH_SIZE = 1000
+
+MEMBER_BULK_MAX_ITEMS = 1000
+
+# Task imports validate and insert this many rows per transaction, and report
+# at most TASK_IMPORT_MAX_ERRORS rejected rows.
+
+TASK_IMPORT_MAX_ITEMS = 100000
+TASK_IMPORT_BATCH_SIZE = 1000
+TASK_IMPORT_MAX_ERRORS = 1000
+
+
+# Streaming task exports read this many rows per database round trip.
+
+TASK_EXPORT_CHUNK_SIZE = 2000
+TASK_EXPORT_GZIP_LEVEL = 6
+
+
+# Background jobs run by `manage.py worker`. A running job whose worker has not
+# reported progress for JOB_LEASE_SECONDS is retried; failed jobs are retried
+# after JOB_RETRY_DELAY seconds, doubling on every attempt. Workers delete
+# export files and leftover uploads older than JOB_FILES_RETENTION seconds.
+
+JOB_FILES_ROOT = config("JOB_FILES_ROOT", default=str(BASE_DIR / "job_files"))
+JOB_LEASE_SECONDS = 300
+JOB_RETRY_DELAY = 10
+JOB_CLAIM_CANDIDATES = 10
+JOB_BATCH_SIZE = 1000
+JOB_FILES_RETENTION = 24 * 60 * 60
@@ -0,0 +1,417 @@
+from io import BytesIO
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import (
+    APIException,
+    AuthenticationFailed,
+    NotAuthenticated,
+    ParseError,
+    PermissionDenied,
+    ValidationError,
+)
+from .authentication import UserAuthentication
+from .cache import invalidate_owner
+from .events import get_broker
+from .filters import filter_tasks, get_task_ordering
+from .jobs import aenqueue, job_accepted
+from .models import Project, ProjectMember, Task
+from .pagination import KeysetPaginator
+from .permissions import aget_project_access
+from .renderers import FastJSONParser, FastJSONRenderer
+from .serializers import (
+    ProjectMemberSerializer,
+    ProjectMemberValuesSerializer,
+    ProjectSerializer,
+    ProjectValuesSerializer,
+    TaskBulkSerializer,
+    TaskSerializer,
+    TaskValuesSerializer,
+)
+from .utils import get_requested_fields
+from .versioning import (
+    aowner_projects_state,
+    aproject_etag,
+    etag_matches,
+    owner_projects_etag,
+)
+
+
+class AsyncAPIView(View):
+    """
+    Plain Django async view with the JWT authentication, project permissions
+    and JSON handling of the DRF views, so requests never leave the event loop
+    except for serializer validation and saves.
+
+    ``project_capabilities`` maps lower-case HTTP methods to the capability a
+    user needs in ``project_id`` (``None`` for plain membership); methods not
+    listed only require an authenticated user.
+    """
+
+    authentication = UserAuthentication()
+    renderer = FastJSONRenderer()
+    parser = FastJSONParser()
+    project_capabilities = {}
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Lets the pagination, filter and field helpers shared with the DRF
+        # views read the query string.
+        request.query_params = request.GET
+        method = request.method.lower()
+        handler = getattr(self, method, None)
+        if method not in self.http_method_names or handler is None:
+            return self.respond(
+                {"detail": f'Method "{request.method}" not allowed.'},
+                status.HTTP_405_METHOD_NOT_ALLOWED,
+            )
+        try:
+            await self.authenticate(request)
+            await self.check_permissions(request, method, kwargs.get("project_id"))
+            return await handler(request, *args, **kwargs)
+        except ValidationError as e:
+            return self.respond({"error": e.detail}, status.HTTP_400_BAD_REQUEST)
+        except (AuthenticationFailed, NotAuthenticated) as e:
+            # UserAuthentication sends no WWW-Authenticate challenge, so DRF
+            # answers these with 403 as well.
+            return self.respond({"detail": e.detail}, status.HTTP_403_FORBIDDEN)
+        except APIException as e:
+            return self.respond({"detail": e.detail}, e.status_code)
+        except Exception as e:
+            return self.respond(
+                {"error": str(e)}, status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    async def authenticate(self, request):
+        result = await self.authentication.aauthenticate(request)
+        if result is None:
+            raise NotAuthenticated()
+        request.user, request.auth = result
+
+    async def check_permissions(self, request, method, project_id):
+        if method not in self.project_capabilities:
+            return
+        capability = self.project_capabilities[method]
+        access = await aget_project_access(request, project_id)
+        if not access.allows(capability):
+            raise PermissionDenied()
+
+    def parse(self, request):
+        if not request.body:
+            return {}
+        data = self.parser.parse(BytesIO(request.body))
+        if not isinstance(data, dict):
+            raise ParseError("Expected a JSON object.")
+        return data
+
+    def respond(self, data=None, status_code=status.HTTP_200_OK, etag=None):
+        if data is None:
+            response = HttpResponse(status=status_code)
+        else:
+            response = HttpResponse(
+                self.renderer.render(data),
+                content_type="application/json",
+                status=status_code,
+            )
+        if etag:
+            response["ETag"] = etag
+        return response
+
+    def not_found(self, name):
+        return self.respond(
+            {"error": f"No {name} matches the given query."},
+            status.HTTP_404_NOT_FOUND,
+        )
+
+
+class AsyncProjectAPIView(AsyncAPIView):
+    async def get(self, request):
+        state = await aowner_projects_state(request)
+        etag = owner_projects_etag(request, state)
+        if etag_matches(request, etag):
+            return self.respond(status_code=status.HTTP_304_NOT_MODIFIED, etag=etag)
+        serializer = ProjectValuesSerializer()
+        projects = Project.objects.filter(deleted=False, owner=request.user.id)
+        data = [
+            serializer.to_representation(row)
+            async for row in projects.values(*serializer.columns)
+        ]
+        return self.respond({"data": data}, etag=etag)
+
+    async def post(self, request):
+        data = self.parse(request)
+        data["owner"] = request.user.id
+        serializer = ProjectSerializer(data=data)
+        if await sync_to_async(serializer.is_valid)():
+            await sync_to_async(serializer.save)()
+            return self.respond(
+                {"msg": "Project created successfully", "data": serializer.data},
+                status.HTTP_201_CREATED,
+            )
+        return self.respond({"error": serializer.errors}, status.HTTP_400_BAD_REQUEST)
+
+    async def put(self, request, pk=None):
+        if not pk:
+            return self.respond(
+                {"error": "Project id not provided in url."},
+                status.HTTP_400_BAD_REQUEST,
+            )
+        project = await Project.objects.filter(id=pk).afirst()
+        if project is None:
+            return self.not_found("Project")
+        if project.owner_id != request.user.id:
+            return self.respond(
+                {"error": "Only owner can update the project."},
+                status.HTTP_400_BAD_REQUEST,
+            )
+        serializer = ProjectSerializer(project, data=self.parse(request), partial=True)
+        if await sync_to_async(serializer.is_valid)():
+            await sync_to_async(serializer.save)()
+            await sync_to_async(invalidate_owner)(request.user.id)
+            return self.respond(
+                {"msg": "Project updated successfully", "data": serializer.data}
+            )
+        return self.respond({"error": serializer.errors}, status.HTTP_400_BAD_REQUEST)
+
+    async def delete(self, request, pk=None):
+        if not pk:
+            return self.respond(
+                {"error": "Project id not provided in url."},
+                status.HTTP_400_BAD_REQUEST,
+            )
+        project = await Project.objects.filter(id=pk).afirst()
+        if project is None:
+            return self.not_found("Project")
+        if project.owner_id != request.user.id:
+            return self.respond(
+                {"error": "Only owner can delete the project."},
+                status.HTTP_400_BAD_REQUEST,
+            )
+        if project.deleted:
+            return self.respond(
+                {"msg": "Project already deleted."}, status.HTTP_400_BAD_REQUEST
+            )
+        project.deleted = True
+        await project.asave()
+        job = await aenqueue("project.delete", request.user.id, project.id)
+        data, headers = job_accepted(job)
+        response = self.respond(
+            {"msg": "Project deleted successfully!", **data},
+            status.HTTP_202_ACCEPTED,
+        )
+        response["Location"] = headers["Location"]
+        return response
+
+
+class AsyncProjectMemberAPIView(AsyncAPIView):
+    project_capabilities = {
+        "get": "add_members",
+        "post": "add_members",
+        "put": "add_members",
+        "delete": "add_members",
+    }
+
+    async def get(self, request, project_id):
+        etag = await aproject_etag(request, project_id)
+        if etag_matches(request, etag):
+            return self.respond(status_code=status.HTTP_304_NOT_MODIFIED, etag=etag)
+        serializer = ProjectMemberValuesSerializer()
+        members = ProjectMember.objects.filter(deleted=False, project=project_id)
+        data = [
+            serializer.to_representation(row)
+            async for row in members.values(*serializer.columns)
+        ]
+        return self.respond({"data": data}, etag=etag)
+
+    async def post(self, request, project_id):
+        data = self.parse(request)
+        data["project"] = project_id
+        serializer = ProjectMemberSerializer(data=data)
+        if await sync_to_async(serializer.is_valid)():
+            await sync_to_async(serializer.save)()
+            return self.respond(
+                {"msg": "Member added successfully", "data": serializer.data},
+                status.HTTP_201_CREATED,
+            )
+        return self.respond({"error": serializer.errors}, status.HTTP_400_BAD_REQUEST)
+
+    async def put(self, request, project_id, user_id):
+        project_member = (
+            await ProjectMember.objects.filter(project_id=project_id, user_id=user_id)
+            .select_related("project", "user")
+            .afirst()
+        )
+        if project_member is None:
+            return self.not_found("ProjectMember")
+        serializer = ProjectMemberSerializer(
+            project_member, data=self.parse(request), partial=True
+        )
+        if await sync_to_async(serializer.is_valid)():
+            await sync_to_async(serializer.save)()
+            return self.respond(
+                {"msg": "Permissions updated successfully", "data": serializer.data}
+            )
+        return self.respond({"error": serializer.errors}, status.HTTP_400_BAD_REQUEST)
+
+    async def delete(self, request, project_id, user_id):
+        project_member = (
+            await ProjectMember.objects.filter(project_id=project_id, user_id=user_id)
+            .select_related("project")
+            .afirst()
+        )
+        if project_member is None:
+            return self.not_found("ProjectMember")
+        if project_member.project.owner_id != request.user.id:
+            return self.respond(
+                {"error": "Only project owner can delete members!"},
+                status.HTTP_400_BAD_REQUEST,
+            )
+        if project_member.deleted:
+            return self.respond(
+                {"msg": "Project Member already deleted."},
+                status.HTTP_400_BAD_REQUEST,
+            )
+        project_member.deleted = True
+        await project_member.asave()
+        return self.respond(status_code=status.HTTP_204_NO_CONTENT)
+
+
+class AsyncTaskAPIView(AsyncAPIView):
+    project_capabilities = {
+        "get": None,
+        "post": "can_create",
+        "put": "can_update",
+        "delete": "can_delete",
+    }
+
+    async def get(self, request, project_id):
+        etag = await aproject_etag(request, project_id)
+        if etag_matches(request, etag):
+            return self.respond(status_code=status.HTTP_304_NOT_MODIFIED, etag=etag)
+        fields = get_requested_fields(request, TaskSerializer.Meta.fields)
+        paginator = KeysetPaginator(ordering=get_task_ordering(request.query_params))
+        tasks = filter_tasks(
+            Task.objects.filter(deleted=False, project=project_id),
+            request.query_params,
+        )
+        serializer = TaskValuesSerializer(fields=fields)
+        tasks = tasks.values(*dict.fromkeys(serializer.columns + paginator.fields))
+        page, next_cursor = await paginator.apaginate_queryset(tasks, request)
+        if page or request.query_params:
+            return self.respond(
+                {"data": serializer.serialize(page), "next_cursor": next_cursor},
+                etag=etag,
+            )
+        return self.respond(
+            {"msg": "No tasks created yet against given project id."}, etag=etag
+        )
+
+    async def post(self, request, project_id):
+        serializer = TaskBulkSerializer(data=self.parse(request))
+        if not serializer.is_valid():
+            return self.respond(
+                {"error": serializer.errors}, status.HTTP_400_BAD_REQUEST
+            )
+        task = await Task.objects.acreate(
+            project_id=project_id,
+            created_by_id=request.user.id,
+            **serializer.validated_data,
+        )
+        return self.respond(
+            {"msg": "Task created successfully", "data": TaskSerializer(task).data},
+            status.HTTP_201_CREATED,
+        )
+
+    async def put(self, request, project_id, pk=None):
+        if not pk:
+            return self.respond(
+                {"error": "Task id not provided in url."},
+                status.HTTP_400_BAD_REQUEST,
+            )
+        task = await Task.objects.filter(id=pk, project=project_id).afirst()
+        if task is None:
+            return self.not_found("Task")
+        serializer = TaskBulkSerializer(task, data=self.parse(request), partial=True)
+        if not serializer.is_valid():
+            return self.respond(
+                {"error": serializer.errors}, status.HTTP_400_BAD_REQUEST
+            )
+        for field, value in serializer.validated_data.items():
+            setattr(task, field, value)
+        await task.asave()
+        return self.respond(
+            {"msg": "Task updated successfully", "data": TaskSerializer(task).data}
+        )
+
+    async def delete(self, request, project_id, pk=None):
+        if not pk:
+            return self.respond(
+                {"error": "Task id not provided in url."},
+                status.HTTP_400_BAD_REQUEST,
+            )
+        task = await Task.objects.filter(id=pk, project=project_id).afirst()
+        if task is None:
+            return self.not_found("Task")
+        if task.deleted:
+            return self.respond(
+                {"msg": "Task already deleted."}, status.HTTP_400_BAD_REQUEST
+            )
+        task.deleted = True
+        await task.asave()
+        return self.respond(status_code=status.HTTP_204_NO_CONTENT)
+
+
+class TaskEventStreamView(AsyncAPIView):
+    """
+    Server-sent events for task changes in a project. Clients resume with the
+    ``Last-Event-ID`` header (or ``last_event_id`` query parameter); a
+    ``reset`` event means buffered events were lost and the task list should
+    be refetched.
+    """
+
+    project_capabilities = {"get": None}
+
+    async def get(self, request, project_id):
+        if not isinstance(request, ASGIRequest):
+            # Under WSGI the never-ending stream would hold a worker thread for
+            # as long as the client stays connected.
+            return self.respond(
+                {"error": "Task events are only served over ASGI."},
+                status.HTTP_501_NOT_IMPLEMENTED,
+            )
+        last_event_id = request.headers.get("Last-Event-ID") or request.GET.get(
+            "last_event_id"
+        )
+        events = get_broker().subscribe(
+            project_id,
+            last_event_id,
+            heartbeat=getattr(settings, "TASK_EVENT_HEARTBEAT", 15),
+        )
+        response = StreamingHttpResponse(
+            self.stream(events), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    async def stream(self, events):
+        yield b"retry: 3000\n\n"
+        async for event in events:
+            if event is None:
+                yield b": keep-alive\n\n"
+                continue
+            lines = [f"event: {event.type}".encode()]
+            if event.id:
+                lines.append(f"id: {event.id}".encode())
+            lines.append(b"data: " + self.renderer.render(event.data))
+            yield b"\n".join(lines) + b"\n\n"
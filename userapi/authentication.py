@@ -2,22 +2,111 @@ from rest_framework.exceptions import AuthenticationFailed
 from rest_framework import authentication
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.utils.functional import cached_property
 import jwt
+from .utils import TTLCache
+
+user_cache = TTLCache(
+    maxsize=getattr(settings, "USER_CACHE_SIZE", 10000),
+    ttl=getattr(settings, "USER_CACHE_TTL", 300),
+)
+
+
+def get_cached_user(user_id):
+    user = user_cache.get(user_id)
+    if user is None:
+        user = User.objects.get(id=user_id)
+        user_cache.set(user_id, user)
+    return user
+
+
+class TokenUser:
+    """
+    Request principal built from the signed token claims. Attributes that are
+    not claims are read from the full ``User`` row, fetched on first access.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, payload):
+        self.id = self.pk = payload["id"]
+        self.username = payload["username"]
+        self.is_active = payload["is_active"]
+
+    @cached_property
+    def user(self):
+        return get_cached_user(self.id)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.user, name)
+
+    def __eq__(self, other):
+        if isinstance(other, (TokenUser, User)):
+            return self.pk == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return self.username
+
 
 class UserAuthentication(authentication.BaseAuthentication):
     def authenticate(self, request):
+        decoded = self.decode(request)
+        if decoded is None:
+            return None
+
+        payload, token = decoded
+        user = self.get_token_user(payload)
+        if user is not None:
+            return (user, token)
+        try:
+            user = User.objects.get(id=payload["id"])
+            return (user, token)
+        except User.DoesNotExist:
+            raise AuthenticationFailed("No such user")
+
+    async def aauthenticate(self, request):
+        decoded = self.decode(request)
+        if decoded is None:
+            return None
+
+        payload, token = decoded
+        user = self.get_token_user(payload)
+        if user is not None:
+            return (user, token)
+        try:
+            user = await User.objects.aget(id=payload["id"])
+            return (user, token)
+        except User.DoesNotExist:
+            raise AuthenticationFailed("No such user")
+
+    def decode(self, request):
         auth_header = request.headers.get("Authorization")
         if not auth_header:
             return None
-        
+
         try:
             token = auth_header.split(" ")[1]
             payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-            user = User.objects.get(id=payload['id'])
-            return (user, token)
         except jwt.ExpiredSignatureError:
             raise AuthenticationFailed("Token has expired")
         except jwt.InvalidTokenError:
             raise AuthenticationFailed("Invalid token")
-        except User.DoesNotExist:
-            raise AuthenticationFailed('No such user')
+        # Tokens issued before refresh tokens existed carry no type.
+        if payload.get("type", "access") != "access":
+            raise AuthenticationFailed("Invalid token")
+        return (payload, token)
+
+    def get_token_user(self, payload):
+        stateless = getattr(settings, "JWT_STATELESS_AUTH", False)
+        if not stateless or not {"username", "is_active"} <= payload.keys():
+            return None
+        if not payload["is_active"]:
+            raise AuthenticationFailed("User is inactive")
+        return TokenUser(payload)
@@ -0,0 +1,113 @@
+import hashlib
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+from .routers import pin_to_primary, reads_from_replica
+from .versioning import etag_matches
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def incr(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def reset(self):
+        with self._lock:
+            self._counts = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def as_dict(self):
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts["hits"] + counts["misses"]
+        counts["hit_ratio"] = counts["hits"] / lookups if lookups else 0.0
+        return counts
+
+
+stats = CacheStats()
+
+
+def get_cache():
+    return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+
+def _generation(scope):
+    """
+    Random token naming the current generation of ``scope``. Replacing it
+    orphans every entry cached under the previous one.
+    """
+    cache = get_cache()
+    key = f"userapi:gen:{scope}"
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        generation = cache.get(key)
+    return generation
+
+
+def invalidate(scope):
+    get_cache().set(f"userapi:gen:{scope}", uuid.uuid4().hex, None)
+    stats.incr("invalidations")
+
+
+def invalidate_project(project_id):
+    if project_id:
+        invalidate(f"project:{project_id}")
+
+
+def invalidate_owner(user_id):
+    invalidate(f"owner:{user_id}")
+
+
+def response_cache_key(kind, scope, request):
+    path = hashlib.md5(
+        request.get_full_path().encode(), usedforsecurity=False
+    ).hexdigest()
+    return f"userapi:resp:{kind}:{scope}:{_generation(scope)}:{request.user.id}:{path}"
+
+
+def cached_response(request, key, get_etag, build):
+    """
+    Serve a list response from the response cache, falling back to
+    ``build`` on a miss.
+
+    ``get_etag`` runs on every request, hits included: an entry is only
+    served while its ETag is still current, so writes made by another process
+    (whose invalidations never reach this process's cache) are picked up on
+    the next request.
+    """
+    enabled = getattr(settings, "RESPONSE_CACHE_ENABLED", True)
+    cached = get_cache().get(key) if enabled else None
+    etag = get_etag()
+    if cached is not None and cached[0] != etag:
+        cached = None
+    if cached is None:
+        if enabled:
+            stats.incr("misses")
+    else:
+        stats.incr("hits")
+        payload = cached[1]
+
+    if etag_matches(request, etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    if cached is None:
+        payload = build()
+        if enabled and reads_from_replica():
+            # A lagging replica may have served rows older than the writes the
+            # last invalidation was for; caching them would outlive the lag.
+            with pin_to_primary():
+                enabled = get_etag() == etag
+        if enabled:
+            get_cache().set(
+                key,
+                (etag, payload),
+                getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300),
+            )
+    return Response(payload, status=status.HTTP_200_OK, headers={"ETag": etag})
@@ -0,0 +1,204 @@
+import asyncio
+import threading
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+from .serializers import TaskSerializer
+
+
+@dataclass(frozen=True)
+class Event:
+    id: str
+    type: str
+    data: dict
+
+
+RESET = Event(id="", type="reset", data={})
+
+
+class _Subscriber:
+    def __init__(self, loop, maxsize):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, event):
+        # Runs on the subscriber's event loop. A client that cannot keep up is
+        # told to resynchronise instead of buffering without bound.
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = RESET
+        self.queue.put_nowait(event)
+
+
+class _History:
+    """
+    Buffered events of one project. ``dropped`` is the sequence number up to
+    which events are no longer available, either because they fell out of the
+    buffer or because they were published before the project was followed.
+    """
+
+    def __init__(self, maxlen, dropped):
+        self.events = deque()
+        self.maxlen = maxlen
+        self.dropped = dropped
+
+    def append(self, event):
+        self.events.append(event)
+        if len(self.events) > self.maxlen:
+            self.dropped = _sequence_of(self.events.popleft())
+
+
+def _sequence_of(event):
+    return int(event.id.rpartition("-")[2])
+
+
+class InMemoryBroker:
+    """
+    In-process pub/sub of task events per project, keeping the last
+    ``history`` events of the ``projects`` most recently followed projects so
+    clients can resume from an event id. Events for projects nobody has
+    subscribed to are neither serialized nor kept.
+
+    Event ids are ``<epoch>-<sequence>``; the epoch changes with every process,
+    so ids from another process or an evicted range produce a ``reset`` event
+    telling the client to refetch.
+    """
+
+    def __init__(self, history=1000, queue_size=1000, projects=1000):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.history = history
+        self.queue_size = queue_size
+        self.projects = projects
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._history = OrderedDict()
+        self._subscribers = {}
+
+    def publish(self, project_id, type, data):
+        """
+        Publish an event to the subscribers of ``project_id``. ``data`` may be
+        a callable returning the payload, which is then only called if the
+        project is followed. Returns the event, or ``None`` if it was dropped.
+        """
+        if project_id not in self._history:
+            return None
+        if callable(data):
+            data = data()
+        with self._lock:
+            history = self._history.get(project_id)
+            if history is None:
+                return None
+            self._history.move_to_end(project_id)
+            self._sequence += 1
+            event = Event(f"{self.epoch}-{self._sequence}", type, data)
+            history.append(event)
+            subscribers = list(self._subscribers.get(project_id, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.deliver, event)
+            except RuntimeError:
+                # The subscriber's loop has already been closed.
+                pass
+        return event
+
+    def _follow(self, project_id):
+        # Called with the lock held. Projects with live subscribers are never
+        # evicted, so the limit can only be exceeded by open connections.
+        if project_id in self._history:
+            self._history.move_to_end(project_id)
+            return
+        self._history[project_id] = _History(self.history, self._sequence)
+        for followed in list(self._history):
+            if len(self._history) <= self.projects:
+                break
+            if followed not in self._subscribers:
+                del self._history[followed]
+
+    def _backlog(self, project_id, last_event_id):
+        if not last_event_id:
+            return []
+        epoch, _, sequence = last_event_id.partition("-")
+        if epoch != self.epoch or not sequence.isdigit():
+            return [RESET]
+        sequence = int(sequence)
+        history = self._history.get(project_id)
+        if history is None or sequence < history.dropped:
+            return [RESET]
+        return [e for e in history.events if _sequence_of(e) > sequence]
+
+    async def subscribe(self, project_id, last_event_id=None, heartbeat=None):
+        """
+        Yield events for ``project_id`` as they are published, starting with
+        any buffered events after ``last_event_id``. Yields ``None`` after
+        ``heartbeat`` idle seconds.
+        """
+        subscriber = _Subscriber(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            backlog = self._backlog(project_id, last_event_id)
+            self._follow(project_id)
+            self._subscribers.setdefault(project_id, set()).add(subscriber)
+        try:
+            for event in backlog:
+                yield event
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscriber.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                subscribers = self._subscribers[project_id]
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[project_id]
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        broker_class = import_string(
+            getattr(settings, "TASK_EVENT_BROKER", "userapi.events.InMemoryBroker")
+        )
+        _broker = broker_class(**getattr(settings, "TASK_EVENT_BROKER_OPTIONS", {}))
+    return _broker
+
+
+def publish_task_event(project_id, type, data):
+    if project_id:
+        get_broker().publish(project_id, type, data)
+
+
+def _serialize_task(task):
+    return dict(TaskSerializer(task).data)
+
+
+def publish_task_events_on_commit(tasks, type=None):
+    """
+    Publish one event per task once the current transaction commits. Without
+    an explicit ``type`` soft-deleted tasks are reported as ``task.deleted``
+    and the rest as ``task.updated``. Tasks are serialized by the broker, and
+    only for projects someone is following.
+    """
+    events = [
+        (
+            task.project_id,
+            type or ("task.deleted" if task.deleted else "task.updated"),
+            partial(_serialize_task, task),
+        )
+        for task in tasks
+    ]
+
+    def publish():
+        for event in events:
+            publish_task_event(*event)
+
+    transaction.on_commit(publish)
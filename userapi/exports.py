@@ -0,0 +1,123 @@
+import csv
+import io
+import json
+import zlib
+
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", ".csv"),
+    "ndjson": ("application/x-ndjson", ".ndjson"),
+}
+
+# Encoded output is yielded in pieces of about this size rather than per row,
+# which keeps the number of writes (and gzip calls) per response low.
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def get_export_format(params):
+    output = params.get("output", "csv")
+    if output not in EXPORT_FORMATS:
+        raise ValidationError(
+            {"output": f"Choose one of: {', '.join(EXPORT_FORMATS)}."}
+        )
+    return output
+
+
+def export_rows(queryset, serializer, extra=None):
+    """
+    Yield the column names, then one list of values per row of ``queryset``
+    in the representation of ``serializer`` (a ``ValuesSerializer``).
+    ``extra`` maps further column names to ``values_list`` lookups, which are
+    written as they are.
+
+    Rows are read with a chunked iterator over ``values_list`` tuples, so
+    memory does not grow with the size of the export.
+    """
+    extra = extra or {}
+    yield [name for name, _, _ in serializer.fields] + list(extra)
+    converters = [convert for _, _, convert in serializer.fields]
+    converters += [None] * len(extra)
+    rows = queryset.values_list(*serializer.columns, *extra.values()).iterator(
+        chunk_size=settings.TASK_EXPORT_CHUNK_SIZE
+    )
+    for row in rows:
+        yield [
+            value if convert is None or value is None else convert(value)
+            for value, convert in zip(row, converters)
+        ]
+
+
+def encode_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def encode_ndjson(rows):
+    """
+    One JSON object per line, keyed by the column names of the first row.
+    """
+    rows = iter(rows)
+    names = next(rows)
+    encoder = json.JSONEncoder(separators=(",", ":"))
+    lines = []
+    size = 0
+    for row in rows:
+        line = encoder.encode(dict(zip(names, row)))
+        lines.append(line)
+        size += len(line) + 1
+        if size >= EXPORT_CHUNK_BYTES:
+            yield ("\n".join(lines) + "\n").encode()
+            lines.clear()
+            size = 0
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
+
+ENCODERS = {"csv": encode_csv, "ndjson": encode_ndjson}
+
+
+def accepts_gzip(accept_encoding):
+    """
+    Whether an ``Accept-Encoding`` header value allows gzip: listed, or
+    covered by ``*``, with a non-zero ``q`` weight.
+    """
+    weights = {}
+    for coding in accept_encoding.split(","):
+        name, *params = coding.split(";")
+        weight = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+    return weights.get("gzip", weights.get("*", 0.0)) > 0
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(settings.TASK_EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_export(rows, output, gzip=False):
+    """
+    Encode ``export_rows`` output as ``output`` (a key of ``EXPORT_FORMATS``),
+    yielding bytes.
+    """
+    chunks = ENCODERS[output](rows)
+    return gzip_chunks(chunks) if gzip else chunks
@@ -0,0 +1,62 @@
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+from .models import Task
+
+TASK_ORDERINGS = {
+    "due_date": ("due_date", "id"),
+    "-due_date": ("-due_date", "-id"),
+    "id": ("id",),
+    "-id": ("-id",),
+    "status": ("status", "due_date", "id"),
+    "-status": ("-status", "-due_date", "-id"),
+}
+
+
+def _parse_date(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: "Enter a valid date in YYYY-MM-DD format."})
+    return parsed
+
+
+def filter_tasks(queryset, params):
+    """
+    Narrow a task queryset by the ``status``, ``due_date_after``,
+    ``due_date_before`` and ``created_by`` query parameters.
+    """
+    statuses = [value for value in params.get("status", "").split(",") if value]
+    if statuses:
+        choices = {choice for choice, _ in Task.STATUS_CHOICES}
+        unknown = [value for value in statuses if value not in choices]
+        if unknown:
+            raise ValidationError({"status": f"Unknown status: {', '.join(unknown)}."})
+        queryset = queryset.filter(status__in=statuses)
+
+    due_after = _parse_date(params, "due_date_after")
+    if due_after:
+        queryset = queryset.filter(due_date__gte=due_after)
+    due_before = _parse_date(params, "due_date_before")
+    if due_before:
+        queryset = queryset.filter(due_date__lte=due_before)
+
+    created_by = params.get("created_by")
+    if created_by:
+        if not created_by.isdigit():
+            raise ValidationError({"created_by": "Must be a user id."})
+        queryset = queryset.filter(created_by=int(created_by))
+    return queryset
+
+
+def get_task_ordering(params):
+    ordering = params.get("ordering", "due_date")
+    if ordering not in TASK_ORDERINGS:
+        raise ValidationError(
+            {"ordering": f"Choose one of: {', '.join(TASK_ORDERINGS)}."}
+        )
+    return TASK_ORDERINGS[ordering]
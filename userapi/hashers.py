@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+
+# Cost parameters are read from settings on every use, so changing them makes
+# ``must_update`` true for older hashes and Django re-hashes on the next login.
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return getattr(settings, "PBKDF2_ITERATIONS", PBKDF2PasswordHasher.iterations)
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return getattr(settings, "SCRYPT_WORK_FACTOR", ScryptPasswordHasher.work_factor)
+
+    @property
+    def block_size(self):
+        return getattr(settings, "SCRYPT_BLOCK_SIZE", ScryptPasswordHasher.block_size)
+
+    @property
+    def parallelism(self):
+        return getattr(settings, "SCRYPT_PARALLELISM", ScryptPasswordHasher.parallelism)
+
+    @property
+    def maxmem(self):
+        # Scrypt needs about 128 * n * r bytes, and hashlib refuses more than
+        # 32 MiB unless maxmem is raised; leave headroom for larger factors.
+        return 256 * self.work_factor * self.block_size
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return getattr(settings, "ARGON2_TIME_COST", Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return getattr(settings, "ARGON2_MEMORY_COST", Argon2PasswordHasher.memory_cost)
+
+    @property
+    def parallelism(self):
+        return getattr(settings, "ARGON2_PARALLELISM", Argon2PasswordHasher.parallelism)
@@ -0,0 +1,149 @@
+import codecs
+import csv
+import json
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+from .cache import invalidate_project
+from .models import Task
+from .search import index_tasks
+from .serializers import TaskBulkSerializer
+from .versioning import bump_project_version
+
+
+class _DecodedLines:
+    """
+    Iterator over the lines of a binary file as UTF-8 text. A line that does
+    not decode raises ``UnicodeDecodeError`` without ending the iteration,
+    which neither a generator nor a ``TextIOWrapper`` can do.
+    """
+
+    def __init__(self, file):
+        self.lines = iter(file)
+        self.first = True
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = next(self.lines)
+        if self.first:
+            line = line.removeprefix(codecs.BOM_UTF8)
+            self.first = False
+        return line.decode()
+
+
+def parse_csv(file):
+    """
+    Yield one dict per row of a binary CSV ``file`` with a header row. Empty
+    and missing cells are left out, so that defaults such as the task status
+    apply. Rows that are not valid UTF-8 or not valid CSV are yielded as a
+    ``ValidationError``.
+    """
+    reader = csv.reader(_DecodedLines(file))
+    header = None
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except (UnicodeDecodeError, csv.Error) as e:
+            yield ValidationError({"non_field_errors": [f"Invalid CSV row: {e}"]})
+            if header is None:
+                # Without a header no other row can be read.
+                return
+            continue
+        if not row:
+            continue
+        if header is None:
+            header = row
+        else:
+            yield {name: value for name, value in zip(header, row) if name and value}
+
+
+def parse_ndjson(file):
+    """
+    Yield one object per non-blank line of a binary NDJSON ``file``; lines
+    that are not valid JSON are yielded as a ``ValidationError``.
+    """
+    for line in file:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValidationError({"non_field_errors": [f"Invalid JSON: {e}"]})
+
+
+PARSERS = {"csv": parse_csv, "ndjson": parse_ndjson}
+IMPORT_SUFFIXES = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+
+def get_import_format(params, filename=""):
+    """
+    The ``input`` parameter, or the format implied by the file name.
+    """
+    value = params.get("input") or IMPORT_SUFFIXES.get(Path(filename).suffix.lower())
+    if value not in PARSERS:
+        raise ValidationError({"input": f"Choose one of: {', '.join(PARSERS)}."})
+    return value
+
+
+def import_tasks(
+    rows, project_id, user_id, batch_size=None, on_batch=None, max_errors=None
+):
+    """
+    Validate ``rows`` (dicts of task fields) and insert the valid ones into
+    the project, one transaction per ``batch_size`` rows. ``rows`` may be any
+    iterable and is consumed once, so memory is bounded by the batch size.
+
+    Returns ``{"created", "failed", "errors", "seconds", "rows_per_second"}``;
+    ``errors`` lists the first ``max_errors`` (``TASK_IMPORT_MAX_ERRORS``)
+    rejected rows by 1-based row number. ``on_batch(rows_read, created)`` is
+    called after every batch.
+    """
+    batch_size = batch_size or settings.TASK_IMPORT_BATCH_SIZE
+    if max_errors is None:
+        max_errors = settings.TASK_IMPORT_MAX_ERRORS
+    validator = TaskBulkSerializer()
+    result = {"created": 0, "failed": 0, "errors": []}
+    started = time.perf_counter()
+    batch = []
+
+    def flush(rows_read):
+        if batch:
+            with transaction.atomic():
+                index_tasks(Task.objects.bulk_create(batch))
+            result["created"] += len(batch)
+            batch.clear()
+        if on_batch:
+            on_batch(rows_read, result["created"])
+
+    number = 0
+    for number, row in enumerate(rows, 1):
+        try:
+            if isinstance(row, ValidationError):
+                raise row
+            if not isinstance(row, dict):
+                raise ValidationError({"non_field_errors": ["Expected an object."]})
+            data = validator.run_validation(row)
+        except ValidationError as e:
+            result["failed"] += 1
+            if len(result["errors"]) < max_errors:
+                result["errors"].append({"row": number, "errors": e.detail})
+        else:
+            batch.append(Task(project_id=project_id, created_by_id=user_id, **data))
+        if number % batch_size == 0:
+            flush(number)
+    flush(number)
+
+    if result["created"]:
+        bump_project_version(project_id)
+        invalidate_project(project_id)
+    elapsed = time.perf_counter() - started
+    result["seconds"] = round(elapsed, 3)
+    result["rows_per_second"] = round(number / elapsed, 1) if elapsed else None
+    return result
@@ -0,0 +1,338 @@
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from .cache import invalidate_project
+from .exports import export_rows, stream_export
+from .imports import PARSERS, import_tasks
+from .models import Job, ProjectMember, Task
+from .permissions import invalidate_project_access
+from .routers import pin_to_primary
+from .search import unindex_tasks
+from .serializers import JobSerializer, TaskValuesSerializer
+from .versioning import bump_project_version
+
+logger = logging.getLogger("userapi.jobs")
+
+HANDLERS = {}
+
+# Seconds between two sweeps of JOB_FILES_ROOT by the same worker.
+JOB_FILES_CLEANUP_INTERVAL = 60
+
+
+def job_handler(type, max_attempts=3):
+    """
+    Register the decorated ``handler(job)`` for jobs of ``type``. Handlers
+    that may be retried after a partial run must be idempotent; pass
+    ``max_attempts=1`` otherwise.
+    """
+
+    def register(handler):
+        HANDLERS[type] = (handler, max_attempts)
+        return handler
+
+    return register
+
+
+def enqueue(type, user_id, project_id=None, **payload):
+    _, max_attempts = HANDLERS[type]
+    return Job.objects.create(
+        type=type,
+        payload=payload,
+        created_by_id=user_id,
+        project_id=project_id,
+        max_attempts=max_attempts,
+    )
+
+
+async def aenqueue(type, user_id, project_id=None, **payload):
+    _, max_attempts = HANDLERS[type]
+    return await Job.objects.acreate(
+        type=type,
+        payload=payload,
+        created_by_id=user_id,
+        project_id=project_id,
+        max_attempts=max_attempts,
+    )
+
+
+def job_accepted(job):
+    """
+    Body and headers of the ``202 Accepted`` response for a queued job.
+    """
+    return {"data": JobSerializer(job).data}, {"Location": f"/api/jobs/{job.id}/"}
+
+
+class LeaseLost(Exception):
+    """
+    The job was given to another worker after its lease expired; the handler
+    that held it must stop without touching the job any further.
+    """
+
+
+def leased(job):
+    """
+    The job's row, as long as this run of it still holds the lease.
+    """
+    return Job.objects.filter(
+        id=job.id, worker=job.worker, attempts=job.attempts, status=Job.RUNNING
+    )
+
+
+def report_progress(job, progress, total=None):
+    """
+    Store progress and extend the job's lease. Long handlers should call this
+    at least every ``JOB_LEASE_SECONDS``. Raises ``LeaseLost`` if the lease
+    has already expired and the job was requeued.
+    """
+    fields = {"progress": progress, "heartbeat_at": timezone.now()}
+    if total is not None:
+        fields["total"] = job.total = total
+    job.progress = progress
+    if not leased(job).update(**fields):
+        raise LeaseLost(job.id)
+
+
+def job_file_path(job, suffix):
+    root = Path(settings.JOB_FILES_ROOT)
+    root.mkdir(parents=True, exist_ok=True)
+    return root / f"{job.id}{suffix}"
+
+
+def save_job_upload(upload, suffix):
+    """
+    Copy an uploaded file into ``JOB_FILES_ROOT`` for a job to read, chunk by
+    chunk, and return its file name.
+    """
+    name = f"upload-{uuid.uuid4().hex}{suffix}"
+    root = Path(settings.JOB_FILES_ROOT)
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / name, "wb") as f:
+        for chunk in upload.chunks():
+            f.write(chunk)
+    return name
+
+
+def delete_expired_job_files():
+    """
+    Remove files in ``JOB_FILES_ROOT`` last written more than
+    ``JOB_FILES_RETENTION`` seconds ago: finished exports, and uploads whose
+    import never ran to the end. Uploads of imports still waiting in the queue
+    are kept.
+    """
+    root = Path(settings.JOB_FILES_ROOT)
+    if not root.is_dir():
+        return
+    cutoff = time.time() - settings.JOB_FILES_RETENTION
+    expired = [
+        path
+        for path in root.iterdir()
+        if path.is_file() and path.stat().st_mtime < cutoff
+    ]
+    if not expired:
+        return
+    pending = Job.objects.filter(
+        type="tasks.import", status__in=[Job.QUEUED, Job.RUNNING]
+    ).values_list("payload", flat=True)
+    pending = {payload.get("file") for payload in pending}
+    for path in expired:
+        if path.name not in pending:
+            path.unlink(missing_ok=True)
+
+
+def requeue_stale_jobs():
+    """
+    Give running jobs whose worker stopped sending heartbeats back to the
+    queue, or fail them once they are out of attempts.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.RUNNING,
+        heartbeat_at__lt=now - timedelta(seconds=settings.JOB_LEASE_SECONDS),
+    )
+    stale.filter(attempts__lt=F("max_attempts")).update(
+        status=Job.QUEUED, worker="", run_after=now
+    )
+    stale.update(
+        status=Job.FAILED, error="The worker stopped responding.", finished_at=now
+    )
+
+
+def claim_job(worker):
+    """
+    Mark the oldest due job as running for ``worker`` and return it. The
+    conditional update lets concurrent workers race on the same candidates
+    without row locks, so this works the same on SQLite and PostgreSQL.
+    """
+    now = timezone.now()
+    candidates = (
+        Job.objects.filter(status=Job.QUEUED, run_after__lte=now)
+        .order_by("run_after", "id")
+        .values_list("id", flat=True)[: settings.JOB_CLAIM_CANDIDATES]
+    )
+    for job_id in candidates:
+        claimed = Job.objects.filter(id=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            worker=worker,
+            attempts=F("attempts") + 1,
+            started_at=now,
+            heartbeat_at=now,
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+    return None
+
+
+def run_job(job):
+    handler, _ = HANDLERS.get(job.type, (None, None))
+    try:
+        if handler is None:
+            raise ValueError(f"Unknown job type {job.type!r}.")
+        # Outside a request nothing pins reads to the primary, and a handler
+        # must see the rows it has just written.
+        with pin_to_primary():
+            result = handler(job)
+    except LeaseLost:
+        logger.warning("Job %s (%s) lost its lease", job.id, job.type)
+    except Exception as e:
+        logger.exception("Job %s (%s) failed", job.id, job.type)
+        now = timezone.now()
+        if job.attempts < job.max_attempts:
+            delay = settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+            fields = {
+                "status": Job.QUEUED,
+                "worker": "",
+                "run_after": now + timedelta(seconds=delay),
+            }
+        else:
+            fields = {"status": Job.FAILED, "finished_at": now}
+        leased(job).update(error=str(e), **fields)
+    else:
+        # A job requeued while its handler ran belongs to its new run now.
+        leased(job).update(
+            status=Job.SUCCEEDED, result=result, error="", finished_at=timezone.now()
+        )
+
+
+def work(worker=None, burst=False, poll_interval=1.0, max_jobs=None, stop=None):
+    """
+    Run jobs until ``stop()`` is true, ``max_jobs`` have run or, with
+    ``burst``, the queue is empty. Returns the number of jobs run.
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    processed = 0
+    next_cleanup = 0
+    while not (stop and stop()):
+        close_old_connections()
+        requeue_stale_jobs()
+        if time.monotonic() >= next_cleanup:
+            delete_expired_job_files()
+            next_cleanup = time.monotonic() + JOB_FILES_CLEANUP_INTERVAL
+        job = claim_job(worker)
+        if job is None:
+            if burst:
+                break
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+        processed += 1
+        if max_jobs and processed >= max_jobs:
+            break
+    return processed
+
+
+@job_handler("project.delete")
+def cascade_project_delete(job):
+    """
+    Soft-delete the tasks and members of a project that has been soft-deleted
+    already, in batches so no transaction holds the tables for long.
+    """
+    project_id = job.project_id
+    batch_size = settings.JOB_BATCH_SIZE
+    tasks = Task.objects.filter(project=project_id, deleted=False)
+    members = ProjectMember.objects.filter(project=project_id, deleted=False)
+    report_progress(job, 0, tasks.count() + members.count())
+
+    deleted_tasks = 0
+    while ids := list(tasks.values_list("id", flat=True)[:batch_size]):
+        with transaction.atomic():
+            Task.objects.filter(id__in=ids).update(
+                deleted=True, updated_at=timezone.now()
+            )
+            unindex_tasks(ids)
+        deleted_tasks += len(ids)
+        report_progress(job, deleted_tasks)
+    deleted_members = members.update(deleted=True, updated_at=timezone.now())
+    report_progress(job, deleted_tasks + deleted_members)
+
+    bump_project_version(project_id)
+    invalidate_project_access(project_id)
+    invalidate_project(project_id)
+    return {"tasks": deleted_tasks, "members": deleted_members}
+
+
+@job_handler("tasks.import", max_attempts=1)
+def import_project_tasks(job):
+    """
+    Import the ``tasks`` list of the payload, or the uploaded ``file`` in
+    the ``input`` format, which is streamed and removed afterwards.
+    """
+
+    def import_rows(rows):
+        return import_tasks(
+            rows,
+            job.project_id,
+            job.created_by_id,
+            on_batch=lambda rows_read, created: report_progress(job, rows_read),
+        )
+
+    if "file" not in job.payload:
+        report_progress(job, 0, len(job.payload["tasks"]))
+        return import_rows(job.payload["tasks"])
+
+    path = Path(settings.JOB_FILES_ROOT) / job.payload["file"]
+    try:
+        with open(path, "rb") as f:
+            return import_rows(PARSERS[job.payload["input"]](f))
+    finally:
+        path.unlink(missing_ok=True)
+
+
+@job_handler("project.export")
+def export_project_tasks(job):
+    """
+    Write the project's live tasks as NDJSON to ``JOB_FILES_ROOT``, for
+    download from ``jobs/<id>/download/``.
+    """
+    tasks = Task.objects.filter(project=job.project_id, deleted=False).order_by("id")
+    report_progress(job, 0, tasks.count())
+    rows = export_rows(tasks, TaskValuesSerializer())
+    written = 0
+
+    def counted():
+        nonlocal written
+        yield next(rows)
+        for row in rows:
+            yield row
+            written += 1
+            if written % settings.JOB_BATCH_SIZE == 0:
+                report_progress(job, written)
+
+    path = job_file_path(job, ".ndjson")
+    with open(path, "wb") as f:
+        for chunk in stream_export(counted(), "ndjson"):
+            f.write(chunk)
+    report_progress(job, written)
+    return {
+        "rows": written,
+        "file": path.name,
+        "content_type": "application/x-ndjson",
+    }
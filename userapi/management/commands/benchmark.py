@@ -0,0 +1,434 @@
+import json
+import math
+import time
+from itertools import count
+from pathlib import Path
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.test import AsyncClient
+from django.test.utils import override_settings
+from django.urls import URLPattern, URLResolver, resolve
+from django.utils import timezone
+from rest_framework.test import APIClient
+from userapi import urls
+from userapi.jobs import enqueue, run_job
+from userapi.models import Job, Project, ProjectMember, Task
+from userapi.tokens import issue_tokens
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def api_routes(patterns=urls.urlpatterns, prefix="api/"):
+    """
+    Route strings of every userapi URL pattern, as reported by
+    ``ResolverMatch.route``, skipping DRF's format-suffix duplicates.
+    """
+    routes = []
+    for pattern in patterns:
+        # ResolverMatch.route drops the leading "^" of regex patterns.
+        route = prefix + str(pattern.pattern).removeprefix("^")
+        if isinstance(pattern, URLResolver):
+            routes += api_routes(pattern.url_patterns, route)
+        elif isinstance(pattern, URLPattern) and "format" not in route:
+            routes.append(route)
+    return routes
+
+
+class ASGIClient:
+    """
+    Sends GETs through Django's ASGI handler with the credentials of an
+    ``APIClient``, for views that are only served over ASGI.
+    """
+
+    def __init__(self, client):
+        self.client = AsyncClient()
+        self.headers = {"Authorization": client._credentials["HTTP_AUTHORIZATION"]}
+
+    def get(self, path, data=None, format=None):
+        return async_to_sync(self.client.get)(path, data, headers=self.headers)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time in-process requests against every userapi route and report "
+        "latency percentiles, queries per request and throughput as JSON, or "
+        "compare two such reports."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument(
+            "--auth-requests",
+            type=int,
+            default=5,
+            help="Requests for register/login, which are dominated by hashing.",
+        )
+        parser.add_argument("--prefix", default="bench")
+        parser.add_argument("--password", default="bench-password")
+        parser.add_argument(
+            "--cache",
+            action="store_true",
+            help="Keep the response cache on; by default every GET hits the DB.",
+        )
+        parser.add_argument("--routes", help="Comma separated scenario names.")
+        parser.add_argument("--output", help="Write the report to this file.")
+        parser.add_argument(
+            "--compare",
+            nargs=2,
+            metavar=("BASELINE", "CURRENT"),
+            help="Compare two reports instead of running.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=10.0,
+            help="Percent p95 slowdown reported as a regression.",
+        )
+        parser.add_argument("--fail-on-regression", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["compare"]:
+            return self.compare(*options["compare"], **options)
+        with override_settings(RESPONSE_CACHE_ENABLED=options["cache"]):
+            report = self.run(**options)
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        self.stdout.write(output)
+
+    def run(self, **options):
+        prefix = options["prefix"]
+        owner = User.objects.filter(username=f"{prefix}-user-0").first()
+        admin = User.objects.filter(username=f"{prefix}-admin").first()
+        project = Project.objects.filter(owner=owner, deleted=False).first()
+        if owner is None or admin is None or project is None:
+            raise CommandError(f"No seeded data for {prefix!r}; run `seed` first.")
+        task = Task.objects.filter(project=project, deleted=False).first()
+        member = ProjectMember.objects.filter(project=project, deleted=False).first()
+        outsider = (
+            User.objects.filter(username__startswith=f"{prefix}-")
+            .exclude(
+                id__in=ProjectMember.objects.filter(project=project).values("user")
+            )
+            .exclude(id=owner.id)
+            .first()
+        )
+        if task is None or member is None or outsider is None:
+            raise CommandError("Seed at least one task and one member per project.")
+
+        # A finished export for the job status and download routes; removed
+        # again once the run is over.
+        export = enqueue("project.export", owner.id, project.id)
+        now = timezone.now()
+        Job.objects.filter(id=export.id).update(
+            status=Job.RUNNING,
+            worker="benchmark",
+            attempts=1,
+            started_at=now,
+            heartbeat_at=now,
+        )
+        export.refresh_from_db()
+        run_job(export)
+        export.refresh_from_db()
+        try:
+            return self.run_scenarios(
+                owner, admin, project, task, member, outsider, export, **options
+            )
+        finally:
+            if export.result:
+                Path(settings.JOB_FILES_ROOT, export.result["file"]).unlink(
+                    missing_ok=True
+                )
+            export.delete()
+
+    def run_scenarios(
+        self, owner, admin, project, task, member, outsider, export, **options
+    ):
+        prefix = options["prefix"]
+        client = self.login(owner.username, options["password"])
+        admin_client = self.login(admin.username, options["password"])
+        anonymous = APIClient()
+        unique = count()
+        base = f"/api/projects/{project.id}"
+
+        def new_task():
+            return {"title": "Bench", "description": "Bench", "due_date": "2024-01-01"}
+
+        scenarios = [
+            ("api-root", anonymous, "get", "/api/", None),
+            (
+                "register",
+                anonymous,
+                "post",
+                "/api/auth/register/",
+                lambda: {
+                    "username": f"{prefix}-new-{time.time_ns()}-{next(unique)}",
+                    "password": "x",
+                },
+            ),
+            (
+                "login",
+                anonymous,
+                "post",
+                "/api/auth/login/",
+                lambda: {"username": owner.username, "password": options["password"]},
+            ),
+            (
+                "refresh",
+                anonymous,
+                "post",
+                "/api/auth/refresh/",
+                lambda: {"refresh": issue_tokens(owner)["refresh"]},
+            ),
+            (
+                "logout",
+                anonymous,
+                "post",
+                "/api/auth/logout/",
+                lambda: {"refresh": issue_tokens(owner)["refresh"]},
+            ),
+            ("cache-stats", admin_client, "get", "/api/cache/stats/", None),
+            ("metrics", admin_client, "get", "/api/metrics/", None),
+            ("my-tasks", client, "get", "/api/tasks/mine/", None),
+            ("tasks-search", client, "get", "/api/tasks/search/?q=security", None),
+            (
+                "tasks-search-narrow",
+                client,
+                "get",
+                "/api/tasks/search/?q=security+outage+review",
+                None,
+            ),
+            ("projects-list", client, "get", "/api/projects/", None),
+            (
+                "projects-create",
+                client,
+                "post",
+                "/api/projects/",
+                lambda: {"name": f"{prefix}-new-{next(unique)}", "description": "B"},
+            ),
+            (
+                "project-update",
+                client,
+                "put",
+                f"{base}/",
+                lambda: {"description": "Updated"},
+            ),
+            ("project-delete", client, "delete", f"{base}/", None),
+            ("tasks-list", client, "get", f"{base}/tasks/", None),
+            ("tasks-create", client, "post", f"{base}/tasks/", new_task),
+            (
+                "task-update",
+                client,
+                "put",
+                f"{base}/tasks/{task.id}/",
+                lambda: {"status": "Done"},
+            ),
+            ("task-delete", client, "delete", f"{base}/tasks/{task.id}/", None),
+            (
+                "tasks-bulk",
+                client,
+                "post",
+                f"{base}/tasks/bulk/",
+                lambda: {
+                    "create": [new_task() for _ in range(10)],
+                    "update": [{"id": task.id, "status": "Done"}],
+                },
+            ),
+            (
+                "tasks-import",
+                client,
+                "post",
+                f"{base}/tasks/import/",
+                lambda: {"tasks": [new_task() for _ in range(10)]},
+            ),
+            ("project-export", client, "post", f"{base}/export/", None),
+            ("jobs-list", client, "get", "/api/jobs/", None),
+            ("job-detail", client, "get", f"/api/jobs/{export.id}/", None),
+            ("job-download", client, "get", f"/api/jobs/{export.id}/download/", None),
+            ("tasks-export", client, "get", f"{base}/tasks/export/", None),
+            (
+                "tasks-export-ndjson",
+                client,
+                "get",
+                f"{base}/tasks/export/?output=ndjson",
+                None,
+            ),
+            ("my-tasks-export", client, "get", "/api/tasks/mine/export/", None),
+            ("tasks-summary", client, "get", f"{base}/tasks/summary/", None),
+            ("tasks-changes", client, "get", f"{base}/tasks/changes/", None),
+            ("tasks-events", ASGIClient(client), "get", f"{base}/tasks/events/", None),
+            ("members-list", client, "get", f"{base}/members/", None),
+            (
+                "members-add",
+                client,
+                "post",
+                f"{base}/members/",
+                lambda: {"user": outsider.id, "can_create": True},
+            ),
+            (
+                "members-bulk",
+                client,
+                "post",
+                f"{base}/members/bulk/",
+                lambda: {
+                    "members": [
+                        {"user": member.user_id, "can_delete": True},
+                        {"user": outsider.id, "can_create": True},
+                    ]
+                },
+            ),
+            (
+                "member-update",
+                client,
+                "put",
+                f"{base}/members/{member.user_id}/",
+                lambda: {"can_update": False},
+            ),
+            (
+                "member-delete",
+                client,
+                "delete",
+                f"{base}/members/{member.user_id}/",
+                None,
+            ),
+        ]
+        selected = options["routes"] and set(options["routes"].split(","))
+
+        results = {}
+        for name, route_client, method, path, payload in scenarios:
+            if selected and name not in selected:
+                continue
+            requests = options["requests"]
+            if name in ("register", "login"):
+                requests = min(requests, options["auth_requests"])
+            results[name] = self.measure(
+                route_client, method, path, payload, requests, options["warmup"]
+            )
+            results[name]["route"] = resolve(path.partition("?")[0]).route
+
+        covered = {result["route"] for result in results.values()}
+        return {
+            "meta": {
+                "tasks": Task.objects.count(),
+                "projects": Project.objects.count(),
+                "members": ProjectMember.objects.count(),
+                "users": User.objects.count(),
+                "requests": options["requests"],
+                "response_cache": options["cache"],
+                "database": connections["default"].vendor,
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            },
+            "routes": results,
+            "uncovered": sorted(set(api_routes()) - covered) if not selected else [],
+        }
+
+    def login(self, username, password):
+        client = APIClient()
+        response = client.post(
+            "/api/auth/login/",
+            {"username": username, "password": password},
+            format="json",
+        )
+        if "token" not in response.data:
+            raise CommandError(f"Could not log in as {username}: {response.data}")
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['token']}")
+        return client
+
+    def measure(self, client, method, path, payload, requests, warmup):
+        """
+        Issue ``warmup + requests`` calls and time the last ``requests``.
+        Each call runs in a transaction that is rolled back, so every
+        iteration sees the same data and repeated runs stay comparable.
+        """
+        latencies, queries, statuses = [], [], {}
+        call = getattr(client, method)
+
+        def counter(execute, sql, params, many, context):
+            queries[-1] += 1
+            return execute(sql, params, many, context)
+
+        for iteration in range(warmup + requests):
+            data = payload() if payload else None
+            queries.append(0)
+            with transaction.atomic():
+                with connections["default"].execute_wrapper(counter):
+                    started = time.perf_counter()
+                    response = call(path, data, format="json")
+                    # Downloads are read to the end; event streams never end.
+                    if response.streaming and not response["Content-Type"].startswith(
+                        "text/event-stream"
+                    ):
+                        for _ in response.streaming_content:
+                            pass
+                        response.close()
+                    elapsed = time.perf_counter() - started
+                transaction.set_rollback(True)
+            if iteration < warmup:
+                queries.pop()
+                continue
+            latencies.append(elapsed)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        total = sum(latencies)
+        return {
+            "method": method.upper(),
+            "requests": requests,
+            "statuses": {str(code): hits for code, hits in sorted(statuses.items())},
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            "mean_ms": round(total / requests * 1000, 3),
+            "queries_per_request": round(sum(queries) / requests, 2),
+            "throughput_rps": round(requests / total, 1) if total else None,
+        }
+
+    def compare(self, baseline, current, **options):
+        with open(baseline) as f:
+            before = json.load(f)["routes"]
+        with open(current) as f:
+            after = json.load(f)["routes"]
+
+        threshold = options["threshold"]
+        rows, regressions = [], []
+        for name in sorted(set(before) & set(after)):
+            old, new = before[name], after[name]
+            change = (new["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100
+            extra_queries = new["queries_per_request"] - old["queries_per_request"]
+            regressed = change > threshold or extra_queries > 0
+            if regressed:
+                regressions.append(name)
+            rows.append(
+                {
+                    "route": name,
+                    "p95_ms": [old["p95_ms"], new["p95_ms"]],
+                    "p95_change_pct": round(change, 1),
+                    "queries_per_request": [
+                        old["queries_per_request"],
+                        new["queries_per_request"],
+                    ],
+                    "regressed": regressed,
+                }
+            )
+        self.stdout.write(
+            json.dumps(
+                {
+                    "threshold_pct": threshold,
+                    "routes": rows,
+                    "regressions": regressions,
+                    "only_in_baseline": sorted(set(before) - set(after)),
+                    "only_in_current": sorted(set(after) - set(before)),
+                },
+                indent=2,
+            )
+        )
+        if regressions and options["fail_on_regression"]:
+            raise CommandError(f"Regressions: {', '.join(regressions)}")
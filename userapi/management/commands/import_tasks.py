@@ -0,0 +1,83 @@
+import json
+import sys
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+from userapi.imports import PARSERS, get_import_format, import_tasks
+from userapi.models import Project
+
+
+class Command(BaseCommand):
+    help = (
+        "Import tasks into a project from a CSV or NDJSON file, streaming it in "
+        "batches, and print a report with the rejected rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="Path to the file, or - for stdin.")
+        parser.add_argument("--project", type=int, required=True)
+        parser.add_argument(
+            "--user",
+            help="Username recorded as the tasks' creator; defaults to the owner.",
+        )
+        parser.add_argument(
+            "--input",
+            choices=sorted(PARSERS),
+            help="Defaults to the format implied by the file name.",
+        )
+        parser.add_argument("--batch-size", type=int)
+        parser.add_argument(
+            "--max-errors",
+            type=int,
+            help="Rejected rows to list in the report; defaults to "
+            "TASK_IMPORT_MAX_ERRORS.",
+        )
+
+    def handle(self, *args, **options):
+        project = Project.objects.filter(id=options["project"], deleted=False).first()
+        if project is None:
+            raise CommandError(f"Project {options['project']} does not exist.")
+        user_id = project.owner_id
+        if options["user"]:
+            user = User.objects.filter(username=options["user"]).first()
+            if user is None:
+                raise CommandError(f"User {options['user']!r} does not exist.")
+            user_id = user.id
+        try:
+            input_format = get_import_format(
+                {"input": options["input"]}, options["file"]
+            )
+        except ValidationError:
+            raise CommandError("Pass --input csv or --input ndjson.")
+
+        if options["file"] == "-":
+            file = sys.stdin.buffer
+        else:
+            try:
+                file = open(options["file"], "rb")
+            except OSError as e:
+                raise CommandError(str(e))
+
+        started = time.perf_counter()
+
+        def progress(rows_read, created):
+            rate = rows_read / (time.perf_counter() - started)
+            self.stderr.write(
+                f"{rows_read} rows read, {created} created, {rate:.0f} rows/s"
+            )
+
+        try:
+            result = import_tasks(
+                PARSERS[input_format](file),
+                project.id,
+                user_id,
+                batch_size=options["batch_size"],
+                on_batch=progress,
+                max_errors=options["max_errors"],
+            )
+        finally:
+            if file is not sys.stdin.buffer:
+                file.close()
+        self.stdout.write(json.dumps(result))
@@ -0,0 +1,152 @@
+import json
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from userapi.models import Project, ProjectMember, Task
+from userapi.search import index_tasks
+
+# Task descriptions draw from this vocabulary so search benchmarks see terms
+# of varying selectivity rather than one phrase shared by every row.
+WORDS = (
+    "alpha backlog budget bug checklist client cloud code customer dashboard "
+    "database deadline deploy design docs email estimate feature feedback "
+    "finance hiring invoice kickoff launch legal login marketing meeting "
+    "migration mobile onboarding outage payment performance planning "
+    "pricing prototype refactor release report research review roadmap "
+    "security server sprint staging support survey testing training vendor"
+).split()
+
+
+class Command(BaseCommand):
+    help = "Seed synthetic users, projects, members and tasks for benchmarking."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=1000)
+        parser.add_argument(
+            "--projects",
+            type=int,
+            help="Defaults to one project per 1000 tasks.",
+        )
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--members-per-project", type=int, default=5)
+        parser.add_argument("--prefix", default="bench")
+        parser.add_argument("--password", default="bench-password")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Delete data seeded earlier with the same prefix first.",
+        )
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        task_count = options["tasks"]
+        project_count = options["projects"] or max(1, task_count // 1000)
+        user_count = max(options["users"], 1)
+        members = min(options["members_per_project"], user_count - 1)
+        batch_size = options["batch_size"]
+        rng = random.Random(options["seed"])
+
+        existing = User.objects.filter(username__startswith=f"{prefix}-")
+        if existing.exists():
+            if not options["reset"]:
+                raise CommandError(
+                    f"Users prefixed {prefix!r} already exist; pass --reset or "
+                    "choose another --prefix."
+                )
+            existing.delete()
+
+        password = make_password(options["password"])
+        with transaction.atomic():
+            User.objects.bulk_create(
+                [
+                    User(username=f"{prefix}-user-{index}", password=password)
+                    for index in range(user_count)
+                ]
+                + [
+                    User(
+                        username=f"{prefix}-admin",
+                        password=password,
+                        is_staff=True,
+                    )
+                ],
+                batch_size=batch_size,
+            )
+            user_ids = list(
+                User.objects.filter(username__startswith=f"{prefix}-user-")
+                .order_by("id")
+                .values_list("id", flat=True)
+            )
+            Project.objects.bulk_create(
+                [
+                    Project(
+                        name=f"{prefix}-project-{index}",
+                        description="Synthetic project",
+                        owner_id=user_ids[index % user_count],
+                    )
+                    for index in range(project_count)
+                ],
+                batch_size=batch_size,
+            )
+            projects = list(
+                Project.objects.filter(name__startswith=f"{prefix}-project-")
+                .order_by("id")
+                .values_list("id", "owner_id")
+            )
+
+            team = {}
+            rows = []
+            for project_id, owner_id in projects:
+                candidates = [user_id for user_id in user_ids if user_id != owner_id]
+                team[project_id] = [owner_id] + rng.sample(candidates, members)
+                rows += [
+                    ProjectMember(
+                        project_id=project_id,
+                        user_id=user_id,
+                        can_create=True,
+                        can_update=True,
+                        can_delete=rng.random() < 0.5,
+                        add_members=rng.random() < 0.2,
+                    )
+                    for user_id in team[project_id][1:]
+                ]
+            ProjectMember.objects.bulk_create(rows, batch_size=batch_size)
+
+        statuses = [choice for choice, _ in Task.STATUS_CHOICES]
+        today = timezone.localdate()
+        for start in range(0, task_count, batch_size):
+            with transaction.atomic():
+                tasks = []
+                for index in range(start, min(start + batch_size, task_count)):
+                    project_id, _ = projects[index % project_count]
+                    tasks.append(
+                        Task(
+                            project_id=project_id,
+                            title=f"Task {index}",
+                            description=" ".join(rng.sample(WORDS, 4)),
+                            status=rng.choice(statuses),
+                            due_date=today + timedelta(days=rng.randint(-180, 180)),
+                            created_by_id=rng.choice(team[project_id]),
+                        )
+                    )
+                index_tasks(Task.objects.bulk_create(tasks))
+            if options["verbosity"] > 1:
+                self.stderr.write(f"{min(start + batch_size, task_count)} tasks")
+
+        self.stdout.write(
+            json.dumps(
+                {
+                    "prefix": prefix,
+                    "users": user_count + 1,
+                    "projects": project_count,
+                    "members": len(rows),
+                    "tasks": task_count,
+                }
+            )
+        )
@@ -0,0 +1,82 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+def run_worker(options):
+    # Imported here so that spawned processes set Django up before loading
+    # models.
+    import django
+
+    django.setup()
+    from userapi.jobs import work
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    # Finish the current job before exiting.
+    previous = {
+        signum: signal.signal(signum, stop)
+        for signum in (signal.SIGTERM, signal.SIGINT)
+    }
+    try:
+        return work(
+            burst=options["burst"],
+            poll_interval=options["poll_interval"],
+            max_jobs=options["max_jobs"],
+            stop=lambda: stopping,
+        )
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (cascading deletes, imports, exports) in one "
+        "or more worker processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=1)
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once the queue is empty instead of polling for new jobs.",
+        )
+        parser.add_argument("--poll-interval", type=float, default=1.0)
+        parser.add_argument(
+            "--max-jobs",
+            type=int,
+            help="Exit after running this many jobs per process.",
+        )
+
+    def handle(self, *args, **options):
+        if options["processes"] <= 1:
+            processed = run_worker(options)
+            self.stdout.write(f"Ran {processed} jobs.")
+            return
+
+        # Children must open their own database connections.
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=run_worker, args=(options,), daemon=True)
+            for _ in range(options["processes"])
+        ]
+        for worker in workers:
+            worker.start()
+
+        def forward(signum, frame):
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+
+        signal.signal(signal.SIGTERM, forward)
+        for worker in workers:
+            worker.join()
+        self.stdout.write(f"Stopped {len(workers)} worker processes.")
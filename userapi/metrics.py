@@ -0,0 +1,177 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_current = ContextVar("userapi_request_metrics", default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.queries = []
+        self.timings = defaultdict(float)
+
+    @property
+    def db_time(self):
+        return sum(duration for _, duration in self.queries)
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+
+    def server_timing(self):
+        parts = [
+            f"app;dur={self.duration * 1000:.1f}",
+            f'db;dur={self.db_time * 1000:.1f};desc="{len(self.queries)} queries"',
+        ]
+        parts += [
+            f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.timings.items()
+        ]
+        return ", ".join(parts)
+
+
+@contextmanager
+def collect_metrics():
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        metrics.finish()
+        _current.reset(token)
+
+
+@contextmanager
+def timed(name):
+    """
+    Add the time spent in this block to ``name`` in the current request's
+    Server-Timing. Does nothing outside an instrumented request.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.timings[name] += time.perf_counter() - started
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper counting queries against the current request. It reads a
+    ContextVar, so it also sees async views' ORM calls run in worker threads.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries.append((sql, time.perf_counter() - started))
+
+
+class MetricsRegistry:
+    """
+    Per route and method aggregates of instrumented requests, rendered in the
+    Prometheus text format.
+    """
+
+    counters = {
+        "db_queries_total": "Database queries executed.",
+        "db_duration_seconds_total": "Time spent in database queries.",
+        "response_bytes_total": "Response body bytes, excluding streams.",
+    }
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+
+    def observe(self, route, method, metrics, size):
+        with self._lock:
+            series = self._series.setdefault(
+                (route, method),
+                {
+                    "buckets": [0] * len(self.buckets),
+                    "count": 0,
+                    "sum": 0.0,
+                    "db_queries_total": 0,
+                    "db_duration_seconds_total": 0.0,
+                    "response_bytes_total": 0,
+                    "timings": defaultdict(float),
+                },
+            )
+            for index, bound in enumerate(self.buckets):
+                if metrics.duration <= bound:
+                    series["buckets"][index] += 1
+            series["count"] += 1
+            series["sum"] += metrics.duration
+            series["db_queries_total"] += len(metrics.queries)
+            series["db_duration_seconds_total"] += metrics.db_time
+            series["response_bytes_total"] += size
+            for name, seconds in metrics.timings.items():
+                series["timings"][name] += seconds
+
+    def prometheus(self):
+        with self._lock:
+            series = {
+                key: {**value, "timings": dict(value["timings"])}
+                for key, value in sorted(self._series.items())
+            }
+
+        name = "userapi_request_duration_seconds"
+        lines = [
+            f"# HELP {name} Request wall time by URL pattern.",
+            f"# TYPE {name} histogram",
+        ]
+        for (route, method), value in series.items():
+            labels = _labels(route=route, method=method)
+            for bound, count in zip(self.buckets, value["buckets"]):
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {value["count"]}')
+            lines.append(f"{name}_sum{{{labels}}} {value['sum']}")
+            lines.append(f"{name}_count{{{labels}}} {value['count']}")
+
+        for counter, help_text in self.counters.items():
+            lines += [
+                f"# HELP userapi_{counter} {help_text}",
+                f"# TYPE userapi_{counter} counter",
+            ]
+            for (route, method), value in series.items():
+                labels = _labels(route=route, method=method)
+                lines.append(f"userapi_{counter}{{{labels}}} {value[counter]}")
+
+        name = "userapi_phase_duration_seconds_total"
+        lines += [
+            f"# HELP {name} Time spent serializing and rendering responses.",
+            f"# TYPE {name} counter",
+        ]
+        for (route, method), value in series.items():
+            for phase, seconds in sorted(value["timings"].items()):
+                labels = _labels(route=route, method=method, phase=phase)
+                lines.append(f"{name}{{{labels}}} {seconds}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(**labels):
+    return ",".join(
+        '{}="{}"'.format(
+            key,
+            value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for key, value in labels.items()
+    )
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,96 @@
+import logging
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.decorators import sync_and_async_middleware
+from .metrics import collect_metrics, record_query, registry
+from .routers import pin_to_primary
+
+logger = logging.getLogger("userapi.performance")
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+@sync_and_async_middleware
+def replica_pinning_middleware(get_response):
+    """
+    Scope replica routing to one request. Unsafe methods read from the
+    primary throughout, so read-modify-write views never act on a lagging
+    replica; safe methods switch to the primary after their first write.
+    """
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            with pin_to_primary(request.method not in SAFE_METHODS):
+                return await get_response(request)
+
+    else:
+
+        def middleware(request):
+            with pin_to_primary(request.method not in SAFE_METHODS):
+                return get_response(request)
+
+    return middleware
+
+
+def _install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def _finish_request(request, response, metrics):
+    match = request.resolver_match
+    route = match.route if match else "<unmatched>"
+    size = 0 if response.streaming else len(response.content)
+    registry.observe(route, request.method, metrics, size)
+    response["Server-Timing"] = metrics.server_timing()
+
+    if metrics.duration * 1000 >= getattr(settings, "PERF_SLOW_REQUEST_MS", 500):
+        logger.warning(
+            "Slow request %s %s: %.1f ms, %d queries in %.1f ms\n%s",
+            request.method,
+            route,
+            metrics.duration * 1000,
+            len(metrics.queries),
+            metrics.db_time * 1000,
+            "\n".join(
+                f"  {duration * 1000:.1f} ms  {sql}"
+                for sql, duration in metrics.queries
+            ),
+        )
+    return response
+
+
+@sync_and_async_middleware
+def performance_middleware(get_response):
+    """
+    Time each request when ``PERF_METRICS_ENABLED`` is set: wall time, query
+    count and time, serialize/render time and response size are sent as a
+    ``Server-Timing`` header and aggregated per URL pattern for ``metrics/``.
+    """
+    if not getattr(settings, "PERF_METRICS_ENABLED", False):
+        raise MiddlewareNotUsed()
+    connection_created.connect(
+        _install_query_recorder, dispatch_uid="userapi.metrics.record_query"
+    )
+    for connection in connections.all(initialized_only=True):
+        _install_query_recorder(connection)
+
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            with collect_metrics() as metrics:
+                response = await get_response(request)
+            return _finish_request(request, response, metrics)
+
+    else:
+
+        def middleware(request):
+            with collect_metrics() as metrics:
+                response = get_response(request)
+            return _finish_request(request, response, metrics)
+
+    return middleware
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("userapi", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(
+                condition=models.Q(("deleted", False)),
+                fields=["owner"],
+                name="project_owner_live_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="projectmember",
+            index=models.Index(
+                condition=models.Q(("deleted", False)),
+                fields=["project"],
+                name="member_project_live_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="projectmember",
+            index=models.Index(
+                fields=["user", "project"], name="member_user_project_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("deleted", False)),
+                fields=["project", "due_date", "id"],
+                name="task_project_live_due_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("userapi", "0002_soft_delete_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("deleted", False)),
+                fields=["project", "status", "due_date"],
+                name="task_project_live_status_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("userapi", "0003_task_status_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="version",
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations
+
+SQLITE_FORWARDS = [
+    "CREATE VIRTUAL TABLE userapi_task_fts USING fts5("
+    "title, description, tokenize='porter unicode61 remove_diacritics 2')",
+    "INSERT INTO userapi_task_fts (rowid, title, description) "
+    "SELECT id, title, description FROM userapi_task WHERE NOT deleted",
+]
+SQLITE_BACKWARDS = ["DROP TABLE userapi_task_fts"]
+
+POSTGRES_FORWARDS = [
+    "ALTER TABLE userapi_task ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')) STORED",
+    "CREATE INDEX task_search_live_idx ON userapi_task "
+    "USING gin (search_vector) WHERE NOT deleted",
+]
+POSTGRES_BACKWARDS = [
+    "DROP INDEX task_search_live_idx",
+    "ALTER TABLE userapi_task DROP COLUMN search_vector",
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for statement in statements.get(vendor, []):
+            schema_editor.execute(statement)
+
+    return operation
+
+
+class Migration(migrations.Migration):
+    """
+    Search index over task titles and descriptions: an FTS5 table on SQLite,
+    a generated tsvector column with a GIN index on PostgreSQL. Neither is
+    modelled, so the statements depend on the database in use.
+    """
+
+    dependencies = [
+        ("userapi", "0006_revokedtoken"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({"sqlite": SQLITE_FORWARDS, "postgresql": POSTGRES_FORWARDS}),
+            run({"sqlite": SQLITE_BACKWARDS, "postgresql": POSTGRES_BACKWARDS}),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 
@@ -7,6 +8,18 @@ class Project(models.Model):
     description = models.TextField()
     deleted = models.BooleanField(default=False)
     owner = models.ForeignKey(User, related_name="projects", on_delete=models.CASCADE)
+    version = models.PositiveBigIntegerField(default=0, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["owner"],
+                condition=models.Q(deleted=False),
+                name="project_owner_live_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -20,9 +33,19 @@ class ProjectMember(models.Model):
     can_delete = models.BooleanField(default=False)
     add_members = models.BooleanField(default=False)
     deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("project", "user")
+        indexes = [
+            models.Index(
+                fields=["project"],
+                condition=models.Q(deleted=False),
+                name="member_project_live_idx",
+            ),
+            models.Index(fields=["user", "project"], name="member_user_project_idx"),
+        ]
 
     def __str__(self):
         return f"{self.project} - {self.user}"
@@ -44,6 +67,97 @@ class Task(models.Model):
     due_date = models.DateField()
     deleted = models.BooleanField(default=False)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["project", "due_date", "id"],
+                condition=models.Q(deleted=False),
+                name="task_project_live_due_idx",
+            ),
+            models.Index(
+                fields=["project", "status", "due_date"],
+                condition=models.Q(deleted=False),
+                name="task_project_live_status_idx",
+            ),
+            # Not partial: the changes feed must also find soft-deleted rows.
+            models.Index(
+                fields=["project", "updated_at", "id"],
+                name="task_project_updated_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class RevokedToken(models.Model):
+    """
+    Refresh token ids that may no longer be used. Rows only need to outlive
+    the token itself and are pruned once ``expires_at`` has passed.
+    """
+
+    jti = models.CharField(max_length=32, primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.jti
+
+
+class Job(models.Model):
+    """
+    Background work picked up by ``manage.py worker``. Workers extend
+    ``heartbeat_at`` while a job runs; a running job whose heartbeat is older
+    than ``JOB_LEASE_SECONDS`` is assumed orphaned and queued again.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+
+    type = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    payload = models.JSONField(default=dict)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    project = models.ForeignKey(
+        Project, related_name="jobs", on_delete=models.CASCADE, null=True, blank=True
+    )
+    created_by = models.ForeignKey(User, related_name="jobs", on_delete=models.CASCADE)
+    worker = models.CharField(max_length=100, blank=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["run_after", "id"],
+                condition=models.Q(status="queued"),
+                name="job_queued_idx",
+            ),
+            models.Index(
+                fields=["heartbeat_at"],
+                condition=models.Q(status="running"),
+                name="job_running_idx",
+            ),
+            models.Index(fields=["created_by", "id"], name="job_created_by_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.type} #{self.id} ({self.status})"
@@ -0,0 +1,201 @@
+import json
+
+from django.conf import settings
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination over a fixed ordering that always ends in a unique
+    column, so every page is a single indexed range scan instead of an OFFSET.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    salt = "userapi.pagination.cursor"
+
+    def __init__(self, ordering=("due_date", "id"), page_size=None, max_page_size=None):
+        self.ordering = tuple(ordering)
+        self.page_size = page_size or getattr(settings, "TASK_PAGE_SIZE", 100)
+        self.max_page_size = max_page_size or getattr(
+            settings, "TASK_MAX_PAGE_SIZE", 1000
+        )
+
+    @property
+    def fields(self):
+        return [field.lstrip("-") for field in self.ordering]
+
+    def get_page_size(self, request):
+        page_size = request.query_params.get(self.page_size_query_param)
+        if page_size is None:
+            return self.page_size
+        try:
+            page_size = int(page_size)
+        except ValueError:
+            raise ValidationError({"page_size": "Must be a positive integer."})
+        if page_size < 1:
+            raise ValidationError({"page_size": "Must be a positive integer."})
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(self, values):
+        return signing.dumps(
+            {"o": self.ordering, "v": values},
+            salt=self.salt,
+            serializer=CursorSerializer,
+            compress=True,
+        )
+
+    def decode_cursor(self, cursor):
+        try:
+            data = signing.loads(cursor, salt=self.salt, serializer=CursorSerializer)
+        except signing.BadSignature:
+            raise ValidationError({"cursor": "Invalid cursor."})
+        if tuple(data.get("o", ())) != self.ordering:
+            raise ValidationError({"cursor": "Cursor does not match ordering."})
+        return data["v"]
+
+    def get_keyset_filter(self, values):
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            step = Q(**{f"{name}__{lookup}": values[index]})
+            for previous, value in zip(self.fields[:index], values):
+                step &= Q(**{previous: value})
+            condition |= step
+        return condition
+
+    def get_row_values(self, row):
+        if isinstance(row, dict):
+            return [row[name] for name in self.fields]
+        return [getattr(row, name) for name in self.fields]
+
+    def get_page_queryset(self, queryset, request):
+        page_size = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+        queryset = queryset.order_by(*self.ordering)
+        if cursor:
+            queryset = queryset.filter(
+                self.get_keyset_filter(self.decode_cursor(cursor))
+            )
+        return queryset[: page_size + 1], page_size
+
+    def get_page(self, rows, page_size):
+        if len(rows) <= page_size:
+            return rows, None
+        rows = rows[:page_size]
+        return rows, self.encode_cursor(self.get_row_values(rows[-1]))
+
+    def paginate_queryset(self, queryset, request):
+        """
+        Return ``(rows, next_cursor)`` for the page addressed by ``request``.
+        ``next_cursor`` is ``None`` on the last page.
+        """
+        queryset, page_size = self.get_page_queryset(queryset, request)
+        return self.get_page(list(queryset), page_size)
+
+    async def apaginate_queryset(self, queryset, request):
+        queryset, page_size = self.get_page_queryset(queryset, request)
+        return self.get_page([row async for row in queryset], page_size)
+
+
+class ChangesPaginator(KeysetPaginator):
+    """
+    Keyset over ``(updated_at, id)`` whose cursor doubles as a sync watermark:
+    every page, including the last, returns one to resume from.
+    """
+
+    cursor_query_param = "since"
+    salt = "userapi.pagination.watermark"
+
+    def __init__(self, page_size=None, max_page_size=None):
+        super().__init__(("updated_at", "id"), page_size, max_page_size)
+
+    def encode_cursor(self, values):
+        # Keep microseconds, which DjangoJSONEncoder would truncate.
+        return super().encode_cursor([values[0].isoformat(), values[1]])
+
+    def decode_cursor(self, cursor):
+        updated_at, pk = super().decode_cursor(cursor)
+        updated_at = parse_datetime(updated_at) if updated_at else None
+        if updated_at is None or type(pk) is not int:
+            raise ValidationError({"since": "Invalid watermark."})
+        return [updated_at, pk]
+
+    def paginate_changes(self, queryset, request, settled_before=None):
+        """
+        Return ``(rows, watermark, has_more)``. The watermark of any page is
+        held back to ``settled_before`` so that rows stamped before it but
+        committed after this read are still picked up by the next sync; a page
+        that reaches past it ends the sync, and its newer rows are sent again
+        next time.
+        """
+        since = request.query_params.get(self.cursor_query_param)
+        since = self.decode_cursor(since) if since else None
+        queryset, page_size = self.get_page_queryset(queryset, request)
+        rows = list(queryset)
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        values = self.get_row_values(rows[-1]) if rows else since
+        if settled_before is not None and (
+            values is None or values[0] > settled_before
+        ):
+            values = [settled_before, 0]
+            if since is not None:
+                values = max(values, since)
+            has_more = False
+        watermark = self.encode_cursor(values) if values is not None else None
+        return rows, watermark, has_more
+
+
+class SearchPaginator(KeysetPaginator):
+    """
+    Pages of ranked search results. Every page has to score all matches to
+    sort them anyway, so the cursor carries an offset, bound to the terms it
+    was issued for, rather than a keyset position.
+    """
+
+    salt = "userapi.pagination.search"
+
+    def __init__(self, terms, page_size=None, max_page_size=None):
+        super().__init__(("rank", "id"), page_size, max_page_size)
+        self.terms = list(terms)
+
+    def encode_cursor(self, offset):
+        return signing.dumps(
+            {"q": self.terms, "v": offset},
+            salt=self.salt,
+            serializer=CursorSerializer,
+            compress=True,
+        )
+
+    def decode_cursor(self, cursor):
+        try:
+            data = signing.loads(cursor, salt=self.salt, serializer=CursorSerializer)
+        except signing.BadSignature:
+            raise ValidationError({"cursor": "Invalid cursor."})
+        if data.get("q") != self.terms:
+            raise ValidationError({"cursor": "Cursor does not match the query."})
+        return data["v"]
+
+    def paginate_queryset(self, queryset, request):
+        page_size = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+        offset = self.decode_cursor(cursor) if cursor else 0
+        rows = list(queryset.order_by(*self.ordering)[offset : offset + page_size + 1])
+        if len(rows) <= page_size:
+            return rows, None
+        return rows[:page_size], self.encode_cursor(offset + page_size)
+
+
+class CursorSerializer:
+    def dumps(self, obj):
+        return json.dumps(obj, cls=DjangoJSONEncoder, separators=(",", ":")).encode()
+
+    def loads(self, data):
+        return json.loads(data.decode())
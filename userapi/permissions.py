@@ -1,71 +1,220 @@
+from dataclasses import dataclass
+from itertools import count
+
+from django.conf import settings
+from django.db.models import FilteredRelation, Q
 from rest_framework import permissions
-from .models import ProjectMember, Project
+from .models import Project, ProjectMember
+from .utils import TTLCache
 
 
-class IsProjectMember(permissions.BasePermission):
-    def has_permission(self, request, view):
-        user = request.user
-        project_id = view.kwargs.get("project_id")
-        if not project_id:
-            return False
+@dataclass(frozen=True)
+class ProjectAccess:
+    exists: bool = False
+    is_owner: bool = False
+    is_member: bool = False
+    can_create: bool = False
+    can_update: bool = False
+    can_delete: bool = False
+    add_members: bool = False
 
-        project = Project.objects.filter(id=project_id).first()
-        if project and project.owner == user:
+    def allows(self, capability=None):
+        if self.is_owner:
             return True
-        return ProjectMember.objects.filter(user=user, project_id=project_id).exists()
+        if not self.is_member:
+            return False
+        return capability is None or getattr(self, capability)
 
 
-class CanCreateTask(permissions.BasePermission):
-    def has_permission(self, request, view):
-        user = request.user
-        project_id = view.kwargs.get("project_id")
-        if not project_id:
-            return False
+permission_cache = TTLCache(
+    maxsize=getattr(settings, "PERMISSION_CACHE_SIZE", 10000),
+    ttl=getattr(settings, "PERMISSION_CACHE_TTL", 5),
+)
 
-        project = Project.objects.filter(id=project_id).first()
-        if project and project.owner == user:
-            return True
-        member = ProjectMember.objects.filter(user=user, project_id=project_id).first()
-        return member and member.can_create
+# Current generation of each project's entries in ``permission_cache``.
+# Dropping it orphans them all without scanning the cache.
+_generations = TTLCache(maxsize=permission_cache.maxsize, ttl=permission_cache.ttl)
+_generation_counter = count()
 
 
-class CanUpdateTask(permissions.BasePermission):
-    def has_permission(self, request, view):
-        user = request.user
-        project_id = view.kwargs.get("project_id")
-        if not project_id:
-            return False
-        print(user)
-        project = Project.objects.filter(id=project_id).first()
-        if project and project.owner == user:
-            return True
-        member = ProjectMember.objects.filter(user=user, project_id=project_id).first()
-        return member and member.can_update
+def _cache_key(key):
+    user_id, project_id = key
+    generation = _generations.get(project_id)
+    if generation is None:
+        generation = next(_generation_counter)
+        _generations.set(project_id, generation)
+    return (user_id, project_id, generation)
+
+
+def project_access_query(user_id, project_id):
+    return (
+        Project.objects.filter(id=project_id)
+        .annotate(
+            membership=FilteredRelation(
+                "projectmember",
+                condition=Q(
+                    projectmember__user_id=user_id, projectmember__deleted=False
+                ),
+            )
+        )
+        .values(
+            "owner_id",
+            "membership__id",
+            "membership__can_create",
+            "membership__can_update",
+            "membership__can_delete",
+            "membership__add_members",
+        )
+    )
+
+
+def accessible_projects(user_id):
+    """
+    Ids of the live projects ``user_id`` owns or is an active member of, as a
+    subquery for ``project__in`` lookups.
+    """
+    memberships = ProjectMember.objects.filter(user_id=user_id, deleted=False)
+    return Project.objects.filter(
+        Q(owner_id=user_id) | Q(id__in=memberships.values("project_id")),
+        deleted=False,
+    ).values("id")
+
+
+def build_project_access(user_id, row):
+    if row is None:
+        return ProjectAccess()
+    if row["membership__id"] is None:
+        return ProjectAccess(exists=True, is_owner=row["owner_id"] == user_id)
+    return ProjectAccess(
+        exists=True,
+        is_owner=row["owner_id"] == user_id,
+        is_member=True,
+        can_create=row["membership__can_create"],
+        can_update=row["membership__can_update"],
+        can_delete=row["membership__can_delete"],
+        add_members=row["membership__add_members"],
+    )
+
+
+def load_project_access(user_id, project_id):
+    row = next(iter(project_access_query(user_id, project_id)[:1]), None)
+    return build_project_access(user_id, row)
+
+
+async def aload_project_access(user_id, project_id):
+    row = await project_access_query(user_id, project_id).afirst()
+    return build_project_access(user_id, row)
+
 
+def _access_key(request, project_id):
+    user_id = request.user.id
+    if user_id is None or not project_id:
+        return None, None
+    memo = request.__dict__.setdefault("_project_access", {})
+    return memo, (user_id, int(project_id))
+
+
+def _cached_access(memo, key, fresh):
+    access = memo.get(key)
+    if access is None and not fresh:
+        access = permission_cache.get(_cache_key(key))
+    return access
+
+
+def _remember_access(memo, key, access):
+    permission_cache.set(_cache_key(key), access)
+    memo[key] = access
+    return access
+
+
+def get_project_access(request, project_id, fresh=None):
+    """
+    Resolve what ``request.user`` may do in ``project_id`` with at most one
+    query, memoized on the request and cached per process.
+
+    Other processes only notice revoked access once their entries expire
+    (``PERMISSION_CACHE_TTL``), so destructive requests (``fresh``, by
+    default every ``DELETE``) are authorized against the database.
+    """
+    memo, key = _access_key(request, project_id)
+    if key is None:
+        return ProjectAccess()
+    if fresh is None:
+        fresh = getattr(request, "method", None) == "DELETE"
+    access = _cached_access(memo, key, fresh)
+    if access is None:
+        return _remember_access(memo, key, load_project_access(*key))
+    memo[key] = access
+    return access
+
+
+async def aget_project_access(request, project_id, fresh=None):
+    memo, key = _access_key(request, project_id)
+    if key is None:
+        return ProjectAccess()
+    if fresh is None:
+        fresh = getattr(request, "method", None) == "DELETE"
+    access = _cached_access(memo, key, fresh)
+    if access is None:
+        return _remember_access(memo, key, await aload_project_access(*key))
+    memo[key] = access
+    return access
+
+
+def invalidate_project_access(project_id, user_id=None):
+    if user_id is None:
+        _generations.delete(project_id)
+    else:
+        permission_cache.delete(_cache_key((user_id, project_id)))
+
+
+class ProjectPermission(permissions.BasePermission):
+    capability = None
 
-class CanDeleteTask(permissions.BasePermission):
     def has_permission(self, request, view):
-        user = request.user
         project_id = view.kwargs.get("project_id")
         if not project_id:
             return False
+        return get_project_access(request, project_id).allows(self.capability)
 
-        project = Project.objects.filter(id=project_id).first()
-        if project and project.owner == user:
-            return True
-        member = ProjectMember.objects.filter(user=user, project_id=project_id).first()
-        return member and member.can_delete
 
+class IsProjectMember(ProjectPermission):
+    pass
+
+
+class CanCreateTask(ProjectPermission):
+    capability = "can_create"
+
+
+class CanUpdateTask(ProjectPermission):
+    capability = "can_update"
+
+
+class CanDeleteTask(ProjectPermission):
+    capability = "can_delete"
+
+
+class CanAddMembers(ProjectPermission):
+    capability = "add_members"
+
+
+class CanBulkEditTasks(permissions.BasePermission):
+    operations = {
+        "create": "can_create",
+        "update": "can_update",
+        "delete": "can_delete",
+    }
 
-class CanAddMembers(permissions.BasePermission):
     def has_permission(self, request, view):
-        user = request.user
         project_id = view.kwargs.get("project_id")
-        if not project_id:
+        if not project_id or not isinstance(request.data, dict):
             return False
-
-        project = Project.objects.filter(id=project_id).first()
-        if project and project.owner == user:
-            return True
-        member = ProjectMember.objects.filter(user=user, project_id=project_id).first()
-        return member and member.add_members
+        access = get_project_access(
+            request, project_id, fresh=bool(request.data.get("delete"))
+        )
+        requested = [
+            capability
+            for operation, capability in self.operations.items()
+            if request.data.get(operation)
+        ]
+        return access.allows() and all(access.allows(cap) for cap in requested)
@@ -0,0 +1,53 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_pinned = ContextVar("userapi_pinned_to_primary", default=False)
+
+
+def replicas():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+def reads_from_replica():
+    return bool(replicas()) and not _pinned.get()
+
+
+@contextmanager
+def pin_to_primary(pinned=True):
+    """
+    Route reads in this block to the primary. Writes inside it keep the pin
+    for the rest of the block.
+    """
+    previous = _pinned.get()
+    _pinned.set(pinned)
+    try:
+        yield
+    finally:
+        _pinned.set(previous)
+
+
+class PrimaryReplicaRouter:
+    """
+    Send reads to a random ``DATABASE_REPLICAS`` alias and writes to
+    ``default``. After the first write in a context every later read goes to
+    the primary too, so a request always sees its own writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        if reads_from_replica():
+            return random.choice(replicas())
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        _pinned.set(True)
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
@@ -0,0 +1,158 @@
+import re
+
+from django.conf import settings
+from django.db import connections, router
+from rest_framework.exceptions import ValidationError
+from .models import Task
+
+SEARCH_MAX_TERMS = 16
+
+
+def parse_search_terms(query):
+    """
+    Split free text into lower-cased word terms. Operators and quotes are
+    dropped, so user input can never be a syntax error in either backend.
+    """
+    terms = re.findall(r"\w+", (query or "").lower())[:SEARCH_MAX_TERMS]
+    if not terms:
+        raise ValidationError({"q": "Enter at least one search term."})
+    return terms
+
+
+class SQLiteTaskSearch:
+    """
+    FTS5 table holding the title and description of live tasks, keyed by
+    rowid = task id. Kept in sync by ``index_tasks``.
+    """
+
+    table = "userapi_task_fts"
+
+    def match(self, queryset, terms, min_id=None):
+        where = [f"{self.table}.rowid = userapi_task.id", f"{self.table} MATCH %s"]
+        params = [" ".join(f'"{term}"' for term in terms)]
+        if min_id is not None:
+            # On the FTS side so that FTS5 skips older rowids itself.
+            where.append(f"{self.table}.rowid >= %s")
+            params.append(min_id)
+        return queryset.extra(tables=[self.table], where=where, params=params)
+
+    def rank(self, queryset, terms):
+        # The title weighs twice the description.
+        return queryset.extra(select={"rank": f"bm25({self.table}, 2.0, 1.0)"})
+
+    def index(self, cursor, tasks):
+        live = [task for task in tasks if not task.deleted]
+        removed = [task.id for task in tasks if task.deleted]
+        if live:
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (rowid, title, description) "
+                "VALUES (%s, %s, %s)",
+                [(task.id, task.title, task.description) for task in live],
+            )
+        if removed:
+            self.remove(cursor, removed)
+
+    def remove(self, cursor, ids):
+        cursor.executemany(
+            f"DELETE FROM {self.table} WHERE rowid = %s", [(pk,) for pk in ids]
+        )
+
+
+class PostgresTaskSearch:
+    """
+    Generated ``search_vector`` column on the task table with a partial GIN
+    index over live tasks. PostgreSQL maintains it, so indexing is a no-op.
+    """
+
+    query = "plainto_tsquery('english', %s)"
+
+    def match(self, queryset, terms, min_id=None):
+        queryset = queryset.extra(
+            where=[f"userapi_task.search_vector @@ {self.query}"],
+            params=[" ".join(terms)],
+        )
+        if min_id is not None:
+            queryset = queryset.filter(id__gte=min_id)
+        return queryset
+
+    def rank(self, queryset, terms):
+        # ts_rank_cd grows with relevance; negate it to share the ascending
+        # (rank, id) ordering with bm25.
+        return queryset.extra(
+            select={"rank": f"-ts_rank_cd(userapi_task.search_vector, {self.query})"},
+            select_params=[" ".join(terms)],
+        )
+
+    def index(self, cursor, tasks):
+        pass
+
+    def remove(self, cursor, ids):
+        pass
+
+
+class UnsupportedTaskSearch:
+    """
+    Stand-in for databases without a search index. Task writes keep working
+    and only searching raises ``NotImplementedError``.
+    """
+
+    def __init__(self, vendor):
+        self.vendor = vendor
+
+    def match(self, queryset, terms, min_id=None):
+        raise NotImplementedError(f"Task search does not support {self.vendor}.")
+
+    def rank(self, queryset, terms):
+        raise NotImplementedError(f"Task search does not support {self.vendor}.")
+
+    def index(self, cursor, tasks):
+        pass
+
+    def remove(self, cursor, ids):
+        pass
+
+
+BACKENDS = {"sqlite": SQLiteTaskSearch(), "postgresql": PostgresTaskSearch()}
+
+
+def get_task_search(using):
+    vendor = connections[using].vendor
+    return BACKENDS.get(vendor) or UnsupportedTaskSearch(vendor)
+
+
+def search_tasks(queryset, terms):
+    """
+    Narrow a task queryset to tasks matching every one of ``terms`` and add a
+    ``rank`` column, where lower ranks are better matches.
+
+    Scoring is the expensive part of a search, so when more than
+    ``TASK_SEARCH_RANK_WINDOW`` tasks of ``queryset`` match, only that many of
+    the newest matches are considered. The window is counted within
+    ``queryset``, so matches the caller cannot see never crowd out its own.
+    """
+    search = get_task_search(queryset.db)
+    window = getattr(settings, "TASK_SEARCH_RANK_WINDOW", 10000)
+    min_id = None
+    if window:
+        matches = search.match(queryset, terms).order_by("-id")
+        min_id = next(
+            iter(matches.values_list("id", flat=True)[window - 1 : window]), None
+        )
+    return search.rank(search.match(queryset, terms, min_id), terms)
+
+
+def index_tasks(tasks):
+    """
+    Add or refresh ``tasks`` in the search index and drop soft-deleted ones.
+    Needed after ``bulk_create``, ``bulk_update`` and ``update``, which do not
+    send the save signals that keep the index in sync otherwise.
+    """
+    using = router.db_for_write(Task)
+    with connections[using].cursor() as cursor:
+        get_task_search(using).index(cursor, list(tasks))
+
+
+def unindex_tasks(ids):
+    using = router.db_for_write(Task)
+    with connections[using].cursor() as cursor:
+        get_task_search(using).remove(cursor, list(ids))
@@ -1,6 +1,16 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Project, Task, ProjectMember
+from .metrics import timed
+from .models import Job, Project, Task, ProjectMember
+
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+        if fields:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -13,7 +23,7 @@ class ProjectSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Project
-        fields = ["id", "name", "description", "owner"]
+        fields = ["id", "name", "description", "owner", "created_at", "updated_at"]
 
 
 class ProjectMemberSerializer(serializers.ModelSerializer):
@@ -22,7 +32,21 @@ class ProjectMemberSerializer(serializers.ModelSerializer):
         exclude = ["deleted"]
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class ProjectMemberBulkSerializer(serializers.Serializer):
+    user = serializers.IntegerField(required=False)
+    username = serializers.CharField(required=False)
+    can_create = serializers.BooleanField(required=False)
+    can_update = serializers.BooleanField(required=False)
+    can_delete = serializers.BooleanField(required=False)
+    add_members = serializers.BooleanField(required=False)
+
+    def validate(self, attrs):
+        if ("user" in attrs) == ("username" in attrs):
+            raise serializers.ValidationError("Provide either user or username.")
+        return attrs
+
+
+class TaskSerializer(DynamicFieldsModelSerializer):
 
     class Meta:
         model = Task
@@ -34,4 +58,94 @@ class TaskSerializer(serializers.ModelSerializer):
             "due_date",
             "project",
             "created_by",
+            "created_at",
+            "updated_at",
+        ]
+
+
+class TaskBulkSerializer(TaskSerializer):
+    class Meta(TaskSerializer.Meta):
+        read_only_fields = ["project", "created_by"]
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = [
+            "id",
+            "type",
+            "status",
+            "project",
+            "progress",
+            "total",
+            "result",
+            "error",
+            "attempts",
+            "created_at",
+            "started_at",
+            "finished_at",
         ]
+
+
+class ValuesSerializer:
+    """
+    Read-only counterpart of ``serializer_class`` that builds output dicts
+    straight from ``.values()`` rows, skipping model instantiation. Field names,
+    order and representation are taken from the model serializer so both
+    render identical JSON.
+    """
+
+    serializer_class = None
+    passthrough_fields = (
+        serializers.BooleanField,
+        serializers.CharField,
+        serializers.ChoiceField,
+        serializers.IntegerField,
+        serializers.PrimaryKeyRelatedField,
+        serializers.ReadOnlyField,
+    )
+
+    def __init__(self, fields=None):
+        self.fields = []
+        for name, field in self.serializer_class().fields.items():
+            if field.write_only or (fields and name not in fields):
+                continue
+            convert = None
+            if not isinstance(field, self.passthrough_fields):
+                convert = field.to_representation
+            if isinstance(field, serializers.DateTimeField) and not hasattr(
+                field, "timezone"
+            ):
+                # Look the active time zone up once rather than for every value.
+                field.timezone = field.default_timezone()
+            self.fields.append((name, field.source, convert))
+
+    @property
+    def columns(self):
+        return [source for _, source, _ in self.fields]
+
+    def to_representation(self, row):
+        data = {}
+        for name, source, convert in self.fields:
+            value = row[source]
+            data[name] = value if convert is None or value is None else convert(value)
+        return data
+
+    def serialize(self, rows):
+        with timed("serialize"):
+            return [self.to_representation(row) for row in rows]
+
+    def serialize_queryset(self, queryset):
+        return self.serialize(queryset.values(*self.columns))
+
+
+class ProjectValuesSerializer(ValuesSerializer):
+    serializer_class = ProjectSerializer
+
+
+class ProjectMemberValuesSerializer(ValuesSerializer):
+    serializer_class = ProjectMemberSerializer
+
+
+class TaskValuesSerializer(ValuesSerializer):
+    serializer_class = TaskSerializer
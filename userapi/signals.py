@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+from .authentication import user_cache
+from .cache import invalidate_owner, invalidate_project
+from .events import publish_task_events_on_commit
+from .models import Project, ProjectMember, Task
+from .permissions import invalidate_project_access
+from .search import index_tasks, unindex_tasks
+from .versioning import bump_project_version
+
+
+@receiver(pre_save, sender=Project)
+def project_saving(sender, instance, **kwargs):
+    if instance.pk and not instance._state.adding:
+        instance.version = F("version") + 1
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, created, **kwargs):
+    # Replace the F() expression so the instance holds the stored version.
+    if not created:
+        instance.refresh_from_db(fields=["version"])
+
+
+@receiver([post_save, post_delete], sender=Project)
+def project_changed(sender, instance, **kwargs):
+    invalidate_project_access(instance.id)
+    invalidate_project(instance.id)
+    invalidate_owner(instance.owner_id)
+
+
+@receiver([post_save, post_delete], sender=ProjectMember)
+def project_member_changed(sender, instance, **kwargs):
+    invalidate_project_access(instance.project_id, instance.user_id)
+    bump_project_version(instance.project_id)
+    invalidate_project(instance.project_id)
+
+
+@receiver(post_init, sender=Task)
+def task_loaded(sender, instance, **kwargs):
+    # Read from __dict__ so that a deferred project_id is not fetched.
+    instance._stored_project_id = instance.__dict__.get("project_id")
+
+
+@receiver([post_save, post_delete], sender=Task)
+def task_changed(sender, instance, **kwargs):
+    # A task moved to another project changes the lists of both.
+    stored = instance._stored_project_id
+    for project_id in {stored, instance.project_id} - {None}:
+        bump_project_version(project_id)
+        invalidate_project(project_id)
+    instance._stored_project_id = instance.project_id
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, **kwargs):
+    publish_task_events_on_commit([instance], "task.created" if created else None)
+    index_tasks([instance])
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    publish_task_events_on_commit([instance], "task.deleted")
+    unindex_tasks([instance.id])
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    user_cache.delete(instance.id)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in getattr(settings, "SQLITE_PRAGMAS", {}).items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
@@ -1,3 +1,2011 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gzip
+import json
+import os
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+import tempfile
+from io import BytesIO, StringIO
+from pathlib import Path
+import unittest
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import jwt
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Count, F, Q
+from django.test import (
+    AsyncRequestFactory,
+    RequestFactory,
+    TestCase,
+    override_settings,
+)
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .async_views import (
+    AsyncProjectAPIView,
+    AsyncProjectMemberAPIView,
+    AsyncTaskAPIView,
+    TaskEventStreamView,
+)
+from .authentication import TokenUser, user_cache
+from .cache import cached_response, stats as cache_stats
+from .events import RESET, InMemoryBroker
+from .management.commands.benchmark import ASGIClient, api_routes
+from .jobs import (
+    claim_job,
+    delete_expired_job_files,
+    enqueue,
+    requeue_stale_jobs,
+    run_job,
+)
+from .metrics import registry as metrics_registry
+from .middleware import replica_pinning_middleware
+from .models import Job, Project, ProjectMember, RevokedToken, Task
+from .renderers import FastJSONParser, FastJSONRenderer
+from .permissions import (
+    accessible_projects,
+    get_project_access,
+    invalidate_project_access,
+    permission_cache,
+    project_access_query,
+)
+from .routers import PrimaryReplicaRouter, pin_to_primary
+from .search import UnsupportedTaskSearch
+from .serializers import (
+    ProjectMemberSerializer,
+    ProjectMemberValuesSerializer,
+    ProjectSerializer,
+    ProjectValuesSerializer,
+    TaskSerializer,
+    TaskValuesSerializer,
+)
+
+
+class APITestMixin:
+    def setUp(self):
+        permission_cache.clear()
+        user_cache.clear()
+        cache.clear()
+        cache_stats.reset()
+        self.owner = User.objects.create_user(username="owner", password="secret")
+        self.project = Project.objects.create(
+            name="Apollo", description="Moon", owner=self.owner
+        )
+        self.client = self.client_for(self.owner)
+
+    def client_for(self, user, **claims):
+        payload = {
+            "id": user.id,
+            "username": user.username,
+            "is_active": user.is_active,
+            "exp": (timezone.now() + timedelta(hours=1)).timestamp(),
+            "iat": timezone.now().timestamp(),
+            **claims,
+        }
+        token = jwt.encode(payload, settings.SECRET_KEY, algorithm="HS256")
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return client
+
+    def create_tasks(self, count, project=None, **kwargs):
+        start = date(2024, 1, 1)
+        return Task.objects.bulk_create(
+            Task(
+                project=project or self.project,
+                title=f"Task {index}",
+                description="",
+                due_date=start + timedelta(days=index % 7),
+                created_by=self.owner,
+                **kwargs,
+            )
+            for index in range(count)
+        )
+
+
+class TaskPaginationTests(APITestMixin, TestCase):
+    def url(self, **params):
+        query = "&".join(f"{key}={value}" for key, value in params.items())
+        return f"/api/projects/{self.project.id}/tasks/?{query}"
+
+    @override_settings(TASK_PAGE_SIZE=4)
+    def test_cursor_walks_every_task_once_in_order(self):
+        self.create_tasks(10)
+        seen = []
+        response = self.client.get(self.url())
+        while True:
+            self.assertEqual(response.status_code, 200)
+            seen.extend(response.data["data"])
+            cursor = response.data["next_cursor"]
+            if not cursor:
+                break
+            response = self.client.get(self.url(cursor=cursor))
+
+        expected = list(
+            Task.objects.order_by("due_date", "id").values_list("id", flat=True)
+        )
+        self.assertEqual([task["id"] for task in seen], expected)
+
+    def test_page_size_is_capped(self):
+        self.create_tasks(5)
+        with self.settings(TASK_MAX_PAGE_SIZE=2):
+            response = self.client.get(self.url(page_size=50))
+        self.assertEqual(len(response.data["data"]), 2)
+        self.assertIsNotNone(response.data["next_cursor"])
+
+    def test_fields_trims_output(self):
+        self.create_tasks(1)
+        response = self.client.get(self.url(fields="id,title"))
+        self.assertEqual(list(response.data["data"][0]), ["id", "title"])
+
+    def test_invalid_parameters_are_rejected(self):
+        self.create_tasks(1)
+        for params in ({"fields": "secret"}, {"cursor": "bogus"}, {"page_size": 0}):
+            response = self.client.get(self.url(**params))
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_deleted_tasks_are_hidden(self):
+        self.create_tasks(2, deleted=True)
+        response = self.client.get(self.url())
+        self.assertIn("msg", response.data)
+
+
+class ProjectPermissionTests(APITestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.member = User.objects.create_user(username="member", password="secret")
+        self.membership = ProjectMember.objects.create(
+            project=self.project, user=self.member, can_create=True
+        )
+        self.member_client = self.client_for(self.member)
+
+    def request_for(self, user):
+        request = type("Request", (), {})()
+        request.user = user
+        return request
+
+    def test_access_is_resolved_in_one_query_and_cached(self):
+        with self.assertNumQueries(1):
+            access = get_project_access(self.request_for(self.member), self.project.id)
+        self.assertTrue(access.allows("can_create"))
+        self.assertFalse(access.allows("can_delete"))
+        with self.assertNumQueries(0):
+            get_project_access(self.request_for(self.member), self.project.id)
+
+    def test_member_update_invalidates_cache(self):
+        tasks_url = f"/api/projects/{self.project.id}/tasks/"
+        payload = {"title": "T", "description": "D", "due_date": "2024-01-01"}
+        self.assertEqual(
+            self.member_client.post(tasks_url, payload, format="json").status_code, 201
+        )
+
+        self.membership.can_create = False
+        self.membership.save()
+        self.assertEqual(
+            self.member_client.post(tasks_url, payload, format="json").status_code, 403
+        )
+
+    def test_deleted_member_loses_access(self):
+        self.membership.deleted = True
+        self.membership.save()
+        response = self.member_client.get(f"/api/projects/{self.project.id}/tasks/")
+        self.assertEqual(response.status_code, 403)
+
+    def test_deletes_are_authorized_against_the_database(self):
+        self.membership.can_delete = True
+        self.membership.save()
+        task = self.create_tasks(1)[0]
+        tasks_url = f"/api/projects/{self.project.id}/tasks/"
+        self.assertEqual(self.member_client.get(tasks_url).status_code, 200)
+
+        # Revoked by another process: no signal reaches this one's cache.
+        ProjectMember.objects.filter(id=self.membership.id).update(deleted=True)
+        self.assertEqual(self.member_client.get(tasks_url).status_code, 200)
+        response = self.member_client.delete(f"{tasks_url}{task.id}/")
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Task.objects.get(id=task.id).deleted)
+
+    def test_project_invalidation_drops_every_cached_entry(self):
+        request = self.request_for(self.member)
+        get_project_access(request, self.project.id)
+        get_project_access(self.request_for(self.owner), self.project.id)
+        invalidate_project_access(self.project.id)
+        with self.assertNumQueries(1):
+            get_project_access(self.request_for(self.member), self.project.id)
+        with self.assertNumQueries(1):
+            get_project_access(self.request_for(self.owner), self.project.id)
+
+    def test_outsider_is_denied(self):
+        outsider = User.objects.create_user(username="outsider", password="secret")
+        response = self.client_for(outsider).get(
+            f"/api/projects/{self.project.id}/tasks/"
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class StatelessAuthenticationTests(APITestMixin, TestCase):
+    def test_claims_authenticate_without_user_query(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(f"/api/projects/{self.project.id}/tasks/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_non_claim_attributes_load_user_once(self):
+        principal = TokenUser(
+            {"id": self.owner.id, "username": "owner", "is_active": True}
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(principal.email, self.owner.email)
+            self.assertTrue(principal.check_password("secret"))
+        self.assertEqual(principal, self.owner)
+
+    def test_user_cache_is_invalidated_on_save(self):
+        def email():
+            payload = {"id": self.owner.id, "username": "owner", "is_active": True}
+            return TokenUser(payload).email
+
+        email()
+        self.owner.email = "owner@example.com"
+        self.owner.save()
+        self.assertEqual(email(), "owner@example.com")
+
+    def test_inactive_snapshot_is_rejected(self):
+        client = self.client_for(self.owner, is_active=False)
+        response = client.get(f"/api/projects/{self.project.id}/tasks/")
+        self.assertEqual(response.status_code, 403)
+
+    def test_owner_checks_work_with_token_principal(self):
+        response = self.client.put(
+            f"/api/projects/{self.project.id}/", {"name": "Gemini"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(JWT_STATELESS_AUTH=False)
+    def test_stateful_mode_loads_user(self):
+        with self.assertNumQueries(4):
+            self.client.get(f"/api/projects/{self.project.id}/tasks/")
+
+
+class TokenRefreshTests(APITestMixin, TestCase):
+    def login(self, password="secret"):
+        return APIClient().post(
+            "/api/auth/login/",
+            {"username": "owner", "password": password},
+            format="json",
+        )
+
+    def refresh(self, token):
+        return APIClient().post("/api/auth/refresh/", {"refresh": token}, format="json")
+
+    def test_login_issues_short_lived_access_and_refresh_tokens(self):
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data["expires_in"], settings.JWT_ACCESS_TOKEN_LIFETIME
+        )
+        access = jwt.decode(
+            response.data["token"], settings.SECRET_KEY, algorithms=["HS256"]
+        )
+        self.assertEqual(access["type"], "access")
+        self.assertEqual(
+            access["exp"] - access["iat"], settings.JWT_ACCESS_TOKEN_LIFETIME
+        )
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['token']}")
+        self.assertEqual(client.get("/api/projects/").status_code, 200)
+
+    def test_refresh_token_is_not_an_access_token(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.login().data['refresh']}")
+        self.assertEqual(client.get("/api/projects/").status_code, 403)
+
+    def test_refresh_rotates_without_hashing(self):
+        token = self.login().data["refresh"]
+        with mock.patch("django.contrib.auth.hashers.check_password") as check:
+            response = self.refresh(token)
+        check.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data["refresh"], token)
+        self.assertEqual(self.refresh(response.data["refresh"]).status_code, 200)
+
+    def test_refresh_token_is_single_use(self):
+        token = self.login().data["refresh"]
+        self.assertEqual(self.refresh(token).status_code, 200)
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data["error"], "Refresh token has been revoked")
+
+    def test_logout_revokes_refresh_token(self):
+        token = self.login().data["refresh"]
+        response = APIClient().post("/api/auth/logout/", {"refresh": token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_refresh_rejects_inactive_users_and_bad_tokens(self):
+        token = self.login().data["refresh"]
+        self.assertEqual(self.refresh(self.login().data["token"]).status_code, 401)
+        self.assertEqual(self.refresh("nonsense").status_code, 401)
+        User.objects.filter(id=self.owner.id).update(is_active=False)
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    @override_settings(JWT_REVOCATION_PRUNE_RATE=1)
+    def test_expired_revocations_are_pruned(self):
+        RevokedToken.objects.create(
+            jti="stale", expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.refresh(self.login().data["refresh"])
+        self.assertFalse(RevokedToken.objects.filter(jti="stale").exists())
+        self.assertEqual(RevokedToken.objects.count(), 1)
+
+    @override_settings(
+        PASSWORD_HASHERS=[
+            "userapi.hashers.TunedScryptPasswordHasher",
+            "userapi.hashers.TunedPBKDF2PasswordHasher",
+        ],
+        SCRYPT_WORK_FACTOR=2**10,
+    )
+    def test_login_rehashes_with_preferred_hasher(self):
+        self.assertTrue(self.owner.password.startswith("pbkdf2_sha256$"))
+        self.assertEqual(self.login().status_code, 200)
+        self.owner.refresh_from_db()
+        self.assertTrue(self.owner.password.startswith("scrypt$1024$"))
+
+        with override_settings(SCRYPT_WORK_FACTOR=2**11):
+            self.assertEqual(self.login().status_code, 200)
+        self.owner.refresh_from_db()
+        self.assertTrue(self.owner.password.startswith("scrypt$2048$"))
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN output is SQLite's")
+class HotQueryIndexTests(TestCase):
+    def assertUsesIndex(self, queryset, index=None):
+        plan = queryset.explain()
+        self.assertNotRegex(plan, r"\bSCAN\b", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+        if index:
+            self.assertIn(f"USING INDEX {index}", plan)
+
+    def test_project_list(self):
+        self.assertUsesIndex(
+            Project.objects.filter(deleted=False, owner=1), "project_owner_live_idx"
+        )
+
+    def test_task_page(self):
+        tasks = Task.objects.filter(deleted=False, project=1).order_by("due_date", "id")
+        self.assertUsesIndex(tasks[:101], "task_project_live_due_idx")
+        after = Q(due_date__gt="2024-01-01") | Q(due_date="2024-01-01", id__gt=1)
+        self.assertUsesIndex(tasks.filter(after)[:101], "task_project_live_due_idx")
+
+    def test_task_summary(self):
+        summary = (
+            Task.objects.filter(deleted=False, project=1)
+            .values("status")
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+        self.assertUsesIndex(summary, "task_project_live_status_idx")
+
+    def test_task_changes(self):
+        tasks = Task.objects.filter(project=1).order_by("updated_at", "id")
+        after = Q(updated_at__gt="2024-01-01T00:00:00Z") | Q(
+            updated_at="2024-01-01T00:00:00Z", id__gt=1
+        )
+        self.assertUsesIndex(tasks.filter(after)[:101], "task_project_updated_idx")
+
+    def test_my_tasks(self):
+        self.assertUsesIndex(
+            Task.objects.filter(deleted=False, project__in=accessible_projects(1))
+        )
+
+    def test_member_list(self):
+        self.assertUsesIndex(
+            ProjectMember.objects.filter(deleted=False, project=1),
+            "member_project_live_idx",
+        )
+
+    def test_permission_lookup(self):
+        # The query get_project_access runs on a cache miss.
+        query = project_access_query(1, 1)[:1]
+        self.assertUsesIndex(query)
+        self.assertRegex(
+            query.explain(),
+            r"SEARCH membership USING INDEX \w+ \(project_id=\? AND user_id=\?\)",
+        )
+
+
+class TaskBulkTests(APITestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = f"/api/projects/{self.project.id}/tasks/bulk/"
+
+    def item(self, index=0, **kwargs):
+        return {
+            "title": f"Bulk {index}",
+            "description": "Imported",
+            "due_date": "2024-02-01",
+            **kwargs,
+        }
+
+    def test_create_update_delete_in_one_batch(self):
+        existing, doomed = self.create_tasks(2)
+        payload = {
+            "create": [self.item(index) for index in range(3)],
+            "update": [{"id": existing.id, "status": "Done"}],
+            "delete": [doomed.id],
+        }
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(len(response.data["data"]["created"]), 3)
+        self.assertEqual(Task.objects.filter(deleted=False).count(), 4)
+        existing.refresh_from_db()
+        doomed.refresh_from_db()
+        self.assertEqual(existing.status, "Done")
+        self.assertTrue(doomed.deleted)
+        self.assertEqual(
+            Task.objects.filter(created_by=self.owner, project=self.project).count(), 5
+        )
+
+    def test_errors_are_reported_per_item_and_nothing_is_written(self):
+        payload = {
+            "create": [self.item(0), self.item(1, status="Later")],
+            "update": [{"id": 999, "title": "Missing"}],
+            "delete": ["nope"],
+        }
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        errors = response.data["error"]
+        self.assertEqual(errors["create"][0], {})
+        self.assertIn("status", errors["create"][1])
+        self.assertIn("id", errors["update"][0])
+        self.assertIn("id", errors["delete"][0])
+        self.assertFalse(Task.objects.exists())
+
+    def test_each_operation_needs_its_capability(self):
+        member = User.objects.create_user(username="member", password="secret")
+        ProjectMember.objects.create(project=self.project, user=member, can_create=True)
+        client = self.client_for(member)
+        payload = {"create": [self.item()]}
+        self.assertEqual(client.post(self.url, payload, format="json").status_code, 200)
+        payload["delete"] = [self.create_tasks(1)[0].id]
+        self.assertEqual(client.post(self.url, payload, format="json").status_code, 403)
+
+    def test_batch_uses_constant_queries(self):
+        payload = {"create": [self.item(index) for index in range(50)]}
+        with self.assertNumQueries(6):
+            self.client.post(self.url, payload, format="json")
+
+
+class MyTaskTests(APITestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.other = User.objects.create_user(username="other", password="secret")
+        self.shared = Project.objects.create(
+            name="Gemini", description="Orbit", owner=self.other
+        )
+        self.hidden = Project.objects.create(
+            name="Mercury", description="Solo", owner=self.other
+        )
+        ProjectMember.objects.create(project=self.shared, user=self.owner)
+
+    def test_lists_tasks_of_owned_and_member_projects(self):
+        own = self.create_tasks(2)
+        shared = self.create_tasks(1, project=self.shared)
+        self.create_tasks(1, project=self.hidden)
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/tasks/mine/?ordering=id")
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            [task["id"] for task in response.data["data"]],
+            [task.id for task in own + shared],
+        )
+        self.assertEqual(response.data["data"][-1]["project_name"], "Gemini")
+
+    def test_excludes_removed_members_and_deleted_projects(self):
+        self.create_tasks(1, project=self.shared)
+        ProjectMember.objects.filter(project=self.shared).update(deleted=True)
+        self.project.deleted = True
+        self.project.save()
+        self.create_tasks(1)
+        response = self.client.get("/api/tasks/mine/")
+        self.assertEqual(response.data["data"], [])
+
+    def test_filters_and_paginates(self):
+        self.create_tasks(3, status="Done")
+        self.create_tasks(3, project=self.shared, status="Done")
+        self.create_tasks(2, project=self.shared)
+        url = "/api/tasks/mine/?status=Done&page_size=4"
+        first = self.client.get(url).data
+        second = self.client.get(f"{url}&cursor={first['next_cursor']}").data
+        self.assertEqual(len(first["data"]), 4)
+        self.assertEqual(len(second["data"]), 2)
+        self.assertIsNone(second["next_cursor"])
+        self.assertTrue(
+            all(task["status"] == "Done" for task in first["data"] + second["data"])
+        )
+
+    def test_rejects_invalid_filters(self):
+        response = self.client.get("/api/tasks/mine/?due_date_after=soon")
+        self.assertEqual(response.status_code, 400)
+
+
+class TaskSearchTests(APITestMixin, TestCase):
+    url = "/api/tasks/search/"
+
+    def setUp(self):
+        super().setUp()
+        self.other = User.objects.create_user(username="other", password="secret")
+        self.hidden = Project.objects.create(
+            name="Mercury", description="Solo", owner=self.other
+        )
+
+    def task(self, title, description="", project=None, **kwargs):
+        return Task.objects.create(
+            project=project or self.project,
+            title=title,
+            description=description,
+            due_date=date(2024, 1, 1),
+            created_by=self.owner,
+            **kwargs,
+        )
+
+    def search(self, query, **params):
+        response = self.client.get(self.url, {"q": query, **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response
+
+    def titles(self, query, **params):
+        return [task["title"] for task in self.search(query, **params).data["data"]]
+
+    def test_ranks_title_matches_first_and_requires_every_term(self):
+        self.task("Notes", "Rocket engine checklist")
+        self.task("Rocket engines", "Checklist")
+        self.task("Rocket fuel")
+        self.assertEqual(self.titles("rocket engine"), ["Rocket engines", "Notes"])
+
+    def test_only_searches_accessible_projects(self):
+        self.task("Launch window")
+        self.task("Launch codes", project=self.hidden)
+        self.assertEqual(self.titles("launch"), ["Launch window"])
+        ProjectMember.objects.create(project=self.hidden, user=self.owner)
+        self.assertEqual(
+            sorted(self.titles("launch")), ["Launch codes", "Launch window"]
+        )
+        self.assertEqual(
+            self.titles("launch", project=self.hidden.id), ["Launch codes"]
+        )
+
+    def test_index_follows_saves_and_soft_deletes(self):
+        task = self.task("Telemetry review")
+        task.title = "Trajectory review"
+        task.save()
+        self.assertEqual(self.titles("telemetry"), [])
+        self.assertEqual(self.titles("trajectory"), ["Trajectory review"])
+
+        response = self.client.delete(
+            f"/api/projects/{self.project.id}/tasks/{task.id}/"
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.titles("trajectory"), [])
+        task.delete()
+        self.assertEqual(self.titles("review"), [])
+
+    def test_bulk_operations_update_index(self):
+        task = self.task("Heat shield")
+        new_task = {
+            "title": "Parachute test",
+            "description": "Drop",
+            "due_date": "2024-01-01",
+        }
+        response = self.client.post(
+            f"/api/projects/{self.project.id}/tasks/bulk/",
+            {"create": [new_task], "delete": [task.id]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.titles("parachute"), ["Parachute test"])
+        self.assertEqual(self.titles("shield"), [])
+
+    def test_paginates_with_cursor_bound_to_query(self):
+        for index in range(5):
+            self.task(f"Checklist {index}")
+        first = self.search("checklist", page_size=3).data
+        self.assertEqual(len(first["data"]), 3)
+        second = self.search("checklist", page_size=3, cursor=first["next_cursor"])
+        self.assertIsNone(second.data["next_cursor"])
+        ids = [task["id"] for task in first["data"] + second.data["data"]]
+        self.assertEqual(len(set(ids)), 5)
+
+        response = self.client.get(
+            self.url, {"q": "other", "cursor": first["next_cursor"]}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(TASK_SEARCH_RANK_WINDOW=2)
+    def test_ranks_only_the_newest_matches(self):
+        self.task("Audit", "Audit audit")
+        self.task("Other", "Audit")
+        self.task("Audit", "Hidden", project=self.hidden)
+        self.task("Another", "Audit")
+        self.assertEqual(self.titles("audit"), ["Other", "Another"])
+        with override_settings(TASK_SEARCH_RANK_WINDOW=0):
+            self.assertEqual(self.titles("audit"), ["Audit", "Other", "Another"])
+
+    @override_settings(TASK_SEARCH_RANK_WINDOW=3)
+    def test_inaccessible_matches_do_not_fill_the_window(self):
+        self.task("Audit", "Audit audit")
+        self.task("Other", "Audit")
+        for _ in range(3):
+            self.task("Audit", "Hidden", project=self.hidden)
+        self.task("Another", "Audit")
+        self.assertEqual(self.titles("audit"), ["Audit", "Other", "Another"])
+
+    def test_other_databases_can_write_but_not_search(self):
+        unsupported = UnsupportedTaskSearch("oracle")
+        with mock.patch("userapi.search.get_task_search", return_value=unsupported):
+            task = self.task("Audit")
+            task.title = "Review"
+            task.save()
+            response = self.client.get(self.url, {"q": "review"})
+        self.assertEqual(response.status_code, 501)
+        self.assertIn("oracle", response.data["error"])
+
+    def test_free_text_is_not_query_syntax(self):
+        self.task("Stage one (booster)")
+        self.assertEqual(self.titles('booster" OR NEAR(*'), [])
+        self.assertEqual(self.titles('"booster" -- stage'), ["Stage one (booster)"])
+        self.assertEqual(self.client.get(self.url, {"q": "  !? "}).status_code, 400)
+
+
+class JobTests(APITestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.files = tempfile.TemporaryDirectory()
+        self.addCleanup(self.files.cleanup)
+        settings_override = override_settings(JOB_FILES_ROOT=self.files.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.base = f"/api/projects/{self.project.id}"
+
+    def run_jobs(self):
+        call_command("worker", burst=True, stdout=StringIO())
+
+    def job(self, response):
+        self.assertEqual(response.status_code, 202, response.data)
+        self.run_jobs()
+        response = self.client.get(response["Location"])
+        self.assertEqual(response.status_code, 200)
+        return response.data["data"]
+
+    def test_project_delete_cascades_in_the_background(self):
+        self.create_tasks(5)
+        member = User.objects.create_user(username="member")
+        ProjectMember.objects.create(project=self.project, user=member)
+
+        response = self.client.delete(f"{self.base}/")
+        self.assertEqual(response.data["data"]["status"], Job.QUEUED)
+        self.assertTrue(Project.objects.get(id=self.project.id).deleted)
+        self.assertEqual(Task.objects.filter(deleted=False).count(), 5)
+
+        job = self.job(response)
+        self.assertEqual(job["status"], Job.SUCCEEDED)
+        self.assertEqual(job["result"], {"tasks": 5, "members": 1})
+        self.assertEqual(job["progress"], job["total"])
+        self.assertFalse(Task.objects.filter(deleted=False).exists())
+        self.assertFalse(ProjectMember.objects.filter(deleted=False).exists())
+
+    def test_import_reports_rejected_rows(self):
+        task = {"title": "T", "description": "D", "due_date": "2024-01-01"}
+        rows = [task, {"title": "No due date"}, "not an object", task]
+        with override_settings(TASK_IMPORT_BATCH_SIZE=2):
+            job = self.job(
+                self.client.post(
+                    f"{self.base}/tasks/import/", {"tasks": rows}, format="json"
+                )
+            )
+        self.assertEqual(job["status"], Job.SUCCEEDED)
+        self.assertEqual(job["result"]["created"], 2)
+        self.assertEqual(job["result"]["failed"], 2)
+        self.assertEqual([e["row"] for e in job["result"]["errors"]], [2, 3])
+        self.assertEqual(Task.objects.filter(project=self.project).count(), 2)
+
+        response = self.client.post(f"{self.base}/tasks/import/", {"tasks": []})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(f"{self.base}/tasks/import/", [task], format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("error", response.data)
+
+    def test_job_writes_reach_caches_of_other_processes(self):
+        self.create_tasks(2)
+        url = f"{self.base}/tasks/"
+        self.assertEqual(len(self.client.get(url).data["data"]), 2)
+        task = {"title": "T", "description": "D", "due_date": "2024-01-01"}
+        # The worker's invalidations only reach its own cache, as if it ran
+        # in a separate process.
+        with mock.patch("userapi.jobs.invalidate_project"), mock.patch(
+            "userapi.imports.invalidate_project"
+        ):
+            self.job(
+                self.client.post(
+                    f"{self.base}/tasks/import/", {"tasks": [task]}, format="json"
+                )
+            )
+        self.assertEqual(len(self.client.get(url).data["data"]), 3)
+
+    def test_export_and_download(self):
+        self.create_tasks(3)
+        job = self.job(self.client.post(f"{self.base}/export/"))
+        self.assertEqual(job["result"]["rows"], 3)
+
+        response = self.client.get(f"/api/jobs/{job['id']}/download/")
+        self.assertEqual(response.status_code, 200)
+        content = b"".join(response.streaming_content)
+        rows = [json.loads(line) for line in content.splitlines()]
+        response.close()
+        self.assertEqual([row["title"] for row in rows], ["Task 0", "Task 1", "Task 2"])
+
+        Path(self.files.name, job["result"]["file"]).unlink()
+        response = self.client.get(f"/api/jobs/{job['id']}/download/")
+        self.assertEqual(response.status_code, 410)
+
+    def test_old_job_files_are_deleted(self):
+        self.create_tasks(1)
+        job = self.job(self.client.post(f"{self.base}/export/"))
+        enqueue(
+            "tasks.import",
+            self.owner.id,
+            self.project.id,
+            file="upload-queued.csv",
+            input="csv",
+        )
+        root = Path(self.files.name)
+        (root / "upload-queued.csv").write_bytes(b"")
+        (root / "upload-orphan.csv").write_bytes(b"")
+        delete_expired_job_files()
+        self.assertEqual(len(list(root.iterdir())), 3)
+
+        expired = time.time() - settings.JOB_FILES_RETENTION - 1
+        for path in root.iterdir():
+            os.utime(path, (expired, expired))
+        delete_expired_job_files()
+        self.assertEqual([path.name for path in root.iterdir()], ["upload-queued.csv"])
+        response = self.client.get(f"/api/jobs/{job['id']}/download/")
+        self.assertEqual(response.status_code, 410)
+
+    def test_jobs_are_only_visible_to_their_creator(self):
+        job = enqueue("project.export", self.owner.id, self.project.id)
+        other = self.client_for(User.objects.create_user(username="other"))
+        self.assertEqual(other.get(f"/api/jobs/{job.id}/").status_code, 404)
+        self.assertEqual(other.get("/api/jobs/").data["data"], [])
+        self.assertEqual(
+            [job["id"] for job in self.client.get("/api/jobs/").data["data"]],
+            [job.id],
+        )
+
+    @override_settings(JOB_RETRY_DELAY=0)
+    def test_failed_and_stale_jobs_are_retried(self):
+        job = enqueue("project.export", self.owner.id, self.project.id)
+        failing = mock.patch(
+            "userapi.jobs.report_progress", side_effect=OSError("full")
+        )
+        with failing, self.assertLogs("userapi.jobs", "ERROR"):
+            run_job(claim_job("a"))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.error), (Job.QUEUED, 1, "full"))
+
+        # A worker that dies mid-job loses its lease.
+        claim_job("b")
+        Job.objects.filter(id=job.id).update(
+            heartbeat_at=timezone.now() - timedelta(hours=1)
+        )
+        requeue_stale_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 2))
+
+        self.run_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.SUCCEEDED, 3))
+
+    def test_jobs_that_lost_their_lease_leave_the_new_run_alone(self):
+        enqueue("project.export", self.owner.id, self.project.id)
+        job = claim_job("a")
+        Job.objects.filter(id=job.id).update(
+            heartbeat_at=timezone.now() - timedelta(hours=1)
+        )
+        requeue_stale_jobs()
+        claim_job("b")
+
+        with self.assertLogs("userapi.jobs", "WARNING"):
+            run_job(job)
+        handlers = {"project.export": (lambda job: {"rows": 0}, 3)}
+        with mock.patch.dict("userapi.jobs.HANDLERS", handlers):
+            run_job(job)
+        job.refresh_from_db()
+        self.assertEqual(
+            (job.status, job.worker, job.attempts, job.total, job.result),
+            (Job.RUNNING, "b", 2, None, None),
+        )
+
+
+class TaskExportTests(APITestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = f"/api/projects/{self.project.id}/tasks/export/"
+        self.tasks = self.create_tasks(5)
+
+    def export(self, url, **params):
+        headers = params.pop("headers", {})
+        response = self.client.get(url, params, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        content = b"".join(response.streaming_content)
+        response.close()
+        return response, content
+
+    def test_csv_matches_the_task_list(self):
+        response, content = self.export(self.url)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn("project-", response["Content-Disposition"])
+        rows = list(csv.DictReader(StringIO(content.decode())))
+        listed = self.client.get(f"/api/projects/{self.project.id}/tasks/").data
+        self.assertEqual(
+            rows,
+            [
+                {
+                    name: "" if value is None else str(value)
+                    for name, value in row.items()
+                }
+                for row in listed["data"]
+            ],
+        )
+
+    def test_ndjson_with_filters_and_fields(self):
+        Task.objects.filter(id=self.tasks[0].id).update(status="Done")
+        _, content = self.export(
+            self.url, output="ndjson", status="Done", fields="id,status"
+        )
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(rows, [{"id": self.tasks[0].id, "status": "Done"}])
+
+    @override_settings(TASK_EXPORT_CHUNK_SIZE=2)
+    def test_gzip_when_accepted(self):
+        with mock.patch("userapi.exports.EXPORT_CHUNK_BYTES", 1):
+            response, content = self.export(
+                self.url, output="ndjson", headers={"Accept-Encoding": "gzip, br"}
+            )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(len(gzip.decompress(content).splitlines()), 5)
+
+    def test_gzip_weights_are_respected(self):
+        for header, expected in [
+            ("gzip;q=0, br", False),
+            ("GZIP ; q=0.5", True),
+            ("xgzip, x-gzipped", False),
+            ("br, *", True),
+            ("*;q=0.1, gzip;q=0", False),
+            ("identity", False),
+        ]:
+            with self.subTest(header=header):
+                response, _ = self.export(self.url, headers={"Accept-Encoding": header})
+                self.assertEqual(response.has_header("Content-Encoding"), expected)
+
+    def test_my_tasks_across_accessible_projects(self):
+        other = User.objects.create_user(username="other")
+        shared = Project.objects.create(name="Gemini", description="", owner=other)
+        hidden = Project.objects.create(name="Mercury", description="", owner=other)
+        ProjectMember.objects.create(project=shared, user=self.owner)
+        self.create_tasks(2, project=shared)
+        self.create_tasks(3, project=hidden)
+
+        _, content = self.export("/api/tasks/mine/export/", output="ndjson")
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 7)
+        self.assertEqual({row["project_name"] for row in rows}, {"Apollo", "Gemini"})
+
+    def test_rejects_unknown_output_and_outsiders(self):
+        response = self.client.get(self.url, {"output": "xml"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("output", response.data["error"])
+        outsider = self.client_for(User.objects.create_user(username="outsider"))
+        self.assertEqual(outsider.get(self.url).status_code, 403)
+
+
+class TaskFileImportTests(APITestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        files = tempfile.TemporaryDirectory()
+        self.addCleanup(files.cleanup)
+        self.files = Path(files.name)
+        settings_override = override_settings(
+            JOB_FILES_ROOT=str(self.files / "jobs"), TASK_IMPORT_BATCH_SIZE=2
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.url = f"/api/projects/{self.project.id}/tasks/import/"
+
+    def upload(self, name, content, **params):
+        query = "".join(f"?{key}={value}" for key, value in params.items())
+        response = self.client.post(
+            self.url + query, {"file": SimpleUploadedFile(name, content)}
+        )
+        self.assertEqual(response.status_code, 202, response.data)
+        call_command("worker", burst=True, stdout=StringIO())
+        return Job.objects.get(id=response.data["data"]["id"])
+
+    def test_unreadable_csv_rows_are_rejected_one_by_one(self):
+        job = self.upload(
+            "tasks.csv",
+            b"\xef\xbb\xbftitle,description,due_date\n"
+            b"Launch,Countdown,2024-01-02\n"
+            b"Orbit,\xff\xfe,2024-01-03\n"
+            b'Landing,"' + b"x" * (csv.field_size_limit() + 1) + b'",2024-01-04\n'
+            b"Recovery,Ship,2024-01-05\n",
+        )
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual((job.result["created"], job.result["failed"]), (2, 2))
+        self.assertEqual([e["row"] for e in job.result["errors"]], [2, 3])
+        self.assertEqual(
+            sorted(Task.objects.filter(project=self.project).values_list("title")),
+            [("Launch",), ("Recovery",)],
+        )
+
+    def test_csv_upload_reports_rejected_rows(self):
+        job = self.upload(
+            "tasks.csv",
+            b"title,description,status,due_date\n"
+            b"Launch,Countdown,Done,2024-01-02\n"
+            b"Orbit,Burn,Sideways,2024-01-03\n"
+            b"Landing,Splash,,01/04/2024\n"
+            b"Recovery,Ship,,2024-01-05\n",
+        )
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual((job.result["created"], job.result["failed"]), (2, 2))
+        self.assertEqual(
+            {e["row"]: list(e["errors"]) for e in job.result["errors"]},
+            {2: ["status"], 3: ["due_date"]},
+        )
+        self.assertIn("rows_per_second", job.result)
+        self.assertEqual(
+            dict(Task.objects.values_list("title", "status")),
+            {"Launch": "Done", "Recovery": "To Do"},
+        )
+        # The upload is removed once it has been imported.
+        self.assertEqual(list((self.files / "jobs").iterdir()), [])
+
+    def test_ndjson_upload_with_invalid_lines(self):
+        job = self.upload(
+            "tasks.txt",
+            b'{"title": "A", "description": "B", "due_date": "2024-01-01"}\n'
+            b"\n"
+            b"{not json\n"
+            b"[1, 2]\n",
+            input="ndjson",
+        )
+        self.assertEqual((job.result["created"], job.result["failed"]), (1, 2))
+        self.assertEqual([e["row"] for e in job.result["errors"]], [2, 3])
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.post(
+            self.url, {"file": SimpleUploadedFile("tasks.xml", b"<tasks/>")}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("input", response.data["error"])
+        self.assertFalse(Job.objects.exists())
+
+    def test_command_imports_an_export(self):
+        self.create_tasks(3, status="Done")
+        Task.objects.update(description="Exported")
+        response = self.client.get(
+            f"/api/projects/{self.project.id}/tasks/export/",
+            headers={"Accept-Encoding": "identity"},
+        )
+        path = self.files / "export.csv"
+        path.write_bytes(b"".join(response.streaming_content))
+        response.close()
+        target = Project.objects.create(name="Gemini", description="", owner=self.owner)
+
+        out, err = StringIO(), StringIO()
+        call_command(
+            "import_tasks", str(path), project=target.id, stdout=out, stderr=err
+        )
+        result = json.loads(out.getvalue())
+        self.assertEqual((result["created"], result["failed"]), (3, 0))
+        self.assertIn("rows/s", err.getvalue())
+        self.assertEqual(
+            sorted(target.task_set.values_list("title", "status", "created_by")),
+            [(f"Task {index}", "Done", self.owner.id) for index in range(3)],
+        )
+
+        with self.assertRaisesMessage(CommandError, "--input"):
+            call_command("import_tasks", "tasks.xml", project=target.id)
+        with self.assertRaisesMessage(CommandError, "does not exist"):
+            call_command("import_tasks", str(path), project=target.id, user="nobody")
+
+
+@override_settings(TASK_SYNC_SETTLE_SECONDS=0)
+class TaskChangesTests(APITestMixin, TestCase):
+    def changes(self, **params):
+        url = f"/api/projects/{self.project.id}/tasks/changes/"
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_initial_sync_returns_live_tasks_and_watermark(self):
+        live, doomed = self.create_tasks(2)
+        doomed.deleted = True
+        doomed.save()
+        data = self.changes()
+        self.assertEqual([task["id"] for task in data["data"]], [live.id])
+        self.assertEqual(data["deleted"], [])
+        self.assertFalse(data["has_more"])
+        self.assertEqual(self.changes(since=data["watermark"])["data"], [])
+
+    def test_delta_contains_updates_and_tombstones(self):
+        unchanged, edited, doomed = self.create_tasks(3)
+        watermark = self.changes()["watermark"]
+        edited.status = "Done"
+        edited.save()
+        self.client.delete(f"/api/projects/{self.project.id}/tasks/{doomed.id}/")
+        data = self.changes(since=watermark)
+        self.assertEqual([task["id"] for task in data["data"]], [edited.id])
+        self.assertEqual(data["data"][0]["status"], "Done")
+        self.assertEqual(data["deleted"], [doomed.id])
+
+    def test_bulk_writes_advance_updated_at(self):
+        edited, doomed = self.create_tasks(2)
+        watermark = self.changes()["watermark"]
+        self.client.post(
+            f"/api/projects/{self.project.id}/tasks/bulk/",
+            {"update": [{"id": edited.id, "title": "Renamed"}], "delete": [doomed.id]},
+            format="json",
+        )
+        data = self.changes(since=watermark)
+        self.assertEqual([task["title"] for task in data["data"]], ["Renamed"])
+        self.assertEqual(data["deleted"], [doomed.id])
+
+    def test_tasks_cannot_leave_the_feed_of_their_project(self):
+        # A task moved out of a project would vanish from its feed without a
+        # tombstone, so updates cannot change the project.
+        task = self.create_tasks(1)[0]
+        other = Project.objects.create(name="Gemini", description="", owner=self.owner)
+        watermark = self.changes()["watermark"]
+        self.client.put(
+            f"/api/projects/{self.project.id}/tasks/{task.id}/",
+            {"project": other.id, "status": "Done"},
+            format="json",
+        )
+        data = self.changes(since=watermark)
+        self.assertEqual([row["status"] for row in data["data"]], ["Done"])
+        self.assertEqual(data["deleted"], [])
+
+    def test_pages_through_changes(self):
+        tasks = self.create_tasks(5)
+        seen, watermark, has_more = [], None, True
+        while has_more:
+            params = {"page_size": 2}
+            if watermark:
+                params["since"] = watermark
+            data = self.changes(**params)
+            seen += [task["id"] for task in data["data"]]
+            watermark, has_more = data["watermark"], data["has_more"]
+        self.assertEqual(seen, [task.id for task in tasks])
+
+    @override_settings(TASK_SYNC_SETTLE_SECONDS=60)
+    def test_watermark_trails_recent_writes(self):
+        task = self.create_tasks(1)[0]
+        data = self.changes(since=self.changes()["watermark"])
+        self.assertEqual([row["id"] for row in data["data"]], [task.id])
+
+    @override_settings(TASK_SYNC_SETTLE_SECONDS=60)
+    def test_every_page_holds_the_watermark_back(self):
+        tasks = self.create_tasks(3)
+        data = self.changes(page_size=2)
+        self.assertFalse(data["has_more"])
+        data = self.changes(page_size=2, since=data["watermark"])
+        self.assertEqual([row["id"] for row in data["data"]], [t.id for t in tasks[:2]])
+
+    def test_rejects_tampered_watermark(self):
+        url = f"/api/projects/{self.project.id}/tasks/changes/?since=bogus"
+        self.assertEqual(self.client.get(url).status_code, 400)
+
+
+class MemberBulkTests(APITestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = f"/api/projects/{self.project.id}/members/bulk/"
+        self.users = [
+            User.objects.create_user(username=f"user{index}", password="secret")
+            for index in range(4)
+        ]
+
+    def test_adds_updates_and_skips_in_one_batch(self):
+        unchanged, updated, restored, new = self.users
+        ProjectMember.objects.create(project=self.project, user=unchanged)
+        ProjectMember.objects.create(project=self.project, user=updated)
+        ProjectMember.objects.create(project=self.project, user=restored, deleted=True)
+        payload = {
+            "members": [
+                {"username": "user0"},
+                {"user": updated.id, "can_update": True},
+                {"username": "user2", "can_delete": True},
+                {"username": "user3", "can_create": True},
+                {"username": "nobody"},
+            ]
+        }
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            response.data["data"],
+            {"created": 1, "updated": 2, "skipped": 2, "not_found": ["nobody"]},
+        )
+        members = {
+            member.user_id: member
+            for member in ProjectMember.objects.filter(project=self.project)
+        }
+        self.assertTrue(members[updated.id].can_update)
+        self.assertFalse(members[restored.id].deleted)
+        self.assertTrue(members[restored.id].can_delete)
+        self.assertTrue(members[new.id].can_create)
+
+    def test_invalidates_permissions_and_list(self):
+        member = self.users[0]
+        ProjectMember.objects.create(project=self.project, user=member)
+        client = self.client_for(member)
+        tasks_url = f"/api/projects/{self.project.id}/tasks/"
+        task = {"title": "T", "description": "D", "due_date": "2024-01-01"}
+        self.assertEqual(client.post(tasks_url, task, format="json").status_code, 403)
+        members_url = f"/api/projects/{self.project.id}/members/"
+        etag = self.client.get(members_url)["ETag"]
+
+        payload = {"members": [{"user": member.id, "can_create": True}]}
+        self.client.post(self.url, payload, format="json")
+        self.assertEqual(client.post(tasks_url, task, format="json").status_code, 201)
+        self.assertNotEqual(self.client.get(members_url)["ETag"], etag)
+
+    def test_reports_item_errors(self):
+        payload = {"members": [{"username": "user0"}, {"can_create": True}]}
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["error"][0], {})
+        self.assertFalse(ProjectMember.objects.exists())
+
+    def test_requires_add_members(self):
+        client = self.client_for(self.users[0])
+        ProjectMember.objects.create(project=self.project, user=self.users[0])
+        payload = {"members": [{"username": "user1"}]}
+        self.assertEqual(client.post(self.url, payload, format="json").status_code, 403)
+
+
+class TaskFilterTests(APITestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = f"/api/projects/{self.project.id}/tasks/"
+        self.tasks = self.create_tasks(7)
+        Task.objects.filter(id__in=[task.id for task in self.tasks[:2]]).update(
+            status="Done"
+        )
+
+    def ids(self, response):
+        return [task["id"] for task in response.data["data"]]
+
+    def test_status_and_due_date_filters(self):
+        response = self.client.get(
+            self.url,
+            {"status": "To Do", "due_date_after": "2024-01-03"},
+        )
+        expected = [task.id for task in self.tasks[2:]]
+        self.assertEqual(self.ids(response), expected)
+
+        response = self.client.get(self.url, {"due_date_before": "2024-01-01"})
+        self.assertEqual(self.ids(response), [self.tasks[0].id])
+
+    def test_descending_ordering_paginates(self):
+        seen, params = [], {"ordering": "-due_date", "page_size": 3}
+        while True:
+            response = self.client.get(self.url, params)
+            seen.extend(self.ids(response))
+            if not response.data["next_cursor"]:
+                break
+            params["cursor"] = response.data["next_cursor"]
+        self.assertEqual(seen, [task.id for task in reversed(self.tasks)])
+
+    def test_cursor_is_bound_to_ordering(self):
+        response = self.client.get(self.url, {"page_size": 2})
+        cursor = response.data["next_cursor"]
+        response = self.client.get(self.url, {"cursor": cursor, "ordering": "-id"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_filters_are_rejected(self):
+        for params in (
+            {"status": "Blocked"},
+            {"due_date_after": "tomorrow"},
+            {"created_by": "me"},
+            {"ordering": "title"},
+        ):
+            self.assertEqual(self.client.get(self.url, params).status_code, 400)
+
+    def test_summary_counts_in_one_query(self):
+        url = f"/api/projects/{self.project.id}/tasks/summary/"
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        data = response.data["data"]
+        self.assertEqual(data["total"], 7)
+        self.assertEqual(data["by_status"]["Done"], {"count": 2, "overdue": 0})
+        self.assertEqual(data["by_status"]["To Do"], {"count": 5, "overdue": 5})
+        self.assertEqual(data["by_status"]["In Progress"]["count"], 0)
+        self.assertEqual(data["overdue"], 5)
+
+
+class ConditionalGetTests(APITestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_tasks(3)
+        self.tasks_url = f"/api/projects/{self.project.id}/tasks/"
+
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    @override_settings(RESPONSE_CACHE_ENABLED=False)
+    def test_unchanged_list_returns_304_after_version_lookup(self):
+        response = self.client.get(self.tasks_url)
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        with self.assertNumQueries(1):
+            cached = self.revalidate(self.tasks_url, response)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached["ETag"], response["ETag"])
+
+    def test_writes_change_the_etag(self):
+        urls = [
+            self.tasks_url,
+            f"/api/projects/{self.project.id}/members/",
+            f"/api/projects/{self.project.id}/tasks/summary/",
+        ]
+        responses = [self.client.get(url) for url in urls]
+        Task.objects.first().save()
+        for url, response in zip(urls, responses):
+            self.assertEqual(self.revalidate(url, response).status_code, 200, url)
+
+        response = self.client.get("/api/projects/")
+        self.project.save()
+        self.assertEqual(self.revalidate("/api/projects/", response).status_code, 200)
+
+    def test_member_and_project_writes_bump_version(self):
+        version = Project.objects.get().version
+        member = User.objects.create_user(username="member", password="secret")
+        ProjectMember.objects.create(project=self.project, user=member)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.version, version + 1)
+        self.project.description = "Mars"
+        self.project.save()
+        # The saved instance holds the new version, not an F() expression.
+        self.assertEqual(self.project.version, version + 2)
+        self.project.save()
+        self.assertEqual(Project.objects.get().version, version + 3)
+
+    def test_query_string_is_part_of_the_etag(self):
+        response = self.client.get(self.tasks_url)
+        other = self.client.get(self.tasks_url, {"status": "Done"})
+        self.assertNotEqual(response["ETag"], other["ETag"])
+
+
+class ResponseCacheTests(APITestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_tasks(3)
+        self.tasks_url = f"/api/projects/{self.project.id}/tasks/"
+
+    def test_hit_only_reads_the_version(self):
+        response = self.client.get(self.tasks_url)
+        with self.assertNumQueries(1):
+            cached = self.client.get(self.tasks_url)
+        self.assertEqual(cached.data, response.data)
+        self.assertEqual(cached["ETag"], response["ETag"])
+        self.assertEqual(cache_stats.as_dict()["hits"], 1)
+
+    def test_hits_are_revalidated_against_the_version(self):
+        # Writes made by another process reach the database but not this
+        # process's cache generations.
+        self.client.get(self.tasks_url)
+        Task.objects.filter(project=self.project).update(title="Elsewhere")
+        Project.objects.filter(id=self.project.id).update(version=F("version") + 1)
+        response = self.client.get(self.tasks_url)
+        self.assertEqual(
+            {task["title"] for task in response.data["data"]}, {"Elsewhere"}
+        )
+        self.assertEqual(cache_stats.as_dict()["hits"], 0)
+
+    def test_entries_are_per_user(self):
+        member = User.objects.create_user(username="member", password="secret")
+        ProjectMember.objects.create(project=self.project, user=member)
+        self.client.get(self.tasks_url)
+        self.client_for(member).get(self.tasks_url)
+        self.assertEqual(cache_stats.as_dict()["misses"], 2)
+
+    def test_writes_invalidate(self):
+        self.client.get(self.tasks_url)
+        self.client.post(
+            self.tasks_url,
+            {"title": "New", "description": "D", "due_date": "2024-03-01"},
+            format="json",
+        )
+        response = self.client.get(self.tasks_url)
+        self.assertEqual(len(response.data["data"]), 4)
+
+        self.client.post(
+            f"{self.tasks_url}bulk/",
+            {"delete": [response.data["data"][0]["id"]]},
+            format="json",
+        )
+        response = self.client.get(self.tasks_url)
+        self.assertEqual(len(response.data["data"]), 3)
+
+        self.client.get("/api/projects/")
+        self.client.put(
+            f"/api/projects/{self.project.id}/", {"name": "Gemini"}, format="json"
+        )
+        response = self.client.get("/api/projects/")
+        self.assertEqual(response.data["data"][0]["name"], "Gemini")
+
+    def test_moving_a_task_refreshes_both_projects(self):
+        other = Project.objects.create(name="Gemini", description="", owner=self.owner)
+        other_url = f"/api/projects/{other.id}/tasks/"
+        before = self.client.get(self.tasks_url)
+        self.client.get(other_url)
+        task = Task.objects.get(id=before.data["data"][0]["id"])
+        task.project = other
+        task.save()
+
+        response = self.client.get(
+            self.tasks_url, headers={"If-None-Match": before["ETag"]}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(task.id, [row["id"] for row in response.data["data"]])
+        response = self.client.get(self.tasks_url)
+        self.assertNotIn(task.id, [row["id"] for row in response.data["data"]])
+        response = self.client.get(other_url)
+        self.assertEqual([row["id"] for row in response.data["data"]], [task.id])
+
+    def test_stats_require_staff(self):
+        self.assertEqual(self.client.get("/api/cache/stats/").status_code, 403)
+        self.owner.is_staff = True
+        self.owner.save()
+        response = self.client.get("/api/cache/stats/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("hit_ratio", response.data["data"])
+
+
+class ValuesSerializerParityTests(APITestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        member = User.objects.create_user(username="mémber", password="secret")
+        ProjectMember.objects.create(
+            project=self.project, user=member, can_update=True, add_members=True
+        )
+        Project.objects.create(name="Ünïcode ✓", description="", owner=self.owner)
+        self.create_tasks(5)
+        Task.objects.create(
+            title='Quotes "and" \\ slashes',
+            description="Line\nbreak",
+            status="In Progress",
+            due_date=date(2030, 12, 31),
+            created_by=self.owner,
+        )
+
+    def assertRendersIdentically(self, serializer_class, values_class, queryset):
+        renderer = JSONRenderer()
+        expected = renderer.render(serializer_class(queryset, many=True).data)
+        actual = renderer.render(values_class().serialize_queryset(queryset))
+        self.assertEqual(actual, expected)
+
+    def test_projects(self):
+        self.assertRendersIdentically(
+            ProjectSerializer, ProjectValuesSerializer, Project.objects.all()
+        )
+
+    def test_members(self):
+        self.assertRendersIdentically(
+            ProjectMemberSerializer,
+            ProjectMemberValuesSerializer,
+            ProjectMember.objects.all(),
+        )
+
+    def test_tasks(self):
+        self.assertRendersIdentically(
+            TaskSerializer, TaskValuesSerializer, Task.objects.all()
+        )
+
+    def test_task_field_subset(self):
+        fields = ["due_date", "title"]
+        renderer = JSONRenderer()
+        expected = renderer.render(
+            TaskSerializer(Task.objects.all(), many=True, fields=fields).data
+        )
+        actual = renderer.render(
+            TaskValuesSerializer(fields=fields).serialize_queryset(Task.objects.all())
+        )
+        self.assertEqual(actual, expected)
+
+
+class FastJSONTests(TestCase):
+    payload = {
+        "data": [
+            {
+                "id": 1,
+                "title": "Ünïcode \u2028 separators \u2029",
+                "due_date": date(2024, 1, 1),
+                "created": timezone.now(),
+                "ratio": Decimal("1.50"),
+                "nothing": None,
+                "flag": True,
+            }
+        ],
+        "next_cursor": None,
+        3: "non-string key",
+    }
+
+    def test_renders_like_drf(self):
+        self.assertEqual(
+            FastJSONRenderer().render(self.payload),
+            JSONRenderer().render(self.payload),
+        )
+
+    def test_falls_back_without_orjson(self):
+        with mock.patch("userapi.renderers.orjson", None):
+            rendered = FastJSONRenderer().render(self.payload)
+            parsed = FastJSONParser().parse(BytesIO(b'{"a": [1, 2]}'))
+        self.assertEqual(rendered, JSONRenderer().render(self.payload))
+        self.assertEqual(parsed, {"a": [1, 2]})
+
+    def test_parser_reports_malformed_json(self):
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{"a": '))
+
+
+class AsyncViewTests(APITestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.factory = AsyncRequestFactory()
+        self.token = self.client._credentials["HTTP_AUTHORIZATION"]
+
+    async def call(self, view, method, path, data=None, **kwargs):
+        request = getattr(self.factory, method)(
+            path,
+            data=json.dumps(data) if data is not None else None,
+            content_type="application/json",
+            headers={"Authorization": self.token},
+        )
+        response = await view.as_view()(request, **kwargs)
+        body = json.loads(response.content) if response.content else None
+        return response, body
+
+    async def test_task_list_matches_sync_view(self):
+        await sync_to_async(self.create_tasks)(3)
+        path = f"/api/projects/{self.project.id}/tasks/?page_size=2"
+        response, body = await self.call(
+            AsyncTaskAPIView, "get", path, project_id=self.project.id
+        )
+        expected = await sync_to_async(self.client.get)(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, json.loads(expected.content))
+        self.assertEqual(response["ETag"], expected["ETag"])
+
+    async def test_task_crud(self):
+        path = f"/api/projects/{self.project.id}/tasks/"
+        payload = {"title": "Async", "description": "D", "due_date": "2024-05-01"}
+        response, body = await self.call(
+            AsyncTaskAPIView, "post", path, payload, project_id=self.project.id
+        )
+        self.assertEqual(response.status_code, 201, body)
+        task_id = body["data"]["id"]
+        self.assertEqual(body["data"]["created_by"], self.owner.id)
+
+        response, body = await self.call(
+            AsyncTaskAPIView,
+            "put",
+            f"{path}{task_id}/",
+            {"status": "Done"},
+            project_id=self.project.id,
+            pk=task_id,
+        )
+        self.assertEqual(body["data"]["status"], "Done")
+
+        response, _ = await self.call(
+            AsyncTaskAPIView,
+            "delete",
+            f"{path}{task_id}/",
+            project_id=self.project.id,
+            pk=task_id,
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertTrue((await Task.objects.aget(id=task_id)).deleted)
+
+    async def test_task_update_matches_sync_view(self):
+        tasks = await sync_to_async(self.create_tasks)(2)
+        stranger = await sync_to_async(User.objects.create_user)(username="stranger")
+        other = await Project.objects.acreate(name="Other", owner=stranger)
+        payload = {
+            "title": "Renamed",
+            "due_date": "2024-06-01",
+            "project": other.id,
+            "created_by": stranger.id,
+        }
+        path = f"/api/projects/{self.project.id}/tasks/"
+        response, body = await self.call(
+            AsyncTaskAPIView,
+            "put",
+            f"{path}{tasks[0].id}/",
+            payload,
+            project_id=self.project.id,
+            pk=tasks[0].id,
+        )
+        expected = await sync_to_async(self.client.put)(
+            f"{path}{tasks[1].id}/", payload, format="json"
+        )
+        self.assertEqual(response.status_code, expected.status_code)
+        expected = json.loads(expected.content)
+        for data in (body["data"], expected["data"]):
+            del data["id"], data["created_at"], data["updated_at"]
+        self.assertEqual(body, expected)
+
+        # Tasks never move out of their project or change their creator.
+        self.assertEqual(body["data"]["title"], "Renamed")
+        self.assertEqual(body["data"]["project"], self.project.id)
+        self.assertEqual(body["data"]["created_by"], self.owner.id)
+        self.assertEqual(await Task.objects.filter(project=self.project).acount(), 2)
+
+    async def test_permissions_and_authentication(self):
+        self.token = "Bearer nonsense"
+        response, _ = await self.call(AsyncProjectAPIView, "get", "/api/projects/")
+        self.assertEqual(response.status_code, 403)
+
+        outsider = await sync_to_async(User.objects.create_user)(
+            username="outsider", password="secret"
+        )
+        self.token = self.client_for(outsider)._credentials["HTTP_AUTHORIZATION"]
+        response, _ = await self.call(
+            AsyncProjectMemberAPIView,
+            "get",
+            f"/api/projects/{self.project.id}/members/",
+            project_id=self.project.id,
+        )
+        self.assertEqual(response.status_code, 403)
+
+    async def test_project_list_and_conditional_get(self):
+        response, body = await self.call(AsyncProjectAPIView, "get", "/api/projects/")
+        self.assertEqual(body["data"][0]["name"], "Apollo")
+        request = self.factory.get(
+            "/api/projects/",
+            headers={"Authorization": self.token, "If-None-Match": response["ETag"]},
+        )
+        response = await AsyncProjectAPIView.as_view()(request)
+        self.assertEqual(response.status_code, 304)
+
+
+class TaskEventTests(APITestMixin, TestCase):
+    async def collect(self, broker, count, last_event_id=None):
+        events = []
+        async for event in broker.subscribe(1, last_event_id, heartbeat=0.01):
+            if event is not None:
+                events.append(event)
+            if len(events) == count:
+                break
+        return events
+
+    async def follow(self, broker, project_id, last_event_id=None):
+        subscription = broker.subscribe(project_id, last_event_id, heartbeat=0.01)
+        event = await anext(subscription)
+        await subscription.aclose()
+        return event
+
+    async def test_resume_after_last_event_id(self):
+        broker = InMemoryBroker(history=10)
+        await self.follow(broker, 1)
+        first = broker.publish(1, "task.created", {"id": 1})
+        broker.publish(1, "task.updated", {"id": 1})
+        broker.publish(2, "task.created", {"id": 2})
+        events = await self.collect(broker, 1, first.id)
+        self.assertEqual([event.type for event in events], ["task.updated"])
+
+    async def test_live_events_are_delivered(self):
+        broker = InMemoryBroker()
+        subscription = asyncio.ensure_future(self.collect(broker, 1))
+        await asyncio.sleep(0.02)
+        broker.publish(1, "task.deleted", {"id": 3})
+        events = await asyncio.wait_for(subscription, 1)
+        self.assertEqual(events[0].data, {"id": 3})
+
+    async def test_unknown_or_evicted_ids_reset(self):
+        broker = InMemoryBroker(history=2)
+        await self.follow(broker, 1)
+        first = broker.publish(1, "task.created", {"id": 1})
+        for _ in range(3):
+            broker.publish(1, "task.updated", {"id": 1})
+        for last_event_id in (first.id, "otherepoch-1"):
+            events = await self.collect(broker, 1, last_event_id)
+            self.assertEqual(events[0].type, "reset")
+
+    async def test_history_is_kept_for_recently_followed_projects(self):
+        broker = InMemoryBroker(projects=2)
+        data = mock.Mock(return_value={"id": 1})
+        self.assertIsNone(broker.publish(1, "task.created", data))
+        data.assert_not_called()
+
+        await self.follow(broker, 1)
+        first = broker.publish(1, "task.created", data)
+        data.assert_called_once()
+        await self.follow(broker, 2)
+        await self.follow(broker, 3)
+        self.assertEqual(list(broker._history), [2, 3])
+        self.assertEqual(broker._subscribers, {})
+
+        # Resuming an evicted project resets, and the lookup alone does not
+        # bring its history back.
+        self.assertEqual(broker._backlog(1, first.id), [RESET])
+        self.assertEqual(list(broker._history), [2, 3])
+        self.assertEqual(await self.follow(broker, 1, first.id), RESET)
+        self.assertEqual(list(broker._history), [3, 1])
+
+    def test_task_writes_publish_after_commit(self):
+        broker = InMemoryBroker()
+        broker._follow(self.project.id)
+        with mock.patch("userapi.events._broker", broker):
+            with self.captureOnCommitCallbacks(execute=True):
+                task = self.create_tasks(1)[0]
+                task.save()
+                self.client.post(
+                    f"/api/projects/{self.project.id}/tasks/bulk/",
+                    {"delete": [task.id]},
+                    format="json",
+                )
+        history = broker._history[self.project.id].events
+        self.assertEqual(
+            [event.type for event in history], ["task.updated", "task.deleted"]
+        )
+        self.assertEqual(history[0].data["id"], task.id)
+
+    async def test_stream_view_formats_events(self):
+        broker = InMemoryBroker()
+        broker._follow(self.project.id)
+        event = broker.publish(self.project.id, "task.created", {"id": 7})
+        request = AsyncRequestFactory().get(
+            f"/api/projects/{self.project.id}/tasks/events/",
+            headers={
+                "Authorization": self.client._credentials["HTTP_AUTHORIZATION"],
+                "Last-Event-ID": f"{broker.epoch}-0",
+            },
+        )
+        with mock.patch("userapi.events._broker", broker):
+            response = await TaskEventStreamView.as_view()(
+                request, project_id=self.project.id
+            )
+            chunks = aiter(response.streaming_content)
+            self.assertEqual(await anext(chunks), b"retry: 3000\n\n")
+            self.assertEqual(
+                await anext(chunks),
+                f'event: task.created\nid: {event.id}\ndata: {{"id":7}}\n\n'.encode(),
+            )
+            await chunks.aclose()
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+    def test_stream_view_requires_asgi(self):
+        response = self.client.get(f"/api/projects/{self.project.id}/tasks/events/")
+        self.assertEqual(response.status_code, 501)
+        self.assertIn("ASGI", response.json()["error"])
+
+
+class QueryBudgetTests(APITestMixin, TestCase):
+    """
+    Query budget of every endpoint in ``urls.py`` on a cold request, with the
+    permission, user and response caches empty.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.task = self.create_tasks(3)[0]
+        self.member = User.objects.create_user(username="member", password="secret")
+        ProjectMember.objects.create(project=self.project, user=self.member)
+        self.base = f"/api/projects/{self.project.id}"
+        self.new_task = {"title": "T", "description": "D", "due_date": "2024-01-01"}
+
+    # Routes of urls.py that have been given a budget by the tests that ran.
+    budgeted = set()
+
+    def assertQueryBudget(self, queries, method, url, data=None, status_code=200):
+        permission_cache.clear()
+        user_cache.clear()
+        cache.clear()
+        with self.assertNumQueries(queries):
+            response = getattr(self.client, method)(url, data, format="json")
+            # Downloads are read to the end; event streams never end.
+            if response.streaming and not response["Content-Type"].startswith(
+                "text/event-stream"
+            ):
+                b"".join(response.streaming_content)
+                response.close()
+        self.assertEqual(response.status_code, status_code)
+        self.budgeted.add(response.resolver_match.route)
+        return response
+
+    @override_settings(JWT_REVOCATION_PRUNE_RATE=0)
+    def test_auth(self):
+        self.client = APIClient()
+        self.assertQueryBudget(0, "get", "/api/")
+        credentials = {"username": "new", "password": "secret"}
+        self.assertQueryBudget(1, "post", "/api/auth/register/", credentials, 201)
+        response = self.assertQueryBudget(1, "post", "/api/auth/login/", credentials)
+        # Savepoint, revocation insert, release and the user lookup.
+        response = self.assertQueryBudget(
+            4, "post", "/api/auth/refresh/", {"refresh": response.data["refresh"]}
+        )
+        self.assertQueryBudget(
+            3, "post", "/api/auth/logout/", {"refresh": response.data["refresh"]}
+        )
+
+    def test_cache_stats_and_metrics(self):
+        self.client = self.client_for(
+            User.objects.create_user(username="admin", is_staff=True)
+        )
+        self.assertQueryBudget(1, "get", "/api/cache/stats/")
+        self.assertQueryBudget(1, "get", "/api/metrics/")
+
+    def test_projects(self):
+        project = {"name": "Gemini", "description": "Orbit"}
+        self.assertQueryBudget(2, "get", "/api/projects/")
+        self.assertQueryBudget(3, "post", "/api/projects/", project, 201)
+        self.assertQueryBudget(3, "put", f"{self.base}/", {"description": "Sun"})
+        self.assertQueryBudget(4, "delete", f"{self.base}/", status_code=202)
+
+    def test_jobs(self):
+        tasks = {"tasks": [self.new_task]}
+        self.assertQueryBudget(2, "post", f"{self.base}/tasks/import/", tasks, 202)
+        with tempfile.TemporaryDirectory() as files, override_settings(
+            JOB_FILES_ROOT=files
+        ):
+            upload = SimpleUploadedFile("tasks.csv", b"title,description,due_date\n")
+            permission_cache.clear()
+            with self.assertNumQueries(2):
+                response = self.client.post(
+                    f"{self.base}/tasks/import/", {"file": upload}
+                )
+            self.assertEqual(response.status_code, 202)
+            response = self.assertQueryBudget(
+                2, "post", f"{self.base}/export/", None, 202
+            )
+            call_command("worker", burst=True, stdout=StringIO())
+            self.assertQueryBudget(1, "get", "/api/jobs/")
+            self.assertQueryBudget(1, "get", response["Location"])
+            self.assertQueryBudget(1, "get", f"{response['Location']}download/")
+
+    def test_exports(self):
+        # The rows are read while the response is streamed.
+        self.assertQueryBudget(2, "get", f"{self.base}/tasks/export/")
+        self.assertQueryBudget(1, "get", "/api/tasks/mine/export/")
+
+    def test_my_tasks(self):
+        self.assertQueryBudget(1, "get", "/api/tasks/mine/")
+        self.assertQueryBudget(2, "get", "/api/tasks/search/?q=task")
+
+    def test_tasks(self):
+        task_url = f"{self.base}/tasks/{self.task.id}/"
+        self.assertQueryBudget(3, "get", f"{self.base}/tasks/")
+        self.assertQueryBudget(4, "post", f"{self.base}/tasks/", self.new_task, 201)
+        self.assertQueryBudget(5, "put", task_url, {"status": "Done"})
+        self.assertQueryBudget(5, "delete", task_url, status_code=204)
+
+    def test_task_bulk(self):
+        batch = {
+            "create": [self.new_task] * 10,
+            "update": [{"id": self.task.id, "status": "Done"}],
+        }
+        self.assertQueryBudget(8, "post", f"{self.base}/tasks/bulk/", batch)
+
+    def test_task_reads(self):
+        self.assertQueryBudget(3, "get", f"{self.base}/tasks/summary/")
+        self.assertQueryBudget(3, "get", f"{self.base}/tasks/changes/")
+        # Event streams are only served over ASGI.
+        self.client = ASGIClient(self.client)
+        self.assertQueryBudget(1, "get", f"{self.base}/tasks/events/")
+
+    def test_members(self):
+        user = User.objects.create_user(username="third", password="secret")
+        member_url = f"{self.base}/members/{user.id}/"
+        self.assertQueryBudget(3, "get", f"{self.base}/members/")
+        self.assertQueryBudget(
+            6, "post", f"{self.base}/members/", {"user": user.id}, 201
+        )
+        self.assertQueryBudget(4, "put", member_url, {"can_update": True})
+        self.assertQueryBudget(4, "delete", member_url, status_code=204)
+
+    def test_member_bulk(self):
+        payload = {
+            "members": [
+                {"username": f"user{index}", "can_create": True} for index in range(20)
+            ]
+        }
+        User.objects.bulk_create(User(username=f"user{index}") for index in range(20))
+        self.assertQueryBudget(7, "post", f"{self.base}/members/bulk/", payload)
+
+
+class QueryBudgetCoverageTests(unittest.TestCase):
+    # Runs QueryBudgetTests in its own transactions; the test runner only
+    # needs to know to create the database.
+    databases = {"default"}
+
+    def test_every_route_has_a_budget(self):
+        QueryBudgetTests.budgeted.clear()
+        result = unittest.TestResult()
+        unittest.TestLoader().loadTestsFromTestCase(QueryBudgetTests).run(result)
+        self.assertEqual(result.errors + result.failures, [])
+        self.assertEqual(
+            sorted(set(api_routes()) - QueryBudgetTests.budgeted),
+            [],
+            "Give these routes a budget in QueryBudgetTests.",
+        )
+
+
+@skipUnless(connection.vendor == "sqlite", "SQLite PRAGMAs")
+class SQLiteTuningTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_connection_pragmas(self):
+        self.assertEqual(self.pragma("synchronous"), 1)
+        self.assertEqual(self.pragma("busy_timeout"), 20000)
+        self.assertEqual(self.pragma("temp_store"), 2)
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1"])
+class ReplicaRoutingTests(TestCase):
+    router = PrimaryReplicaRouter()
+
+    def route(self, request):
+        routes = [self.router.db_for_read(Task)]
+        self.router.db_for_write(Task)
+        routes.append(self.router.db_for_read(Task))
+        return routes
+
+    def test_reads_stick_to_primary_after_a_write(self):
+        with pin_to_primary(False):
+            self.assertEqual(self.route(None), ["replica_1", "default"])
+        with pin_to_primary(False):
+            self.assertEqual(self.router.db_for_read(Task), "replica_1")
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_default(self):
+        with pin_to_primary(False):
+            self.assertEqual(self.router.db_for_read(Task), "default")
+
+    def test_middleware_pins_unsafe_methods(self):
+        middleware = replica_pinning_middleware(self.route)
+        factory = RequestFactory()
+        self.assertEqual(middleware(factory.get("/")), ["replica_1", "default"])
+        self.assertEqual(middleware(factory.post("/")), ["default", "default"])
+
+    def test_response_cache_skips_payloads_behind_the_primary(self):
+        request = APIClient().get("/").wsgi_request
+        etags = iter(['W/"replica"', 'W/"primary"', 'W/"same"', 'W/"same"'])
+        cache.delete("replica-key")
+        with mock.patch("userapi.cache.reads_from_replica", return_value=True):
+            cached_response(
+                request, "replica-key", lambda: next(etags), lambda: {"data": []}
+            )
+            self.assertIsNone(cache.get("replica-key"))
+            cached_response(
+                request, "replica-key", lambda: next(etags), lambda: {"data": []}
+            )
+        self.assertEqual(cache.get("replica-key"), ('W/"same"', {"data": []}))
+
+
+@override_settings(PERF_METRICS_ENABLED=True, PERF_SLOW_REQUEST_MS=60000)
+class PerformanceMiddlewareTests(APITestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        metrics_registry.reset()
+        self.create_tasks(3)
+        self.url = f"/api/projects/{self.project.id}/tasks/"
+
+    def test_server_timing_header(self):
+        response = self.client.get(self.url)
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="3 queries"')
+        self.assertIn("serialize;dur=", timing)
+        self.assertIn("render;dur=", timing)
+
+    def test_metrics_are_aggregated_per_route(self):
+        self.client.get(self.url)
+        self.client.get(self.url)
+        admin = User.objects.create_user(username="admin", is_staff=True)
+        response = self.client_for(admin).get("/api/metrics/")
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        labels = 'route="api/projects/<int:project_id>/tasks/",method="GET"'
+        self.assertIn(f"userapi_request_duration_seconds_count{{{labels}}} 2", body)
+        self.assertIn(f"userapi_response_bytes_total{{{labels}}} ", body)
+        self.assertIn(f'{labels},phase="serialize"', body)
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 403)
+
+    @override_settings(PERF_SLOW_REQUEST_MS=0)
+    def test_slow_requests_are_logged_with_sql(self):
+        with self.assertLogs("userapi.performance", "WARNING") as logs:
+            self.client.get(self.url)
+        self.assertIn("GET api/projects/<int:project_id>/tasks/", logs.output[0])
+        self.assertIn('FROM "userapi_task"', logs.output[0])
+
+    @override_settings(PERF_METRICS_ENABLED=False)
+    def test_disabled_by_default(self):
+        response = self.client_for(self.owner).get(self.url)
+        self.assertNotIn("Server-Timing", response)
+
+
+class BenchmarkCommandTests(TestCase):
+    def setUp(self):
+        permission_cache.clear()
+        user_cache.clear()
+        files = tempfile.TemporaryDirectory()
+        self.addCleanup(files.cleanup)
+        self.tmp = Path(files.name)
+
+    def test_seed_then_benchmark_every_route(self):
+        out = StringIO()
+        call_command("seed", tasks=40, projects=2, users=4, stdout=out)
+        self.assertEqual(
+            json.loads(out.getvalue()),
+            {"prefix": "bench", "users": 5, "projects": 2, "members": 6, "tasks": 40},
+        )
+        with self.assertRaises(CommandError):
+            call_command("seed", tasks=1, stdout=StringIO())
+
+        report_path = self.tmp / "report.json"
+        with override_settings(JOB_FILES_ROOT=self.tmp / "jobs"):
+            call_command(
+                "benchmark",
+                requests=2,
+                warmup=0,
+                auth_requests=1,
+                output=str(report_path),
+                stdout=StringIO(),
+            )
+        self.assertEqual(list((self.tmp / "jobs").iterdir()), [])
+        report = json.loads(report_path.read_text())
+        self.assertEqual(report["uncovered"], [])
+        self.assertEqual(report["meta"]["tasks"], 40)
+        for name, result in report["routes"].items():
+            self.assertTrue(
+                all(code.startswith("2") for code in result["statuses"]), name
+            )
+            self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+        # Writes are rolled back after every request.
+        self.assertEqual(Task.objects.count(), 40)
+
+    def test_compare_flags_regressions(self):
+        def write(name, p95, queries):
+            path = self.tmp / name
+            route = {"p95_ms": p95, "queries_per_request": queries}
+            path.write_text(json.dumps({"routes": {"tasks-list": route}}))
+            return str(path)
+
+        baseline = write("a.json", 10.0, 2)
+        out = StringIO()
+        call_command(
+            "benchmark", compare=[baseline, write("b.json", 10.5, 2)], stdout=out
+        )
+        self.assertEqual(json.loads(out.getvalue())["regressions"], [])
+        with self.assertRaisesMessage(CommandError, "tasks-list"):
+            call_command(
+                "benchmark",
+                compare=[baseline, write("c.json", 10.0, 3)],
+                fail_on_regression=True,
+                stdout=StringIO(),
+            )
@@ -0,0 +1,91 @@
+import random
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import jwt
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from .models import RevokedToken
+
+
+def encode(payload):
+    return jwt.encode(payload, settings.SECRET_KEY, algorithm="HS256")
+
+
+def issue_tokens(user):
+    """
+    A short-lived access token carrying the claims ``TokenUser`` needs and a
+    long-lived refresh token that can only be exchanged at ``auth/refresh/``.
+    """
+    now = timezone.now()
+    access_lifetime = getattr(settings, "JWT_ACCESS_TOKEN_LIFETIME", 900)
+    refresh_lifetime = getattr(settings, "JWT_REFRESH_TOKEN_LIFETIME", 30 * 86400)
+    access = encode(
+        {
+            "type": "access",
+            "id": user.id,
+            "username": user.username,
+            "is_active": user.is_active,
+            "exp": (now + timedelta(seconds=access_lifetime)).timestamp(),
+            "iat": now.timestamp(),
+        }
+    )
+    refresh = encode(
+        {
+            "type": "refresh",
+            "id": user.id,
+            "jti": uuid.uuid4().hex,
+            "exp": (now + timedelta(seconds=refresh_lifetime)).timestamp(),
+            "iat": now.timestamp(),
+        }
+    )
+    return {"token": access, "refresh": refresh, "expires_in": access_lifetime}
+
+
+def decode_refresh_token(token):
+    if not token:
+        raise AuthenticationFailed("Refresh token is required")
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+    except jwt.ExpiredSignatureError:
+        raise AuthenticationFailed("Refresh token has expired")
+    except jwt.InvalidTokenError:
+        raise AuthenticationFailed("Invalid refresh token")
+    if payload.get("type") != "refresh" or "jti" not in payload:
+        raise AuthenticationFailed("Invalid refresh token")
+    return payload
+
+
+def revoke_refresh_token(payload):
+    """
+    Record the token id as used. The insert doubles as the revocation check:
+    a second attempt with the same token hits the primary key and fails.
+    """
+    expires_at = datetime.fromtimestamp(payload["exp"], tz=dt_timezone.utc)
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(jti=payload["jti"], expires_at=expires_at)
+    except IntegrityError:
+        raise AuthenticationFailed("Refresh token has been revoked")
+    if random.random() < getattr(settings, "JWT_REVOCATION_PRUNE_RATE", 0.01):
+        RevokedToken.objects.filter(expires_at__lt=timezone.now()).delete()
+
+
+def rotate_refresh_token(token):
+    """
+    Revoke ``token`` and return its user, without checking a password. Each
+    refresh token is single-use; the caller issues a new pair.
+    """
+    payload = decode_refresh_token(token)
+    revoke_refresh_token(payload)
+    user = (
+        User.objects.filter(id=payload["id"], is_active=True)
+        .only("id", "username", "is_active")
+        .first()
+    )
+    if user is None:
+        raise AuthenticationFailed("User is inactive or no longer exists")
+    return user
@@ -1,20 +1,90 @@
 # api/urls.py
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProjectAPIView, TaskAPIView, UserViewSet, ProjectMemberAPIView
+from .async_views import (
+    AsyncProjectAPIView,
+    AsyncProjectMemberAPIView,
+    AsyncTaskAPIView,
+    TaskEventStreamView,
+)
+from .views import (
+    CacheStatsAPIView,
+    JobAPIView,
+    JobDownloadAPIView,
+    MetricsAPIView,
+    MyTaskAPIView,
+    MyTaskExportAPIView,
+    ProjectAPIView,
+    ProjectExportAPIView,
+    ProjectMemberBulkAPIView,
+    TaskAPIView,
+    TaskBulkAPIView,
+    TaskChangesAPIView,
+    TaskExportAPIView,
+    TaskImportAPIView,
+    TaskSearchAPIView,
+    TaskSummaryAPIView,
+    UserViewSet,
+    ProjectMemberAPIView,
+)
 
 router = DefaultRouter()
 router.register(r"auth", UserViewSet, basename="users")
 
+
+def api_path(route, view, async_view, name):
+    """
+    Route to ``async_view`` when ``name`` is listed in ``ASYNC_API_VIEWS``.
+    """
+    if name in getattr(settings, "ASYNC_API_VIEWS", ()):
+        return path(route, async_view.as_view(), name=name)
+    return path(route, view.as_view(), name=name)
+
+
 urlpatterns = [
     path("", include(router.urls)),
-    path("projects/", ProjectAPIView.as_view(), name="projects"),
-    path("projects/<int:pk>/", ProjectAPIView.as_view(), name="projects"),
-    path("projects/<int:project_id>/tasks/", TaskAPIView.as_view()),
-    path("projects/<int:project_id>/tasks/<int:pk>/", TaskAPIView.as_view()),
-    path("projects/<int:project_id>/members/", ProjectMemberAPIView.as_view()),
+    path("cache/stats/", CacheStatsAPIView.as_view()),
+    path("metrics/", MetricsAPIView.as_view()),
+    path("jobs/", JobAPIView.as_view()),
+    path("jobs/<int:pk>/", JobAPIView.as_view()),
+    path("jobs/<int:pk>/download/", JobDownloadAPIView.as_view()),
+    path("tasks/mine/", MyTaskAPIView.as_view()),
+    path("tasks/mine/export/", MyTaskExportAPIView.as_view()),
+    path("tasks/search/", TaskSearchAPIView.as_view()),
+    api_path("projects/", ProjectAPIView, AsyncProjectAPIView, "projects"),
+    api_path("projects/<int:pk>/", ProjectAPIView, AsyncProjectAPIView, "projects"),
+    api_path(
+        "projects/<int:project_id>/tasks/", TaskAPIView, AsyncTaskAPIView, "tasks"
+    ),
+    api_path(
+        "projects/<int:project_id>/tasks/<int:pk>/",
+        TaskAPIView,
+        AsyncTaskAPIView,
+        "task-detail",
+    ),
+    path("projects/<int:project_id>/tasks/bulk/", TaskBulkAPIView.as_view()),
+    path("projects/<int:project_id>/tasks/import/", TaskImportAPIView.as_view()),
+    path("projects/<int:project_id>/tasks/export/", TaskExportAPIView.as_view()),
+    path("projects/<int:project_id>/tasks/summary/", TaskSummaryAPIView.as_view()),
+    path("projects/<int:project_id>/tasks/changes/", TaskChangesAPIView.as_view()),
     path(
+        "projects/<int:project_id>/tasks/events/",
+        TaskEventStreamView.as_view(),
+        name="task-events",
+    ),
+    api_path(
+        "projects/<int:project_id>/members/",
+        ProjectMemberAPIView,
+        AsyncProjectMemberAPIView,
+        "members",
+    ),
+    path("projects/<int:project_id>/members/bulk/", ProjectMemberBulkAPIView.as_view()),
+    path("projects/<int:project_id>/export/", ProjectExportAPIView.as_view()),
+    api_path(
         "projects/<int:project_id>/members/<int:user_id>/",
-        ProjectMemberAPIView.as_view(),
+        ProjectMemberAPIView,
+        AsyncProjectMemberAPIView,
+        "member-detail",
     ),
 ]
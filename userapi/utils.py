@@ -0,0 +1,58 @@
+import threading
+import time
+from collections import OrderedDict
+
+from rest_framework.exceptions import ValidationError
+
+
+def get_requested_fields(request, allowed, param="fields"):
+    value = request.query_params.get(param)
+    if not value:
+        return None
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValidationError({param: f"Unknown fields: {', '.join(unknown)}."})
+    return fields
+
+
+class TTLCache:
+    """
+    Small thread-safe LRU cache whose entries also expire after ``ttl`` seconds.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires = item
+            if expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
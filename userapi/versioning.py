@@ -0,0 +1,91 @@
+import hashlib
+
+from django.db.models import Count, F, Max, Sum
+from django.utils.http import parse_etags
+from .models import Project
+
+
+def bump_project_version(project_id):
+    if project_id:
+        Project.objects.filter(id=project_id).update(version=F("version") + 1)
+
+
+def get_project_version(project_id):
+    return next(
+        iter(Project.objects.filter(id=project_id).values_list("version", flat=True)),
+        None,
+    )
+
+
+async def aget_project_version(project_id):
+    return await (
+        Project.objects.filter(id=project_id).values_list("version", flat=True).afirst()
+    )
+
+
+def make_etag(*parts):
+    digest = hashlib.md5(
+        ":".join(str(part) for part in parts).encode(), usedforsecurity=False
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+def project_etag(request, project_id, *extra):
+    """
+    Weak ETag for a response derived from one project's rows. It changes
+    whenever the project version is bumped or the query string differs.
+    """
+    return make_etag(
+        "project",
+        project_id,
+        get_project_version(project_id),
+        request.get_full_path(),
+        *extra,
+    )
+
+
+async def aproject_etag(request, project_id, *extra):
+    return make_etag(
+        "project",
+        project_id,
+        await aget_project_version(project_id),
+        request.get_full_path(),
+        *extra,
+    )
+
+
+def owner_projects_state(request):
+    return Project.objects.filter(owner=request.user.id).aggregate(
+        count=Count("id"), versions=Sum("version"), last=Max("id")
+    )
+
+
+async def aowner_projects_state(request):
+    return await Project.objects.filter(owner=request.user.id).aaggregate(
+        count=Count("id"), versions=Sum("version"), last=Max("id")
+    )
+
+
+def owner_projects_etag(request, state=None):
+    state = state or owner_projects_state(request)
+    return make_etag(
+        "projects",
+        request.user.id,
+        state["count"],
+        state["versions"],
+        state["last"],
+        request.get_full_path(),
+    )
+
+
+def etag_matches(request, etag):
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in parse_etags(header)}
+
+
+def _opaque(etag):
+    return etag[2:] if etag.startswith("W/") else etag
@@ -1,30 +1,77 @@
 from datetime import timedelta
+from pathlib import Path
 from rest_framework import views, viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework.exceptions import AuthenticationFailed
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render
 from django.utils import timezone
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
 from django.db.utils import IntegrityError
-import jwt
-from .models import Project, Task, ProjectMember
+from .models import Job, Project, Task, ProjectMember
 from .serializers import (
     ProjectSerializer,
     TaskSerializer,
     UserSerializer,
+    ProjectMemberBulkSerializer,
+    JobSerializer,
     ProjectMemberSerializer,
+    ProjectMemberValuesSerializer,
+    ProjectValuesSerializer,
+    TaskBulkSerializer,
+    TaskValuesSerializer,
 )
 from .authentication import UserAuthentication
+from .cache import (
+    cached_response,
+    invalidate_owner,
+    invalidate_project,
+    response_cache_key,
+    stats,
+)
+from .events import publish_task_events_on_commit
+from .exports import (
+    EXPORT_FORMATS,
+    accepts_gzip,
+    export_rows,
+    get_export_format,
+    stream_export,
+)
+from .filters import filter_tasks, get_task_ordering
+from .imports import get_import_format
+from .jobs import enqueue, job_accepted, save_job_upload
+from .metrics import registry
+from .pagination import ChangesPaginator, KeysetPaginator, SearchPaginator
 from .permissions import (
     CanAddMembers,
+    CanBulkEditTasks,
     CanCreateTask,
     CanDeleteTask,
     CanUpdateTask,
     IsProjectMember,
+    accessible_projects,
+    get_project_access,
+    invalidate_project_access,
+)
+from .search import index_tasks, parse_search_terms, search_tasks
+from .tokens import (
+    decode_refresh_token,
+    issue_tokens,
+    revoke_refresh_token,
+    rotate_refresh_token,
+)
+from .utils import get_requested_fields
+from .versioning import (
+    bump_project_version,
+    etag_matches,
+    owner_projects_etag,
+    project_etag,
 )
 
 
@@ -64,13 +111,34 @@ class UserViewSet(viewsets.ViewSet):
             user = authenticate(username=username, password=password)
             if not user:
                 raise AuthenticationFailed("Invalid credentials")
-            payload = {
-                "id": user.id,
-                "exp": (timezone.now() + timedelta(hours=24)).timestamp(),
-                "iat": timezone.now().timestamp(),
-            }
-            token = jwt.encode(payload, settings.SECRET_KEY, algorithm="HS256")
-            return Response({"msg": "Login successfully!", "token": token})
+            return Response({"msg": "Login successfully!", **issue_tokens(user)})
+        except Exception as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=False, methods=["post"])
+    def refresh(self, request):
+        try:
+            user = rotate_refresh_token(request.data.get("refresh"))
+            return Response(
+                {"msg": "Token refreshed successfully!", **issue_tokens(user)}
+            )
+        except AuthenticationFailed as e:
+            return Response({"error": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+        except Exception as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=False, methods=["post"])
+    def logout(self, request):
+        try:
+            payload = decode_refresh_token(request.data.get("refresh"))
+            revoke_refresh_token(payload)
+            return Response({"msg": "Logged out successfully!"})
+        except AuthenticationFailed as e:
+            return Response({"error": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
         except Exception as e:
             return Response(
                 {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -83,17 +151,21 @@ class ProjectAPIView(views.APIView):
 
     def get(self, request):
         try:
-            projects = Project.objects.filter(deleted=False, owner=request.user)
-            serializer = ProjectSerializer(projects, many=True)
-            return Response(
-                {"data": serializer.data},
-                status=status.HTTP_200_OK,
+            return cached_response(
+                request,
+                response_cache_key("projects", f"owner:{request.user.id}", request),
+                lambda: owner_projects_etag(request),
+                lambda: self.list_projects(request),
             )
         except Exception as e:
             return Response(
                 {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def list_projects(self, request):
+        projects = Project.objects.filter(deleted=False, owner=request.user.id)
+        return {"data": ProjectValuesSerializer().serialize_queryset(projects)}
+
     def post(self, request):
         try:
             data = request.data
@@ -117,7 +189,7 @@ class ProjectAPIView(views.APIView):
         try:
             if pk:
                 project = get_object_or_404(Project, id=pk)
-                if project.owner != request.user:
+                if project.owner_id != request.user.id:
                     return Response(
                         {"error": "Only owner can update the project."},
                         status=status.HTTP_400_BAD_REQUEST,
@@ -126,6 +198,7 @@ class ProjectAPIView(views.APIView):
                 serializer = ProjectSerializer(project, data=data, partial=True)
                 if serializer.is_valid():
                     serializer.save()
+                    invalidate_owner(request.user.id)
                     return Response(
                         {
                             "msg": "Project updated successfully",
@@ -149,7 +222,7 @@ class ProjectAPIView(views.APIView):
         try:
             if pk:
                 project = get_object_or_404(Project, id=pk)
-                if project.owner != request.user:
+                if project.owner_id != request.user.id:
                     return Response(
                         {"error": "Only owner can delete the project."},
                         status=status.HTTP_400_BAD_REQUEST,
@@ -157,7 +230,14 @@ class ProjectAPIView(views.APIView):
                 if not project.deleted:
                     project.deleted = True
                     project.save()
-                    return Response(status=status.HTTP_204_NO_CONTENT)
+                    # Tasks and members are soft-deleted by a background job.
+                    job = enqueue("project.delete", request.user.id, project.id)
+                    data, headers = job_accepted(job)
+                    return Response(
+                        {"msg": "Project deleted successfully!", **data},
+                        status=status.HTTP_202_ACCEPTED,
+                        headers=headers,
+                    )
                 return Response(
                     {"msg": "Project already deleted."},
                     status=status.HTTP_400_BAD_REQUEST,
@@ -178,24 +258,34 @@ class ProjectMemberAPIView(views.APIView):
 
     def get(self, request, project_id):
         try:
-            project_members = ProjectMember.objects.filter(
-                deleted=False, project=project_id
-            )
-            serializer = ProjectMemberSerializer(project_members, many=True)
-            return Response(
-                {"data": serializer.data},
-                status=status.HTTP_200_OK,
+            return cached_response(
+                request,
+                response_cache_key("members", f"project:{project_id}", request),
+                lambda: project_etag(request, project_id),
+                lambda: self.list_members(project_id),
             )
         except Exception as e:
             return Response(
                 {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def list_members(self, project_id):
+        project_members = ProjectMember.objects.filter(
+            deleted=False, project=project_id
+        )
+        return {
+            "data": ProjectMemberValuesSerializer().serialize_queryset(project_members)
+        }
+
     def post(self, request, project_id):
         try:
-            project = get_object_or_404(Project, id=project_id)
+            # CanAddMembers has already resolved the project for this request.
+            if not get_project_access(request, project_id).exists:
+                return Response(
+                    {"error": "Project not found."}, status=status.HTTP_404_NOT_FOUND
+                )
             data = request.data
-            data["project"] = project.id
+            data["project"] = project_id
             serializer = ProjectMemberSerializer(data=data)
             if serializer.is_valid():
                 serializer.save()
@@ -213,8 +303,11 @@ class ProjectMemberAPIView(views.APIView):
 
     def put(self, request, project_id, user_id):
         try:
+            # The unique-together validator reads both relations on update.
             project_member = get_object_or_404(
-                ProjectMember, project_id=project_id, user_id=user_id
+                ProjectMember.objects.select_related("project", "user"),
+                project_id=project_id,
+                user_id=user_id,
             )
             data = request.data
             serializer = ProjectMemberSerializer(
@@ -242,7 +335,7 @@ class ProjectMemberAPIView(views.APIView):
             project_member = get_object_or_404(
                 ProjectMember, project_id=project_id, user_id=user_id
             )
-            if request.user == project_member.project.owner:
+            if get_project_access(request, project_id).is_owner:
                 if not project_member.deleted:
                     project_member.deleted = True
                     project_member.save()
@@ -261,6 +354,116 @@ class ProjectMemberAPIView(views.APIView):
             )
 
 
+class ProjectMemberBulkAPIView(views.APIView):
+    authentication_classes = [UserAuthentication]
+    permission_classes = [IsAuthenticated, CanAddMembers]
+    flags = ["can_create", "can_update", "can_delete", "add_members"]
+
+    def post(self, request, project_id):
+        try:
+            members = request.data.get("members")
+            if not isinstance(members, list):
+                return Response(
+                    {"error": "members must be a list."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if len(members) > settings.MEMBER_BULK_MAX_ITEMS:
+                return Response(
+                    {
+                        "error": f"At most {settings.MEMBER_BULK_MAX_ITEMS} "
+                        "members are allowed per batch."
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            serializer = ProjectMemberBulkSerializer(data=members, many=True)
+            if not serializer.is_valid():
+                return Response(
+                    {"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST
+                )
+            if not get_project_access(request, project_id).exists:
+                return Response(
+                    {"error": "Project not found."}, status=status.HTTP_404_NOT_FOUND
+                )
+
+            items = serializer.validated_data
+            user_ids = {item["user"] for item in items if "user" in item}
+            usernames = {item["username"] for item in items if "username" in item}
+            users = User.objects.filter(
+                Q(id__in=user_ids) | Q(username__in=usernames)
+            ).values_list("id", "username")
+            by_id = {user_id: user_id for user_id, _ in users}
+            by_username = {username: user_id for user_id, username in users}
+
+            # Later entries for the same user win; earlier ones are skipped.
+            requested, not_found = {}, []
+            for item in items:
+                if "user" in item:
+                    user_id = by_id.get(item["user"])
+                else:
+                    user_id = by_username.get(item["username"])
+                if user_id is None:
+                    not_found.append(item.get("username", item.get("user")))
+                else:
+                    requested[user_id] = item
+
+            existing = {
+                member.user_id: member
+                for member in ProjectMember.objects.filter(
+                    project=project_id, user__in=list(requested)
+                )
+            }
+            rows, created, updated = [], 0, 0
+            for user_id, item in requested.items():
+                current = existing.get(user_id)
+                flags = {
+                    flag: item.get(flag, getattr(current, flag, False))
+                    for flag in self.flags
+                }
+                if current is None:
+                    created += 1
+                elif current.deleted or any(
+                    getattr(current, flag) != value for flag, value in flags.items()
+                ):
+                    updated += 1
+                else:
+                    continue
+                rows.append(
+                    ProjectMember(
+                        project_id=project_id, user_id=user_id, deleted=False, **flags
+                    )
+                )
+
+            if rows:
+                with transaction.atomic():
+                    ProjectMember.objects.bulk_create(
+                        rows,
+                        update_conflicts=True,
+                        unique_fields=["project", "user"],
+                        update_fields=self.flags + ["deleted", "updated_at"],
+                    )
+                    bump_project_version(project_id)
+                # bulk_create() sends no signals, so invalidate as they would.
+                invalidate_project_access(project_id)
+                invalidate_project(project_id)
+
+            return Response(
+                {
+                    "msg": "Members saved successfully",
+                    "data": {
+                        "created": created,
+                        "updated": updated,
+                        "skipped": len(items) - created - updated,
+                        "not_found": not_found,
+                    },
+                },
+                status=status.HTTP_200_OK,
+            )
+        except Exception as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
 class TaskAPIView(views.APIView):
     authentication_classes = [UserAuthentication]
 
@@ -275,31 +478,40 @@ class TaskAPIView(views.APIView):
 
     def get(self, request, project_id):
         try:
-            tasks = Task.objects.filter(deleted=False, project=project_id)
-            if tasks:
-                serializer = TaskSerializer(tasks, many=True)
-                return Response(
-                    {"data": serializer.data},
-                    status=status.HTTP_200_OK,
-                )
-            return Response(
-                {"msg": "No tasks created yet against given project id."},
-                status=status.HTTP_200_OK,
+            return cached_response(
+                request,
+                response_cache_key("tasks", f"project:{project_id}", request),
+                lambda: project_etag(request, project_id),
+                lambda: self.list_tasks(request, project_id),
             )
+        except ValidationError as e:
+            return Response({"error": e.detail}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response(
                 {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def list_tasks(self, request, project_id):
+        fields = get_requested_fields(request, TaskSerializer.Meta.fields)
+        paginator = KeysetPaginator(ordering=get_task_ordering(request.query_params))
+        tasks = filter_tasks(
+            Task.objects.filter(deleted=False, project=project_id),
+            request.query_params,
+        )
+        serializer = TaskValuesSerializer(fields=fields)
+        tasks = tasks.values(*dict.fromkeys(serializer.columns + paginator.fields))
+        page, next_cursor = paginator.paginate_queryset(tasks, request)
+        if page or request.query_params:
+            return {"data": serializer.serialize(page), "next_cursor": next_cursor}
+        return {"msg": "No tasks created yet against given project id."}
+
     def post(self, request, project_id):
         try:
-            user = request.user
-            data = request.data
-            data["project"] = project_id
-            data["created_by"] = user.id
-            serializer = TaskSerializer(data=data)
+            # Project and creator come from the URL and token, so they are set
+            # by id instead of being fetched again for validation.
+            serializer = TaskBulkSerializer(data=request.data)
             if serializer.is_valid():
-                serializer.save()
+                serializer.save(project_id=project_id, created_by_id=request.user.id)
                 return Response(
                     {
                         "msg": "Task created successfully",
@@ -318,9 +530,9 @@ class TaskAPIView(views.APIView):
     def put(self, request, project_id, pk=None):
         try:
             if pk:
-                task = get_object_or_404(Task, id=pk)
+                task = get_object_or_404(Task, id=pk, project=project_id)
                 data = request.data
-                serializer = TaskSerializer(task, data=data, partial=True)
+                serializer = TaskBulkSerializer(task, data=data, partial=True)
                 if serializer.is_valid():
                     serializer.save()
                     return Response(
@@ -345,7 +557,7 @@ class TaskAPIView(views.APIView):
     def delete(self, request, project_id, pk=None):
         try:
             if pk:
-                task = get_object_or_404(Task, id=pk)
+                task = get_object_or_404(Task, id=pk, project=project_id)
                 if not task.deleted:
                     task.deleted = True
                     task.save()
@@ -362,3 +574,512 @@ class TaskAPIView(views.APIView):
             return Response(
                 {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class MyTaskAPIView(views.APIView):
+    authentication_classes = [UserAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            fields = get_requested_fields(request, TaskSerializer.Meta.fields)
+            paginator = KeysetPaginator(
+                ordering=get_task_ordering(request.query_params)
+            )
+            tasks = filter_tasks(
+                Task.objects.filter(
+                    deleted=False, project__in=accessible_projects(request.user.id)
+                ),
+                request.query_params,
+            )
+            serializer = TaskValuesSerializer(fields=fields)
+            # The project name is joined in so clients need no per-project lookup.
+            tasks = tasks.values(
+                *dict.fromkeys(serializer.columns + paginator.fields),
+                "project__name",
+            )
+            page, next_cursor = paginator.paginate_queryset(tasks, request)
+            data = [
+                {
+                    **serializer.to_representation(row),
+                    "project_name": row["project__name"],
+                }
+                for row in page
+            ]
+            return Response(
+                {"data": data, "next_cursor": next_cursor}, status=status.HTTP_200_OK
+            )
+        except ValidationError as e:
+            return Response({"error": e.detail}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+def task_export_response(request, tasks, filename, extra=None):
+    """
+    Stream ``tasks``, filtered and ordered like the task lists, as CSV or
+    NDJSON (``output``), gzip-compressed when the client accepts it.
+    """
+    output = get_export_format(request.query_params)
+    fields = get_requested_fields(request, TaskSerializer.Meta.fields)
+    ordering = get_task_ordering(request.query_params)
+    # Grouping by project lets the database walk the per-project indexes in
+    # order instead of sorting every row before the first one is sent.
+    project = "-project" if ordering[0].startswith("-") else "project"
+    tasks = filter_tasks(tasks, request.query_params).order_by(project, *ordering)
+    gzip = accepts_gzip(request.headers.get("Accept-Encoding", ""))
+    content_type, suffix = EXPORT_FORMATS[output]
+    response = StreamingHttpResponse(
+        stream_export(
+            export_rows(tasks, TaskValuesSerializer(fields=fields), extra),
+            output,
+            gzip,
+        ),
+        content_type=content_type,
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}{suffix}"'
+    response["Vary"] = "Accept-Encoding"
+    if gzip:
+        response["Content-Encoding"] = "gzip"
+    return response
+
+
+class TaskExportAPIView(views.APIView):
+    authentication_classes = [UserAuthentication]
+    permission_classes = [IsAuthenticated, IsProjectMember]
+
+    def get(self, request, project_id):
+        try:
+            return task_export_response(
+                request,
+                Task.objects.filter(deleted=False, project=project_id),
+                f"project-{project_id}-tasks",
+            )
+        except ValidationError as e:
+            return Response({"error": e.detail}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class MyTaskExportAPIView(views.APIView):
+    authentication_classes = [UserAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            return task_export_response(
+                request,
+                Task.objects.filter(
+                    deleted=False, project__in=accessible_projects(request.user.id)
+                ),
+                "my-tasks",
+                extra={"project_name": "project__name"},
+            )
+        except ValidationError as e:
+            return Response({"error": e.detail}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class TaskSearchAPIView(views.APIView):
+    authentication_classes = [UserAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            terms = parse_search_terms(request.query_params.get("q"))
+            fields = get_requested_fields(request, TaskSerializer.Meta.fields)
+            paginator = SearchPaginator(terms)
+            tasks = Task.objects.filter(
+                deleted=False, project__in=accessible_projects(request.user.id)
+            )
+            project = request.query_params.get("project")
+            if project:
+                if not project.isdigit():
+                    raise ValidationError({"project": "Must be a project id."})
+                tasks = tasks.filter(project=int(project))
+            tasks = search_tasks(filter_tasks(tasks, request.query_params), terms)
+            serializer = TaskValuesSerializer(fields=fields)
+            tasks = tasks.values(
+                *dict.fromkeys(serializer.columns + paginator.fields),
+                "project__name",
+            )
+            page, next_cursor = paginator.paginate_queryset(tasks, request)
+            data = [
+                {
+                    **serializer.to_representation(row),
+                    "project_name": row["project__name"],
+                }
+                for row in page
+            ]
+            return Response(
+                {"data": data, "next_cursor": next_cursor}, status=status.HTTP_200_OK
+            )
+        except ValidationError as e:
+            return Response({"error": e.detail}, status=status.HTTP_400_BAD_REQUEST)
+        except NotImplementedError as e:
+            return Response({"error": str(e)}, status=status.HTTP_501_NOT_IMPLEMENTED)
+        except Exception as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class TaskSummaryAPIView(views.APIView):
+    authentication_classes = [UserAuthentication]
+    permission_classes = [IsAuthenticated, IsProjectMember]
+
+    def get(self, request, project_id):
+        try:
+            etag = project_etag(request, project_id, timezone.localdate())
+            if etag_matches(request, etag):
+                return Response(
+                    status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+                )
+            tasks = filter_tasks(
+                Task.objects.filter(deleted=False, project=project_id),
+                request.query_params,
+            )
+            overdue = Q(due_date__lt=timezone.localdate()) & ~Q(status="Done")
+            rows = (
+                tasks.values("status")
+                .annotate(count=Count("id"), overdue=Count("id", filter=overdue))
+                .order_by()
+            )
+            by_status = {
+                choice: {"count": 0, "overdue": 0} for choice, _ in Task.STATUS_CHOICES
+            }
+            for row in rows:
+                by_status[row["status"]] = {
+                    "count": row["count"],
+                    "overdue": row["overdue"],
+                }
+            return Response(
+                {
+                    "data": {
+                        "total": sum(item["count"] for item in by_status.values()),
+                        "overdue": sum(item["overdue"] for item in by_status.values()),
+                        "by_status": by_status,
+                    }
+                },
+                status=status.HTTP_200_OK,
+                headers={"ETag": etag},
+            )
+        except ValidationError as e:
+            return Response({"error": e.detail}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class TaskChangesAPIView(views.APIView):
+    authentication_classes = [UserAuthentication]
+    permission_classes = [IsAuthenticated, IsProjectMember]
+
+    def get(self, request, project_id):
+        try:
+            etag = project_etag(request, project_id)
+            if etag_matches(request, etag):
+                return Response(
+                    status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+                )
+            return Response(
+                self.list_changes(request, project_id),
+                status=status.HTTP_200_OK,
+                headers={"ETag": etag},
+            )
+        except ValidationError as e:
+            return Response({"error": e.detail}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    def list_changes(self, request, project_id):
+        fields = get_requested_fields(request, TaskSerializer.Meta.fields)
+        paginator = ChangesPaginator()
+        tasks = Task.objects.filter(project=project_id)
+        if paginator.cursor_query_param not in request.query_params:
+            # A first sync has nothing to delete locally.
+            tasks = tasks.filter(deleted=False)
+        serializer = TaskValuesSerializer(fields=fields)
+        tasks = tasks.values(
+            *dict.fromkeys(serializer.columns + paginator.fields + ["deleted"])
+        )
+        settled_before = timezone.now() - timedelta(
+            seconds=getattr(settings, "TASK_SYNC_SETTLE_SECONDS", 5)
+        )
+        rows, watermark, has_more = paginator.paginate_changes(
+            tasks, request, settled_before
+        )
+        return {
+            "data": serializer.serialize(row for row in rows if not row["deleted"]),
+            "deleted": [row["id"] for row in rows if row["deleted"]],
+            "watermark": watermark,
+            "has_more": has_more,
+        }
+
+
+class TaskBulkAPIView(views.APIView):
+    authentication_classes = [UserAuthentication]
+    permission_classes = [IsAuthenticated, CanBulkEditTasks]
+
+    def post(self, request, project_id):
+        try:
+            creates = request.data.get("create") or []
+            updates = request.data.get("update") or []
+            deletes = request.data.get("delete") or []
+            operations = (creates, updates, deletes)
+            if not all(isinstance(items, list) for items in operations):
+                return Response(
+                    {"error": "create, update and delete must be lists."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if sum(map(len, operations)) > settings.TASK_BULK_MAX_ITEMS:
+                return Response(
+                    {
+                        "error": f"At most {settings.TASK_BULK_MAX_ITEMS} "
+                        "operations are allowed per batch."
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            create_serializer = TaskBulkSerializer(data=creates, many=True)
+            create_serializer.is_valid()
+
+            update_ids = [
+                item.get("id") if isinstance(item, dict) else None for item in updates
+            ]
+            ids = [task_id for task_id in update_ids + deletes if type(task_id) is int]
+            tasks = Task.objects.filter(deleted=False, project=project_id).in_bulk(ids)
+
+            update_errors, updated_tasks, update_fields = [], [], set()
+            for task_id, item in zip(update_ids, updates):
+                task = tasks.get(task_id) if type(task_id) is int else None
+                if task is None:
+                    update_errors.append({"id": ["Task not found."]})
+                    continue
+                serializer = TaskBulkSerializer(task, data=item, partial=True)
+                if serializer.is_valid():
+                    for field, value in serializer.validated_data.items():
+                        setattr(task, field, value)
+                    update_fields.update(serializer.validated_data)
+                    updated_tasks.append(task)
+                    update_errors.append({})
+                else:
+                    update_errors.append(serializer.errors)
+
+            delete_errors, deleted_ids = [], []
+            for task_id in deletes:
+                if type(task_id) is int and task_id in tasks:
+                    deleted_ids.append(task_id)
+                    delete_errors.append({})
+                else:
+                    delete_errors.append({"id": ["Task not found."]})
+
+            errors = {
+                "create": create_serializer.errors if creates else [],
+                "update": update_errors,
+                "delete": delete_errors,
+            }
+            if any(any(item for item in items) for items in errors.values()):
+                return Response({"error": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+            # bulk_update() and update() bypass auto_now, so stamp rows here.
+            now = timezone.now()
+            for task in updated_tasks:
+                task.updated_at = now
+            if updated_tasks:
+                update_fields.add("updated_at")
+
+            batch_size = settings.TASK_BULK_BATCH_SIZE
+            with transaction.atomic():
+                created = Task.objects.bulk_create(
+                    [
+                        Task(
+                            project_id=project_id,
+                            created_by_id=request.user.id,
+                            **data,
+                        )
+                        for data in create_serializer.validated_data
+                    ],
+                    batch_size=batch_size,
+                )
+                if updated_tasks:
+                    Task.objects.bulk_update(
+                        updated_tasks, update_fields, batch_size=batch_size
+                    )
+                for start in range(0, len(deleted_ids), batch_size):
+                    batch = deleted_ids[start : start + batch_size]
+                    Task.objects.filter(id__in=batch).update(
+                        deleted=True, updated_at=now
+                    )
+                bump_project_version(project_id)
+                for task_id in deleted_ids:
+                    tasks[task_id].deleted = True
+                    tasks[task_id].updated_at = now
+                index_tasks(
+                    created
+                    + updated_tasks
+                    + [tasks[task_id] for task_id in deleted_ids]
+                )
+                publish_task_events_on_commit(created, "task.created")
+                publish_task_events_on_commit(
+                    updated_tasks + [tasks[task_id] for task_id in deleted_ids]
+                )
+            invalidate_project(project_id)
+
+            return Response(
+                {
+                    "msg": "Bulk operation completed successfully",
+                    "data": {
+                        "created": [task.id for task in created],
+                        "updated": [task.id for task in updated_tasks],
+                        "deleted": deleted_ids,
+                    },
+                },
+                status=status.HTTP_200_OK,
+            )
+        except Exception as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class TaskImportAPIView(views.APIView):
+    authentication_classes = [UserAuthentication]
+    permission_classes = [IsAuthenticated, CanCreateTask]
+
+    def post(self, request, project_id):
+        try:
+            upload = request.FILES.get("file")
+            if upload is not None:
+                # Large uploads are spooled to a temporary file by Django, and
+                # the job parses the copy incrementally.
+                input_format = get_import_format(request.query_params, upload.name)
+                job = enqueue(
+                    "tasks.import",
+                    request.user.id,
+                    project_id,
+                    file=save_job_upload(upload, f".{input_format}"),
+                    input=input_format,
+                )
+                data, headers = job_accepted(job)
+                return Response(data, status=status.HTTP_202_ACCEPTED, headers=headers)
+
+            tasks = None
+            if isinstance(request.data, dict):
+                tasks = request.data.get("tasks")
+            if not isinstance(tasks, list) or not tasks:
+                return Response(
+                    {"error": "Upload a file or send tasks as a non-empty list."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if len(tasks) > settings.TASK_IMPORT_MAX_ITEMS:
+                return Response(
+                    {
+                        "error": f"At most {settings.TASK_IMPORT_MAX_ITEMS} "
+                        "tasks can be imported per request."
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            job = enqueue("tasks.import", request.user.id, project_id, tasks=tasks)
+            data, headers = job_accepted(job)
+            return Response(data, status=status.HTTP_202_ACCEPTED, headers=headers)
+        except ValidationError as e:
+            return Response({"error": e.detail}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class ProjectExportAPIView(views.APIView):
+    authentication_classes = [UserAuthentication]
+    permission_classes = [IsAuthenticated, IsProjectMember]
+
+    def post(self, request, project_id):
+        try:
+            job = enqueue("project.export", request.user.id, project_id)
+            data, headers = job_accepted(job)
+            return Response(data, status=status.HTTP_202_ACCEPTED, headers=headers)
+        except Exception as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class JobAPIView(views.APIView):
+    authentication_classes = [UserAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk=None):
+        jobs = Job.objects.filter(created_by=request.user.id)
+        if pk:
+            job = get_object_or_404(jobs, id=pk)
+            return Response({"data": JobSerializer(job).data})
+        try:
+            paginator = KeysetPaginator(ordering=("-id",))
+            page, next_cursor = paginator.paginate_queryset(jobs, request)
+            return Response(
+                {
+                    "data": JobSerializer(page, many=True).data,
+                    "next_cursor": next_cursor,
+                }
+            )
+        except ValidationError as e:
+            return Response({"error": e.detail}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class JobDownloadAPIView(views.APIView):
+    authentication_classes = [UserAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        job = get_object_or_404(Job, id=pk, created_by=request.user.id)
+        if job.status != Job.SUCCEEDED or not (job.result or {}).get("file"):
+            return Response(
+                {"error": "This job has no file to download."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        path = Path(settings.JOB_FILES_ROOT) / job.result["file"]
+        if not path.is_file():
+            return Response(
+                {"error": "The exported file has expired."},
+                status=status.HTTP_410_GONE,
+            )
+        return FileResponse(
+            open(path, "rb"),
+            as_attachment=True,
+            filename=f"project-{job.project_id}-tasks{path.suffix}",
+            content_type=job.result.get("content_type"),
+        )
+
+
+class MetricsAPIView(views.APIView):
+    authentication_classes = [UserAuthentication]
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(
+            registry.prometheus(), content_type="text/plain; version=0.0.4"
+        )
+
+
+class CacheStatsAPIView(views.APIView):
+    authentication_classes = [UserAuthentication]
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        return Response({"data": stats.as_dict()}, status=status.HTTP_200_OK)